@@ -2,9 +2,11 @@ from __future__ import print_function  # Python 2 and 3 print compatibility
 
 from pyspark.sql import SQLContext
 
+import hail.type
 from hail.dataset import VariantDataset
 from hail.java import *
 from hail.keytable import KeyTable
+from hail.representation import Variant
 from hail.utils import TextTableConfig
 from hail.stats import UniformDist, BetaDist, TruncatedBetaDist
 
@@ -123,9 +125,31 @@ class HailContext(object):
         return VariantDataset(self, jvds)
 
     @handle_py4j
-    def import_bgen(self, path, tolerance=0.2, sample_file=None, npartitions=None, compress=True):
+    def import_bgen(self, path, tolerance=0.2, sample_file=None, npartitions=None, compress=True,
+                    intervals=None, variants=None):
         """Import .bgen files as VariantDataset
 
+        **Examples**
+
+        Index a .bgen file, then import the variants in a region:
+
+        >>> hc.index_bgen('data/example3.bgen')
+        >>> vds_region = hc.import_bgen('data/example3.bgen', sample_file='data/example3.sample',
+        ...                             intervals=[Interval.parse('01:1-100000')])
+
+        **Notes**
+
+        Each .bgen file must first be indexed with :py:meth:`~hail.HailContext.index_bgen`.
+        Files indexed by this version of Hail are split into partitions of
+        equal numbers of variants. With ``intervals`` or ``variants``, only
+        the blocks of matching variants are read, using the variant loci
+        stored in the index.
+
+        Genotypes are held in memory as two 16-bit fixed-point probabilities
+        per sample. With ``compress=True`` (the default), each variant's
+        probabilities are additionally LZ4-compressed, trading CPU for
+        memory.
+
         :param path: .bgen files to import.
         :type path: str or list of str
 
@@ -141,12 +165,24 @@ class HailContext(object):
 
         :param bool compress: compress in-memory representation on import
 
+        :param intervals: Import only variants in these intervals, either
+            a list of intervals or the path of an .interval_list file.
+        :type intervals: list of :class:`.Interval` or str or None
+
+        :param variants: Import only these variants, as :class:`.Variant` objects or strings
+            like ``'1:100:A:T'``.
+        :type variants: list of :class:`.Variant` or str, or None
+
         :return A dataset imported from the bgen file.
         :rtype: :class:`.VariantDataset`
         """
 
         jvds = self._jhc.importBgens(jindexed_seq_args(path), joption(sample_file),
-                                     tolerance, joption(npartitions), True)
+                                     tolerance, joption(npartitions), compress,
+                                     joption(self._interval_tree(intervals)),
+                                     jnone() if variants is None else jsome(jindexed_seq(
+                                         [(Variant.parse(v) if isinstance(v, basestring) else v)._jrep
+                                          for v in variants])))
         return VariantDataset(self, jvds)
 
     @handle_py4j
@@ -260,6 +296,11 @@ class HailContext(object):
 
         Only binary SNP-major mode files can be read into Hail. To convert your file from individual-major mode to SNP-major mode, use PLINK to read in your fileset and use the ``--make-bed`` option.
 
+        Genotypes are kept in memory in the BED file's packed 2-bit encoding.
+        Local BED files are memory-mapped, and partitions always begin on a
+        variant boundary. Hard-call methods such as :py:meth:`~hail.VariantDataset.ibd`
+        and :py:meth:`~hail.VariantDataset.grm` read the packed calls directly.
+
         The centiMorgan position is not currently used in Hail (Column 3 in BIM file).
 
         The ID (``s.id``) used by Hail is the individual ID (column 2 in FAM file).
@@ -306,7 +347,7 @@ class HailContext(object):
 
         :param bool quantpheno: If True, FAM phenotype is interpreted as quantitative.
 
-        :param bool compress: Compress in-memory representation
+        :param bool compress: Ignored, genotypes are already stored packed.
 
         :return: A dataset imported from a PLINK binary file.
 
@@ -318,12 +359,44 @@ class HailContext(object):
         return VariantDataset(self, jvds)
 
     @handle_py4j
-    def read(self, path, sites_only=False, samples_only=False):
+    def read(self, path, sites_only=False, samples_only=False, intervals=None,
+             variant_fields=None, sample_fields=None, genotype_fields=None):
         """Read .vds files as VariantDataset
 
         When loading multiple .vds files, they must have the same
         sample IDs, split status and variant metadata.
 
+        **Examples**
+
+        Read only the variants in a region:
+
+        >>> vds_region = hc.read('data/example.vds', intervals=[Interval.parse('20:10000000-11000000')])
+
+        Read only the variant annotations and genotype fields needed for an
+        association:
+
+        >>> vds_pruned = hc.read('data/example.vds', variant_fields=['info.AC'], genotype_fields=['gt'])
+
+        **Notes**
+
+        With ``intervals``, only the partitions whose bounds (recorded in
+        *partitioner.json.gz*) overlap an interval are read, and within
+        those, parquet row groups whose locus statistics fall outside every
+        interval are skipped. The result is the same as reading the whole
+        dataset and calling :py:meth:`~hail.VariantDataset.filter_intervals`.
+
+        ``variant_fields`` and ``sample_fields`` are lists of dot-separated
+        paths into ``va`` and ``sa``, such as ``'qc.AF'``. The schemas keep
+        only those fields, with their nesting. Parquet reads only the
+        columns behind the selected variant fields, so large annotations
+        such as VEP output cost nothing when they are not selected.
+        ``genotype_fields`` names the genotype fields to decode (``gt``,
+        ``ad``, ``dp``, ``gq`` and ``pl``, also called ``px`` or ``dosage``).
+        The other fields read as missing and are skipped while decoding,
+        except where a selected field is computed from them. The hard call of
+        a dosage genotype is computed from its dosages, so for dosage data
+        selecting either ``gt`` or ``dosage`` reads both.
+
         :param path: .vds files to read.
         :type path: str or list of str
 
@@ -334,13 +407,40 @@ class HailContext(object):
         :param bool samples_only: If True, create samples-only
           dataset (no variants or genotypes).
 
+        :param intervals: Keep only variants in these intervals, either a
+          list of intervals or the path of an .interval_list file.
+        :type intervals: list of :class:`.Interval` or str or None
+
+        :param variant_fields: Variant annotation fields to load, or all if None.
+        :type variant_fields: list of str or None
+
+        :param sample_fields: Sample annotation fields to load, or all if None.
+        :type sample_fields: list of str or None
+
+        :param genotype_fields: Genotype fields to load, or all if None.
+        :type genotype_fields: list of str or None
+
         :return: A dataset read from disk
         :rtype: :class:`.VariantDataset`
         """
 
-        jvds = self._jhc.readAll(jindexed_seq_args(path), sites_only, samples_only)
+        def jfields(fields):
+            return jnone() if fields is None else jsome(jindexed_seq_args(fields))
+
+        jvds = self._jhc.readAll(jindexed_seq_args(path), sites_only, samples_only,
+                                 joption(self._interval_tree(intervals)),
+                                 jfields(variant_fields), jfields(sample_fields), jfields(genotype_fields))
         return VariantDataset(self, jvds)
 
+    def _interval_tree(self, intervals):
+        if intervals is None:
+            return None
+        elif isinstance(intervals, basestring):
+            return scala_object(env.hail.io.annotators, 'IntervalListAnnotator').read(
+                intervals, self._jsc.hadoopConfiguration(), True)
+        else:
+            return scala_object(env.hail.variant, 'Locus').makeIntervalTree([i._jrep for i in intervals])
+
     @handle_py4j
     def write_partitioning(self, path):
         """Write partitioning.json.gz file for legacy VDS file.
@@ -352,15 +452,27 @@ class HailContext(object):
 
     @handle_py4j
     def import_vcf(self, path, force=False, force_bgz=False, header_file=None, npartitions=None,
-                   sites_only=False, store_gq=False, pp_as_pl=False, skip_bad_ad=False, compress=False):
+                   sites_only=False, store_gq=False, pp_as_pl=False, skip_bad_ad=False, compress=False,
+                   checkpoint_bgz=False):
         """Import .vcf files as VariantDataset
 
+        **Notes**
+
+        Files ending in ``.vcf.bgz`` are read as blocked gzip (BGZF) and split
+        across cores. Files ending in ``.vcf.gz`` are inspected: if they
+        start with a BGZF block (as written by ``bgzip`` and indexed by
+        ``tabix``), they are also loaded in parallel. A plain gzip file
+        cannot be split, so it must either be loaded serially with ``force``,
+        or, with ``checkpoint_bgz``, be recompressed once to a BGZF copy next
+        to it, ``<path>.bgz``, which is loaded in parallel by this and later
+        imports as long as it is newer than the original.
+
         :param path: .vcf files to read.
         :type path: str or list of str
 
-        :param bool force: If True, load .gz files serially.
+        :param bool force: If True, load plain gzip .gz files serially.
 
-        :param bool force_bgz: If True, load .gz files as blocked gzip files (BGZF)
+        :param bool force_bgz: If True, load all .gz files as blocked gzip files (BGZF) without inspecting them.
 
         :param header_file: File to load VCF header from.  If not specified, the first file in path is used.
         :type header_file: str or None
@@ -382,6 +494,10 @@ class HailContext(object):
 
         :param bool compress: compress in-memory representation
 
+        :param bool checkpoint_bgz: If True, recompress plain gzip .gz files to a
+            BGZF copy ``<path>.bgz`` next to the input and load the copy in parallel.
+            This takes precedence over ``force``.
+
         :return: A dataset imported from the VCF file
         :rtype: :class:`.VariantDataset`
 
@@ -389,13 +505,18 @@ class HailContext(object):
 
         jvds = self._jhc.importVCFs(jindexed_seq_args(path), force, force_bgz, joption(header_file),
                                     joption(npartitions), sites_only, store_gq,
-                                    pp_as_pl, skip_bad_ad, compress)
+                                    pp_as_pl, skip_bad_ad, compress, checkpoint_bgz)
 
         return VariantDataset(self, jvds)
 
     @handle_py4j
     def index_bgen(self, path):
-        """Index .bgen files.  import_bgen cannot run with these indicies.
+        """Index .bgen files.
+
+        Writes a block index (``.idx``) and the locus of each variant
+        (``.idx.loci``) next to each file. :py:meth:`~hail.HailContext.import_bgen`
+        requires the index, and uses the loci to partition evenly and to
+        import subsets of variants without reading the whole file.
 
         :param path: .bgen files to index.
         :type path: str or list of str
@@ -547,3 +668,5 @@ class HailContext(object):
         """ Shut down the Hail Context """
         self.sc.stop()
         self.sc = None
+        # cached types hold references into this context's JVM
+        hail.type.__type_cache__.clear()
@@ -2,15 +2,198 @@ from __future__ import print_function  # Python 2 and 3 print compatibility
 
 from hail.java import *
 from hail.keytable import KeyTable
-from hail.type import Type
-from hail.utils import TextTableConfig
+from hail.type import Type, TStruct
+from hail.utils import TextTableConfig, _numpy_column, _genotype_columns
 from py4j.protocol import Py4JJavaError
 
+import json
+import re
 import warnings
 
 warnings.filterwarnings(module=__name__, action='once')
 
 
+def _escape_identifier(name):
+    if re.match(r'^[A-Za-z_$][A-Za-z0-9_$]*$', name):
+        return name
+    else:
+        return '`%s`' % name.replace('\\', '\\\\').replace('`', '\\`')
+
+
+def _leaf_paths(t, path):
+    """List the (name path, type) pairs of the non-struct leaves of a type."""
+
+    if isinstance(t, TStruct) and t.fields:
+        return [leaf for f in t.fields for leaf in _leaf_paths(f.typ, path + [f.name])]
+    else:
+        return [(path, t)]
+
+
+class QueryFuture(object):
+    """Deferred result of a query added to a :class:`.BatchQuery`.
+
+    The value is available once the batch has run, that is, after the
+    ``with vds.batch_queries() as q:`` block exits or after
+    :py:meth:`.BatchQuery.run` is called.
+    """
+
+    def __init__(self):
+        self._done = False
+        self._value = None
+        self._type = None
+
+    def _set(self, value, typ=None):
+        self._value = value
+        self._type = typ
+        self._done = True
+
+    def done(self):
+        """True if the batch containing this query has run.
+
+        :rtype: bool
+        """
+
+        return self._done
+
+    def get(self):
+        """Result of the query.
+
+        :raise: :class:`RuntimeError` if the batch has not run yet
+        """
+
+        if not self._done:
+            raise RuntimeError('query result is not available until the batch has run')
+        return self._value
+
+    @property
+    def type(self):
+        """Hail type of the result, or None for :py:meth:`.BatchQuery.count`.
+
+        :rtype: :class:`.Type`
+        """
+
+        self.get()
+        return self._type
+
+
+class BatchQuery(object):
+    """Set of queries on a :class:`.VariantDataset` that are evaluated together.
+
+    Create one with :py:meth:`.VariantDataset.batch_queries`. Each method
+    adds one query and returns a :class:`.QueryFuture`. When the batch
+    runs, all variant queries, genotype queries and the variant and
+    genotype counts are computed in a single pass over the dataset, and
+    all sample queries in a single pass over the samples.
+    """
+
+    def __init__(self, vds):
+        self._vds = vds
+        self._variant_queries = []
+        self._sample_queries = []
+        self._genotype_queries = []
+        self._counts = []
+        self._ran = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+        return False
+
+    def _add(self, queries, expr):
+        if self._ran:
+            raise RuntimeError('cannot add queries to a batch that has already run')
+        f = QueryFuture()
+        queries.append((expr, f))
+        return f
+
+    def query_variants(self, expr):
+        """Add a variant query, as in :py:meth:`.VariantDataset.query_variants`.
+
+        :param str expr: query expression
+
+        :rtype: :class:`.QueryFuture`
+        """
+
+        return self._add(self._variant_queries, expr)
+
+    def query_samples(self, expr):
+        """Add a sample query, as in :py:meth:`.VariantDataset.query_samples`.
+
+        :param str expr: query expression
+
+        :rtype: :class:`.QueryFuture`
+        """
+
+        return self._add(self._sample_queries, expr)
+
+    def query_genotypes(self, expr):
+        """Add a genotype query.
+
+        The namespace of the expression includes:
+
+        - ``global``: global annotations
+        - ``gs`` (*Aggregable[Genotype]*): aggregable of :ref:`genotype` over all variants and samples
+
+        Map and filter expressions on this aggregable have the additional
+        namespace ``v``, ``va``, ``s``, ``sa`` and ``g``.
+
+        :param str expr: query expression
+
+        :rtype: :class:`.QueryFuture`
+        """
+
+        return self._add(self._genotype_queries, expr)
+
+    def count(self, genotypes=False):
+        """Add a count, as in :py:meth:`.VariantDataset.count`.
+
+        :param bool genotypes: If True, also count called genotypes.
+
+        :rtype: :class:`.QueryFuture`
+        """
+
+        return self._add(self._counts, genotypes)
+
+    @handle_py4j
+    def run(self):
+        """Evaluate all queries in the batch and fill in their futures.
+
+        This is called automatically at the end of a ``with`` block.
+        """
+
+        if self._ran:
+            return
+        self._ran = True
+
+        vds = self._vds
+        if self._sample_queries:
+            results, types = vds.query_samples_typed([e for e, f in self._sample_queries])
+            for (e, f), r, t in zip(self._sample_queries, results, types):
+                f._set(r, t)
+
+        if self._variant_queries or self._genotype_queries or self._counts:
+            count_genotypes = any(g for g, f in self._counts)
+            jresult = vds._jvdf.queryBatch(jarray(env.jvm.java.lang.String, [e for e, f in self._variant_queries]),
+                                           jarray(env.jvm.java.lang.String, [e for e, f in self._genotype_queries]),
+                                           count_genotypes)
+
+            for queries, jresults in [(self._variant_queries, jresult.variantResults()),
+                                      (self._genotype_queries, jresult.genotypeResults())]:
+                for (e, f), x in zip(queries, jresults):
+                    t = Type._from_java(x._2())
+                    f._set(t._convert_to_py(x._1()), t)
+
+            counts = dict(jresult.count().toJavaMap())
+            for genotypes, f in self._counts:
+                if genotypes:
+                    f._set(dict(counts))
+                else:
+                    f._set(dict((k, v) for k, v in counts.items() if k not in ('nCalled', 'callRate')))
+
+
 class VariantDataset(object):
     """Hail's primary representation of genomic data, a matrix keyed by sample and variant.
 
@@ -43,6 +226,33 @@ class VariantDataset(object):
             self._jvdf_cache = env.hail.variant.VariantDatasetFunctions(self._jvds)
         return self._jvdf_cache
 
+    def _derive(self, jvds, samples=True, sample_schema=True, variant_schema=True, global_annotations=True):
+        """Wrap ``jvds``, the result of a transformation of this dataset,
+        carrying over the cached metadata the transformation leaves unchanged.
+
+        :param bool samples: sample IDs are unchanged
+        :param bool sample_schema: sample annotation schema is unchanged
+        :param bool variant_schema: variant annotation schema is unchanged
+        :param bool global_annotations: global annotations and schema are unchanged
+
+        :rtype: :class:`.VariantDataset`
+        """
+
+        vds = VariantDataset(self.hc, jvds)
+        if samples:
+            vds._sample_ids = self._sample_ids
+            vds._num_samples = self._num_samples
+        if sample_schema:
+            vds._sa_schema = self._sa_schema
+            if samples:
+                vds._sample_annotations = self._sample_annotations
+        if variant_schema:
+            vds._va_schema = self._va_schema
+        if global_annotations:
+            vds._global_schema = self._global_schema
+            vds._globals = self._globals
+        return vds
+
     @property
     def sample_ids(self):
         """Return sampleIDs.
@@ -66,15 +276,122 @@ class VariantDataset(object):
         """
 
         if self._sample_annotations is None:
-            zipped_annotations = env.jutils.iterableToArrayList(
-                self._jvds.sampleIdsAndAnnotations()
-            )
-            r = {}
-            for element in zipped_annotations:
-                r[element._1()] = self.sample_schema._convert_to_py(element._2())
-            self._sample_annotations = r
+            annotations = self.sample_schema._convert_seq_to_py(self._jvds.sampleAnnotations())
+            self._sample_annotations = dict(zip(self.sample_ids, annotations))
         return self._sample_annotations
 
+    @handle_py4j
+    def sample_annotations_frame(self, fields=None, as_pandas=True):
+        """Return selected sample annotations as columns.
+
+        **Examples**
+
+        Fetch sample QC call rate and depth as a pandas DataFrame indexed by sample ID:
+
+        >>> df = vds.sample_qc().sample_annotations_frame(['sa.qc.callRate', 'sa.qc.dpMean'])
+
+        Fetch them as NumPy arrays instead:
+
+        >>> cols = vds.sample_qc().sample_annotations_frame(['sa.qc.callRate', 'sa.qc.dpMean'], as_pandas=False)
+
+        **Notes**
+
+        Unlike :py:attr:`~hail.VariantDataset.sample_annotations`, which builds
+        a :py:class:`~hail.representation.Struct` per sample, this method
+        evaluates one ``samples.map(...).collect()`` query per requested field
+        in a single :py:meth:`.query_samples` call, and each column is
+        transferred from the JVM in one piece.
+
+        Columns are named by the field path with the leading ``sa.`` removed.
+        Numeric columns are returned as ``int64`` arrays, or ``float64`` arrays
+        with missing values as ``NaN``. Other columns are object arrays.
+
+        :param fields: sample annotation fields to fetch, like ``sa.qc.callRate``.  If None,
+            all leaf fields of the sample schema are fetched.
+        :type fields: str or list of str or None
+
+        :param bool as_pandas: If True, return a pandas DataFrame indexed by sample ID,
+            otherwise a dict mapping column name to NumPy array (with the sample IDs under ``s``).
+
+        :rtype: :py:class:`pandas.DataFrame` or dict of str to :py:class:`numpy.ndarray`
+        """
+
+        if fields is None:
+            paths = [p for p, t in _leaf_paths(self.sample_schema, []) if p]
+            names = ['.'.join(p) for p in paths]
+            exprs = ['.'.join(['sa'] + [_escape_identifier(x) for x in p]) for p in paths]
+        else:
+            if isinstance(fields, basestring):
+                fields = [fields]
+            names = [f[3:] if f.startswith('sa.') else f for f in fields]
+            exprs = fields
+
+        if exprs:
+            results, types = self.query_samples_typed(['samples.map(s => %s).collect()' % e for e in exprs])
+        else:
+            results, types = [], []
+        columns = [(name, _numpy_column(r, t.element_type)) for name, r, t in zip(names, results, types)]
+
+        if as_pandas:
+            import pandas as pd
+            from collections import OrderedDict
+            return pd.DataFrame(OrderedDict(columns), index=pd.Index(self.sample_ids, name='s'))
+        else:
+            d = dict(columns)
+            d['s'] = _numpy_column(self.sample_ids, None)
+            return d
+
+    @handle_py4j
+    def sample_genotype_arrays(self, sample):
+        """Return the genotypes of one sample as NumPy arrays.
+
+        **Examples**
+
+        Fetch the depth of every genotype of sample ``C1046::HG02024`` for a histogram:
+
+        >>> arrays = vds.sample_genotype_arrays('C1046::HG02024')
+        >>> dp = arrays['dp'][arrays['dp'] >= 0]
+
+        **Notes**
+
+        The genotypes of ``sample`` are collected in variant order and
+        transferred from the JVM in a single column-major buffer, which is
+        much faster than building a :py:class:`~hail.representation.Genotype`
+        per variant with :py:meth:`.query_variants`.
+
+        The returned dict has the following entries, each with one element
+        per variant unless noted otherwise:
+
+        - **v** (*list of Variant*) -- variants
+        - **gt**, **dp**, **gq** (*int32 array*) -- genotype call, depth and quality, -1 if missing
+        - **missing** (*bool array*) -- True where the genotype itself is missing
+        - **fake_ref**, **is_dosage** (*bool array*) -- genotype flags
+        - **has_ad**, **has_pl** (*bool array*) -- True where AD or PL is defined
+        - **ad**, **ad_offsets** (*int32 arrays*) -- packed allelic depths; the AD of variant ``i`` is
+          ``ad[ad_offsets[i]:ad_offsets[i + 1]]``, and ``ad_offsets`` has one more element than there are variants
+        - **pl**, **pl_offsets** (*int32 arrays*) -- packed phred-scaled likelihoods, laid out like AD. For
+          dosage genotypes these are the raw linear-scaled probabilities.
+
+        :param str sample: sample ID
+
+        :rtype: dict
+        """
+
+        if sample not in self.sample_ids:
+            raise FatalError('sample `%s\' not found in dataset' % sample)
+
+        vds = (self.filter_samples_expr('s.id == %s' % json.dumps(sample))
+               .annotate_variants_expr('va.`__gs` = gs.collect()[0]'))
+        result = vds._jvds.queryVariants(jarray(env.jvm.java.lang.String,
+                                                ['variants.collect()',
+                                                 'variants.map(v => va.`__gs`).collect()']))
+
+        t = Type._from_java(result[0]._2())
+        arrays = _genotype_columns(
+            scala_object(env.hail.expr, 'BinaryAnnotationImpex').exportGenotypeColumns(result[1]._1()))
+        arrays['v'] = t._convert_to_py(result[0]._1())
+        return arrays
+
     @handle_py4j
     def num_partitions(self):
         """Number of RDD partitions.
@@ -280,7 +597,7 @@ class VariantDataset(object):
             expr = ",".join(expr)
 
         jvds = self._jvdf.annotateAllelesExpr(expr, propagate_gq)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def annotate_global_expr(self, expr):
@@ -307,7 +624,7 @@ class VariantDataset(object):
             expr = ','.join(expr)
 
         jvds = self._jvds.annotateGlobalExpr(expr)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, global_annotations=False)
 
     @handle_py4j
     def annotate_global_py(self, path, annotation, annotation_type):
@@ -328,7 +645,7 @@ class VariantDataset(object):
 
         annotated = self._jvds.annotateGlobal(annotation_type._convert_to_j(annotation), annotation_type._jtype, path)
         assert annotated.globalSignature().typeCheck(annotated.globalAnnotation()), 'error in java type checking'
-        return VariantDataset(self.hc, annotated)
+        return self._derive(annotated, global_annotations=False)
 
     @handle_py4j
     def annotate_global_list(self, input, root, as_set=False):
@@ -369,7 +686,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.annotateGlobalList(input, root, as_set)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, global_annotations=False)
 
     @handle_py4j
     def annotate_global_table(self, input, root, config=TextTableConfig()):
@@ -415,7 +732,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.annotateGlobalTable(input, root, config._to_java())
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, global_annotations=False)
 
     @handle_py4j
     def annotate_samples_expr(self, expr):
@@ -462,7 +779,7 @@ class VariantDataset(object):
             expr = ','.join(expr)
 
         jvds = self._jvdf.annotateSamplesExpr(expr)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False)
 
     @handle_py4j
     def annotate_samples_fam(self, input, quantpheno=False, delimiter='\\\\s+', root='sa.fam', missing='NA'):
@@ -514,7 +831,7 @@ class VariantDataset(object):
 
         ffc = env.hail.io.plink.FamFileConfig(quantpheno, delimiter, missing)
         jvds = self._jvds.annotateSamplesFam(input, root, ffc)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False)
 
     @handle_py4j
     def annotate_samples_list(self, input, root):
@@ -544,7 +861,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.annotateSamplesList(input, root)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False)
 
     @handle_py4j
     def annotate_samples_table(self, input, sample_expr, root=None, code=None, config=TextTableConfig()):
@@ -680,7 +997,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.annotateSamplesTable(input, sample_expr, joption(root), joption(code), config._to_java())
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False)
 
     @handle_py4j
     def annotate_samples_vds(self, right, root=None, code=None):
@@ -699,10 +1016,10 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.annotateSamplesVDS(right._jvds, joption(root), joption(code))
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False)
 
     @handle_py4j
-    def annotate_variants_bed(self, input, root, all=False):
+    def annotate_variants_bed(self, input, root, all=False, cache=None):
         """Annotate variants based on the intervals in a .bed file.
 
         **Examples**
@@ -746,12 +1063,16 @@ class VariantDataset(object):
 
         :param bool all: Store values from all overlapping intervals as a set.
 
+        :param cache: Directory in which to cache the parsed intervals. See
+            :py:meth:`~hail.VariantDataset.annotate_variants_table`.
+        :type cache: str or None
+
         :return: Annotated dataset with new variant annotations imported from a .bed file.
         :rtype: :class:`.VariantDataset`
         """
 
-        jvds = self._jvds.annotateVariantsBED(input, root, all)
-        return VariantDataset(self.hc, jvds)
+        jvds = self._jvds.annotateVariantsBED(input, root, all, joption(cache))
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def annotate_variants_expr(self, expr):
@@ -794,7 +1115,7 @@ class VariantDataset(object):
             expr = ','.join(expr)
 
         jvds = self._jvdf.annotateVariantsExpr(expr)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def annotate_variants_keytable(self, keytable, expr, vds_key=None):
@@ -853,10 +1174,10 @@ class VariantDataset(object):
         else:
             jvds = self._jvds.annotateVariantsKeyTable(keytable._jkt, vds_key, expr)
 
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
-    def annotate_variants_intervals(self, input, root, all=False):
+    def annotate_variants_intervals(self, input, root, all=False, cache=None):
         """Annotate variants from an interval list file.
 
         **Examples**
@@ -916,15 +1237,19 @@ class VariantDataset(object):
         :param bool all: If true, store values from all overlapping
             intervals as a set.
 
+        :param cache: Directory in which to cache the parsed intervals. See
+            :py:meth:`~hail.VariantDataset.annotate_variants_table`.
+        :type cache: str or None
+
         :return: Annotated dataset.
         :rtype: :py:class:`.VariantDataset`
         """
 
-        jvds = self._jvds.annotateVariantsIntervals(input, root, all)
-        return VariantDataset(self.hc, jvds)
+        jvds = self._jvds.annotateVariantsIntervals(input, root, all, joption(cache))
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
-    def annotate_variants_loci(self, path, locus_expr, root=None, code=None, config=TextTableConfig()):
+    def annotate_variants_loci(self, path, locus_expr, root=None, code=None, config=TextTableConfig(), cache=None):
         """Annotate variants from an delimited text file (text table) indexed
         by loci.
 
@@ -939,17 +1264,33 @@ class VariantDataset(object):
         :param config: Configuration options for importing text files
         :type config: :class:`.TextTableConfig`
 
+        :param cache: Directory in which to cache the parsed table. See
+            :py:meth:`~hail.VariantDataset.annotate_variants_table`.
+        :type cache: str or None
+
         :return: Annotated dataset.
         :rtype: :py:class:`.VariantDataset`
         """
 
-        jvds = self._jvds.annotateVariantsLoci(path, locus_expr, joption(root), joption(code), config._to_java())
-        return VariantDataset(self.hc, jvds)
+        jvds = self._jvds.annotateVariantsLoci(path, locus_expr, joption(root), joption(code), config._to_java(),
+                                               joption(cache))
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
-    def annotate_variants_table(self, path, variant_expr, root=None, code=None, config=TextTableConfig()):
+    def annotate_variants_table(self, path, variant_expr, root=None, code=None, config=TextTableConfig(), cache=None):
         """Annotate variant with delimited text file (text table).
 
+        **Caching**
+
+        Tables that are annotated against repeatedly can be cached by passing
+        a ``cache`` directory. The first call parses the table and writes it
+        there sorted and partitioned by variant. Later calls with the same
+        files, ``variant_expr`` and ``config`` read the stored table and join
+        against it without parsing or shuffling it. Entries are keyed by each
+        file's path and checksum, or by its size and modification time where
+        the filesystem does not provide checksums. A changed file is parsed
+        again into a new entry. Old entries are not removed.
+
         :param path: Path to delimited text files.
         :type path: str or list of str
 
@@ -962,12 +1303,16 @@ class VariantDataset(object):
         :param config: Configuration options for importing text files
         :type config: :class:`.TextTableConfig`
 
+        :param cache: Directory in which to cache the parsed table.
+        :type cache: str or None
+
         :return: Annotated dataset.
         :rtype: :py:class:`.VariantDataset`
         """
 
-        jvds = self._jvds.annotateVariantsTable(path, variant_expr, joption(root), joption(code), config._to_java())
-        return VariantDataset(self.hc, jvds)
+        jvds = self._jvds.annotateVariantsTable(path, variant_expr, joption(root), joption(code), config._to_java(),
+                                                joption(cache))
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def annotate_variants_vds(self, other, code=None, root=None):
@@ -1040,7 +1385,7 @@ class VariantDataset(object):
 
         jvds = self._jvds.annotateVariantsVDS(other._jvds, joption(root), joption(code))
 
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def cache(self):
@@ -1132,7 +1477,7 @@ class VariantDataset(object):
         :rtype: :py:class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvdf.deduplicate())
+        return self._derive(self._jvdf.deduplicate())
 
     @handle_py4j
     def downsample_variants(self, keep):
@@ -1144,7 +1489,7 @@ class VariantDataset(object):
         :rtype: :py:class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvds.downsampleVariants(keep))
+        return self._derive(self._jvds.downsampleVariants(keep))
 
     @handle_py4j
     def export_gen(self, output):
@@ -1445,9 +1790,11 @@ class VariantDataset(object):
 
         Use the ``.vcf.bgz`` extension rather than ``.vcf`` in the output file name for `blocked GZIP <http://www.htslib.org/doc/tabix.html>`_ compression.
 
+        Block-compressed output is written as a single file with a `tabix <http://www.htslib.org/doc/tabix.html>`_ index alongside it (``output`` + ``.tbi``). Partitions are compressed in parallel and concatenated without recompression, so the single indexed file costs little more than ``parallel=True``.
+
         .. note::
 
-            We strongly recommended compressed (``.bgz`` extension) and parallel output (``parallel=True``) when exporting large VCFs.
+            We strongly recommended compressed (``.bgz`` extension) output when exporting large VCFs.
 
         Consider the workflow of importing VCF to VDS and immediately exporting VDS to VCF:
 
@@ -1473,7 +1820,7 @@ class VariantDataset(object):
 
         :param bool export_pp: If True, export linear-scaled probabilities (Hail's `pp` field on genotype) as the VCF PP FORMAT field.
 
-        :param bool parallel: If True, return a set of VCF files (one per partition) rather than serially concatenating these files.
+        :param bool parallel: If True, return a set of VCF files (one per partition) rather than concatenating these files. No tabix index is written.
         """
 
         self._jvdf.exportVCF(output, joption(append_to_header), export_pp, parallel)
@@ -1635,7 +1982,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.filterAlleles(condition, annotation, filter_altered_genotypes, keep, subset, max_shift)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def filter_genotypes(self, condition, keep=True):
@@ -1674,7 +2021,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.filterGenotypes(condition, keep)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @handle_py4j
     def filter_multi(self):
@@ -1690,7 +2037,7 @@ class VariantDataset(object):
         :rtype: :class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvdf.filterMulti())
+        return self._derive(self._jvdf.filterMulti())
 
     @handle_py4j
     def drop_samples(self):
@@ -1703,7 +2050,7 @@ class VariantDataset(object):
         :rtype: :py:class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvds.dropSamples())
+        return self._derive(self._jvds.dropSamples(), samples=False)
 
     @handle_py4j
     def filter_samples_expr(self, condition, keep=True):
@@ -1749,7 +2096,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.filterSamplesExpr(condition, keep)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, samples=False)
 
     @handle_py4j
     def filter_samples_list(self, input, keep=True):
@@ -1769,7 +2116,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.filterSamplesList(input, keep)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, samples=False)
 
     @handle_py4j
     def drop_variants(self):
@@ -1786,7 +2133,7 @@ class VariantDataset(object):
         :rtype: :py:class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvds.dropVariants())
+        return self._derive(self._jvds.dropVariants())
 
     @handle_py4j
     def filter_variants_expr(self, condition, keep=True):
@@ -1829,7 +2176,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.filterVariantsExpr(condition, keep)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @handle_py4j
     def filter_variants_intervals(self, input, keep=True):
@@ -1868,7 +2215,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.filterIntervals(input, keep)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @handle_py4j
     def filter_variants_list(self, input, keep=True):
@@ -1897,7 +2244,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.filterVariantsList(input, keep)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @property
     def globals(self):
@@ -1924,7 +2271,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.grm(output, format, joption(id_file), joption(n_file))
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @handle_py4j
     def hardcalls(self):
@@ -1940,7 +2287,7 @@ class VariantDataset(object):
         :rtype: :py:class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvdf.hardCalls())
+        return self._derive(self._jvdf.hardCalls())
 
     @handle_py4j
     def ibd(self, output, maf=None, bounded=True, parallel_write=False, min=None, max=None):
@@ -2016,7 +2363,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.imputeSex(maf_threshold, include_par, female_threshold, male_threshold, joption(pop_freq))
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False)
 
     @handle_py4j
     def join(self, right):
@@ -2036,7 +2383,7 @@ class VariantDataset(object):
         return VariantDataset(self.hc, self._jvdf.join(right._jvds))
 
     @handle_py4j
-    def linreg(self, y, covariates=[], root='va.linreg', min_ac=1, min_af=0.0):
+    def linreg(self, y=None, covariates=[], root='va.linreg', min_ac=1, min_af=0.0, ys=None):
         r"""Test each variant for association using the linear regression
         model.
 
@@ -2046,6 +2393,11 @@ class VariantDataset(object):
 
         >>> vds_result = vds.linreg('sa.pheno.height', covariates=['sa.pheno.age', 'sa.pheno.isFemale'])
 
+        To test many phenotypes against the same covariates in one pass:
+
+        >>> vds_result = vds.linreg(ys=['sa.pheno.height', 'sa.pheno.weight'],
+        ...                         covariates=['sa.pheno.age', 'sa.pheno.isFemale'])
+
         **Notes**
 
         The :py:meth:`.linreg` command computes, for each variant, statistics of
@@ -2114,8 +2466,22 @@ class VariantDataset(object):
         - **va.linreg.tstat** (*Double*) -- :math:`t`-statistic, equal to :math:`\hat\beta_1 / \widehat{\mathrm{se}}`
         - **va.linreg.pval** (*Double*) -- :math:`p`-value
 
+        **Multiple phenotypes**
+
+        With ``ys``, the covariates are projected out once and each block of
+        variants is tested against all phenotypes by a single matrix product,
+        so testing thousands of phenotypes takes one pass over the genotypes.
+        Only samples for which all phenotypes and covariates are defined are
+        included. The four annotations above then have type *Array[Double]*,
+        with the :math:`i`-th element giving the statistic for the :math:`i`-th
+        phenotype in ``ys``. Use :py:meth:`~hail.KeyTable.explode` on the
+        variants table for one row per variant and phenotype.
+
         :param str y: Response expression
 
+        :param ys: list of response expressions, given instead of ``y``
+        :type ys: list of str or None
+
         :param covariates: list of covariate expressions
         :type covariates: list of str
 
@@ -2129,13 +2495,20 @@ class VariantDataset(object):
         :rtype: :py:class:`.VariantDataset`
         """
 
-        jvds = self._jvdf.linreg(y, jarray(env.jvm.java.lang.String, covariates), root, min_ac, min_af)
-        return VariantDataset(self.hc, jvds)
+        if (y is None) == (ys is None):
+            raise FatalError('linreg requires exactly one of y and ys')
+
+        if ys is not None:
+            jvds = self._jvdf.linregMultiPheno(jarray(env.jvm.java.lang.String, ys),
+                                               jarray(env.jvm.java.lang.String, covariates), root, min_ac, min_af)
+        else:
+            jvds = self._jvdf.linreg(y, jarray(env.jvm.java.lang.String, covariates), root, min_ac, min_af)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def lmmreg(self, kinship_vds, y, covariates=[], global_root="global.lmmreg", va_root="va.lmmreg",
                run_assoc=True, use_ml=False, delta=None, sparsity_threshold=1.0, force_block=False,
-               force_grammian=False):
+               force_grammian=False, kinship_cache=None, rank=None):
         """Use a kinship-based linear mixed model to estimate the genetic component of phenotypic variance (narrow-sense heritability) and optionally test each variant for association.
 
         **Examples**
@@ -2161,6 +2534,8 @@ class VariantDataset(object):
         - Set the ``delta`` argument to manually set the value of :math:`\delta` rather that fitting :math:`\delta` in Step 4.
         - Set the ``global_root`` argument to change the global annotation root in Step 4.
         - Set the ``va_root`` argument to change the variant annotation root in Step 5.
+        - Set the ``kinship_cache`` argument to a directory to store the eigendecomposition from Step 3 there, and to read it back instead of Steps 2 and 3 on later runs with the same kinship variants, genotypes and complete samples, e.g. when testing other phenotypes with the same missingness. Cache entries are keyed by the sample IDs and a fingerprint of the kinship variants and hard calls, which costs one pass over ``kinship_vds``.
+        - Set the ``rank`` argument to :math:`k` to replace Steps 2 and 3 by the top :math:`k` eigenvectors and eigenvalues of the kinship matrix, computed by randomized SVD of the normalized kinship genotypes without forming the kinship matrix. See *Low-rank kinship* below.
 
         :py:meth:`.lmmreg` adds eight global annotations in Step 4; the last three are omitted if :math:`\delta` is set rather than fit.
 
@@ -2179,7 +2554,7 @@ class VariantDataset(object):
         +------------------------------------+----------------------+------------------------------------------------------------------------------------------------------------------------------------------------------+
         | ``global.lmmreg.h2``               | Double               | fit narrow-sense heritability, :math:`\\hat{h}^2`                                                                                                    |
         +------------------------------------+----------------------+------------------------------------------------------------------------------------------------------------------------------------------------------+
-        | ``global.lmmreg.evals``            | Array[Double]        | eigenvalues of the kinship matrix in descending order                                                                                                |
+        | ``global.lmmreg.evals``            | Array[Double]        | eigenvalues of the kinship matrix in descending order, only the top ``rank`` if set                                                                  |
         +------------------------------------+----------------------+------------------------------------------------------------------------------------------------------------------------------------------------------+
         | ``global.lmmreg.fit.logDeltaGrid`` | Array[Double]        | values of :math:`\\mathit{ln}(\delta)` used in the grid search                                                                                       |
         +------------------------------------+----------------------+------------------------------------------------------------------------------------------------------------------------------------------------------+
@@ -2227,7 +2602,11 @@ class VariantDataset(object):
 
         While :py:meth:`.lmmreg` computes the kinship matrix :math:`K` using distributed matrix multiplication (Step 2), the full eigendecomposition (Step 3) is currently run on a single core of master using the `LAPACK routine DSYEVD <http://www.netlib.org/lapack/explore-html/d2/d8a/group__double_s_yeigen_ga694ddc6e5527b6223748e3462013d867.html>`_, which we empirically find to be the most performant of the four available routines; laptop performance plots showing cubic complexity in :math:`n` are available `here <https://github.com/hail-is/hail/pull/906>`_. On Google cloud, eigendecomposition takes about 2 seconds for 2535 sampes and 1 minute for 8185 samples. If you see worse performance, check that LAPACK natives are being properly loaded (see "BLAS and LAPACK" in Getting Started).
 
-        Given the eigendecomposition, fitting the global model (Step 4) takes on the order of a few seconds on master. Association testing (Step 5) is fully distributed by variant with per-variant time complexity that is completely independent of the number of sample covariates and dominated by multiplication of the genotype vector :math:`v` by the matrix of eigenvectors :math:`U^T` as described below, which we accelerate with a sparse representation of :math:`v`.  The matrix :math:`U^T` has size about :math:`8n^2` bytes and is currently broadcast to each Spark executor. For example, with 15k samples, storing :math:`U^T` consumes about 3.6GB of memory on a 16-core worker node with two 8-core executors. So for large :math:`n`, we recommend using a high-memory configuration such as ``highmem`` workers.
+        Given the eigendecomposition, fitting the global model (Step 4) takes on the order of a few seconds on master. Association testing (Step 5) is fully distributed by variant with per-variant time complexity that is completely independent of the number of sample covariates and dominated by multiplication of the genotype vector :math:`v` by the matrix of eigenvectors :math:`U^T` as described below, which we accelerate with a sparse representation of :math:`v`. Variants with alternate allele frequency above ``sparsity_threshold`` are instead rotated in blocks of dense genotype vectors by a single matrix-matrix product, which is faster for common variants.  The matrix :math:`U^T` has size about :math:`8n^2` bytes and is currently broadcast to each Spark executor. For example, with 15k samples, storing :math:`U^T` consumes about 3.6GB of memory on a 16-core worker node with two 8-core executors. So for large :math:`n`, we recommend using a high-memory configuration such as ``highmem`` workers.
+
+        **Low-rank kinship**
+
+        Beyond tens of thousands of samples, the :math:`n \\times n` kinship matrix and its eigendecomposition no longer fit on master. With ``rank=k``, :py:meth:`.lmmreg` instead uses the kinship matrix :math:`K_k = U_k S_k U_k^T` formed by its top :math:`k` eigenvectors, which are computed by randomized subspace iteration (`Halko, Martinsson and Tropp, 2011 <https://arxiv.org/abs/0909.4061>`_) with a few distributed passes over ``kinship_vds``, each multiplying the normalized genotypes by an :math:`n \\times (k + 10)` matrix. :math:`K_k` has eigenvalue 0 on the complement of :math:`U_k`, so only :math:`U_k` and the projections of the covariates and phenotype onto the complement are needed: fitting :math:`\\delta` costs :math:`O(k)` per likelihood evaluation, the rotation matrix broadcast to executors has size about :math:`8n(k + c + 1)` bytes with :math:`c` covariates including intercept, and each variant is tested in :math:`O(n(k + c))` time. The results are exact for the model with kinship :math:`K_k`, which approximates the full model when the spectrum of :math:`K` is dominated by its top :math:`k` eigenvalues, e.g. for population structure.
 
         **Linear mixed model**
 
@@ -2338,23 +2717,30 @@ class VariantDataset(object):
         :param delta: Fixed delta value to use in the global model, overrides fitting delta.
         :type delta: float or None
 
-        :param float sparsity_threshold: AF threshold above which to use dense genotype vectors in rotation (advanced).
+        :param float sparsity_threshold: AF threshold above which to rotate blocks of dense genotype vectors (advanced).
 
         :param bool force_block: Force using Spark's BlockMatrix to compute kinship (advanced).
 
         :param bool force_grammian: Force using Spark's RowMatrix.computeGrammian to compute kinship (advanced).
 
+        :param kinship_cache: Directory in which to cache the eigendecomposition of the kinship matrix.
+        :type kinship_cache: str or None
+
+        :param rank: If set, use the rank-``rank`` approximation of the kinship matrix (advanced).
+        :type rank: int or None
+
         :return: A Variant Dataset with linear mixed regression annotations
         :rtype: :py:class:`.VariantDataset`
         """
 
         jvds = self._jvdf.lmmreg(kinship_vds._jvds, y, jarray(env.jvm.java.lang.String, covariates),
                                  use_ml, global_root, va_root, run_assoc,
-                                 joption(delta), sparsity_threshold, force_block, force_grammian)
-        return VariantDataset(self.hc, jvds)
+                                 joption(delta), sparsity_threshold, force_block, force_grammian,
+                                 joption(kinship_cache), joption(rank))
+        return self._derive(jvds, variant_schema=False, global_annotations=False)
 
     @handle_py4j
-    def logreg(self, test, y, covariates=[], root='va.logreg'):
+    def logreg(self, test, y, covariates=[], root='va.logreg', screen_pval=None):
         """Test each variant for association using the logistic regression
         model.
 
@@ -2364,6 +2750,11 @@ class VariantDataset(object):
 
         >>> vds_result = vds.logreg('wald', 'sa.pheno.isCase', covariates=['sa.pheno.age', 'sa.pheno.isFemale'])
 
+        To only fit the Wald model for variants with score test p-value at most 0.01:
+
+        >>> vds_result = vds.logreg('wald', 'sa.pheno.isCase', covariates=['sa.pheno.age', 'sa.pheno.isFemale'],
+        ...                         screen_pval=0.01)
+
         **Notes**
 
         The :py:meth:`~hail.VariantDataset.logreg` command performs,
@@ -2442,6 +2833,10 @@ class VariantDataset(object):
 
         The Firth test reduces bias from small counts and resolves the issue of separation by penalizing maximum likelihood estimation by the `Jeffrey's invariant prior <https://en.wikipedia.org/wiki/Jeffreys_prior>`_. This test is slower, as both the null and full model must be fit per variant, and convergence of the modified Newton method is linear rather than quadratic. For Firth, 100 iterations are attempted for the null model and, if that is successful, for the full model as well. In testing we find 20 iterations nearly always suffices. If the null model fails to converge, then the ``sa.lmmreg.fit`` annotations reflect the null model; otherwise, they reflect the full model.
 
+        The null model (covariates only) is fit once, and every variant fit starts from its coefficients with the genotype coefficient at zero. Firth fits start from the penalized fit of the null model.
+
+        The score test requires no iteration, so on large cohorts most of the cost of the Wald, LRT and Firth tests can be avoided by screening: with ``screen_pval=p``, the full model is only fit for variants whose score test p-value is at most :math:`p`, and the remaining variants have missing statistics and ``fit`` annotations. Since the score and likelihood-based p-values differ, choose :math:`p` well above the significance threshold of interest.
+
         See `Recommended joint and meta-analysis strategies for case-control association testing of single low-count variants <http://www.ncbi.nlm.nih.gov/pmc/articles/PMC4049324/>`_ for an empirical comparison of the logistic Wald, LRT, score, and Firth tests. The theoretical foundations of the Wald, likelihood ratio, and score tests may be found in Chapter 3 of Gesine Reinert's notes `Statistical Theory <http://www.stats.ox.ac.uk/~reinert/stattheory/theoryshort09.pdf>`_.  Firth introduced his approach in `Bias reduction of maximum likelihood estimates, 1993 <http://www2.stat.duke.edu/~scs/Courses/Stat376/Papers/GibbsFieldEst/BiasReductionMLE.pdf>`_. Heinze and Schemper further analyze Firth's approach in `A solution to the problem of separation in logistic regression, 2002 <https://cemsiis.meduniwien.ac.at/fileadmin/msi_akim/CeMSIIS/KB/volltexte/Heinze_Schemper_2002_Statistics_in_Medicine.pdf>`_.
 
         Phenotype and covariate sample annotations may also be specified using `programmatic expressions <../expr_lang.html>`_ without identifiers, such as:
@@ -2464,12 +2859,16 @@ class VariantDataset(object):
 
         :param str root: Variant annotation path to store result of linear regression.
 
+        :param screen_pval: If set, only fit variants with score test p-value at most this threshold. Not
+            available for the score test.
+        :type screen_pval: float or None
+
         :return: Dataset with logistic regression variant annotations.
         :rtype: :py:class:`.VariantDataset`
         """
 
-        jvds = self._jvdf.logreg(test, y, jarray(env.jvm.java.lang.String, covariates), root)
-        return VariantDataset(self.hc, jvds)
+        jvds = self._jvdf.logreg(test, y, jarray(env.jvm.java.lang.String, covariates), root, joption(screen_pval))
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def mendel_errors(self, output, fam):
@@ -2586,7 +2985,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.minRep(max_shift)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @handle_py4j
     def pca(self, scores, loadings=None, eigenvalues=None, k=10, as_array=False):
@@ -2677,7 +3076,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.pca(scores, k, joption(loadings), joption(eigenvalues), as_array)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, sample_schema=False, variant_schema=False, global_annotations=False)
 
     @handle_py4j
     def persist(self, storage_level="MEMORY_AND_DISK"):
@@ -2814,6 +3213,33 @@ class VariantDataset(object):
         r, t = self.query_samples_typed(exprs)
         return r
 
+    def batch_queries(self):
+        """Collect queries to evaluate together in a single pass over the dataset.
+
+        **Examples**
+
+        Compute several summaries with one scan of the data:
+
+        >>> with vds.batch_queries() as q:
+        ...     counts = q.count(genotypes=True)
+        ...     n_snps = q.query_variants('variants.filter(v => v.altAllele.isSNP()).count()')
+        ...     gq_stats = q.query_genotypes('gs.map(g => g.gq).stats()')
+        ...     n_samples = q.query_samples('samples.count()')
+        >>> n_called = counts.get()['nCalled']
+
+        **Notes**
+
+        Each method of the returned :class:`.BatchQuery` returns a
+        :class:`.QueryFuture` whose value is available after the ``with``
+        block. Variant queries, genotype queries and counts are fused into
+        one aggregation over the dataset, so asking twenty questions costs
+        one pass instead of twenty.
+
+        :rtype: :class:`.BatchQuery`
+        """
+
+        return BatchQuery(self)
+
     @handle_py4j
     def query_variants_typed(self, exprs):
         """Perform aggregation queries over variants and variant annotations, and returns python objects and types.
@@ -2920,7 +3346,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvds.renameSamples(input)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, samples=False)
 
     @handle_py4j
     def repartition(self, num_partitions, shuffle=True):
@@ -2942,7 +3368,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.coalesce(num_partitions, shuffle)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds)
 
     @handle_py4j
     def same(self, other, tolerance=1e-6):
@@ -3016,7 +3442,7 @@ class VariantDataset(object):
         :rtype: :class:`.VariantDataset`
         """
 
-        return VariantDataset(self.hc, self._jvdf.sampleQC())
+        return self._derive(self._jvdf.sampleQC(), sample_schema=False)
 
     @handle_py4j
     def storage_level(self):
@@ -3155,7 +3581,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.splitMulti(propagate_gq, compress, keep_star_alleles, max_shift)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def tdt(self, fam, root='va.tdt'):
@@ -3254,7 +3680,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.tdt(fam, root)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def _typecheck(self):
@@ -3323,7 +3749,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.variantQC()
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def vep(self, config, block_size=1000, root='va.vep', force=False, csq=False):
@@ -3544,7 +3970,7 @@ class VariantDataset(object):
         """
 
         jvds = self._jvdf.vep(config, root, csq, force, block_size)
-        return VariantDataset(self.hc, jvds)
+        return self._derive(jvds, variant_schema=False)
 
     @handle_py4j
     def variants_keytable(self):
@@ -1,3 +1,5 @@
+import struct
+
 from py4j.protocol import Py4JJavaError, Py4JError
 from decorator import decorator
 
@@ -39,13 +41,36 @@ class Env:
 env = Env()
 
 
+# primitive Java element type => (struct code, numpy dtype, Py4jUtils decoder)
+_primitive_array_formats = {'int': ('i', '>i4', 'bytesToIntArray'),
+                            'long': ('q', '>i8', 'bytesToLongArray'),
+                            'double': ('d', '>f8', 'bytesToDoubleArray')}
+
+
 def jarray(jtype, lst):
+    fmt = _primitive_array_formats.get(getattr(jtype, '_fqn', None))
+    if fmt is not None and len(lst) > 0:
+        return _jprimitive_array(fmt, lst)
+
     jarr = env.gateway.new_array(jtype, len(lst))
     for i, s in enumerate(lst):
         jarr[i] = s
     return jarr
 
 
+def _jprimitive_array(fmt, lst):
+    """Build a primitive Java array in one gateway call by packing the
+    elements into a big-endian byte buffer."""
+
+    code, dtype, decoder = fmt
+    if hasattr(lst, 'astype'):
+        # NumPy array
+        buf = bytearray(lst.astype(dtype).tobytes())
+    else:
+        buf = bytearray(struct.pack('>%d%s' % (len(lst), code), *lst))
+    return getattr(env.jutils, decoder)(buf)
+
+
 def scala_object(jpackage, name):
     return getattr(getattr(jpackage, name + '$'), 'MODULE$')
 
@@ -1,10 +1,19 @@
 from __future__ import print_function  # Python 2 and 3 print compatibility
 
 from hail.java import scala_package_object, handle_py4j
-from hail.type import Type, TStruct
+from hail.type import Type, TStruct, TInt, TLong, TFloat, TDouble, TBoolean
+from hail.utils import _decode_columns
 from py4j.protocol import Py4JJavaError
 from pyspark.sql import DataFrame
 
+import sys
+import threading
+
+try:
+    from Queue import Queue, Full
+except ImportError:
+    from queue import Queue, Full
+
 
 class KeyTable(object):
     """Hail's version of a SQL table where columns can be designated as keys.
@@ -539,9 +548,23 @@ class KeyTable(object):
         return DataFrame(jkt.toDF(self.hc._jsql_context), self.hc._sql_context)
 
     @handle_py4j
-    def to_pandas(self, expand=True, flatten=True):
+    def to_pandas(self, expand=True, flatten=True, prefetch=1):
         """Converts this KeyTable into a Pandas DataFrame.
 
+        **Examples**
+
+        >>> df = kt1.to_pandas()
+
+        **Notes**
+
+        Columns are transferred from the JVM one partition at a time in a
+        packed column-major encoding and concatenated with NumPy, so numeric
+        and Boolean columns never pass through per-cell Python objects. Int
+        and Long columns become ``int64``, Float and Double columns become
+        ``float64``, and integer columns with missing values become ``float64``
+        with ``NaN``. Other columns (strings, and arrays or structs left by
+        ``expand=False`` or ``flatten=False``) are object columns.
+
         :param bool expand: If true, expand_types before converting to
           Pandas DataFrame.
 
@@ -549,11 +572,228 @@ class KeyTable(object):
           DataFrame.  If both are true, flatten is run after expand so
           that expanded types are flattened.
 
+        :param int prefetch: Number of partitions to fetch ahead while decoding.
+
         :returns: A Pandas DataFrame constructed from the KeyTable
         :rtype: :py:class:`pandas.DataFrame`
         """
 
-        return self.to_dataframe(expand, flatten).toPandas()
+        import pandas as pd
+        from collections import OrderedDict
+
+        kt = self
+        if expand:
+            kt = kt.expand_types()
+        if flatten:
+            kt = kt.flatten()
+        columns = kt._collect_columns(kt.column_names, prefetch)
+        return pd.DataFrame(OrderedDict(zip(kt.column_names, columns)), columns=kt.column_names)
+
+    @handle_py4j
+    def to_numpy(self, columns=None, prefetch=1):
+        """Collects numeric columns of this KeyTable into a two-dimensional NumPy array.
+
+        **Examples**
+
+        >>> x = kt1.to_numpy(['HT', 'X', 'Z'])
+
+        **Notes**
+
+        The result has one row per row of the key table, in partition order,
+        and one column per element of ``columns``. It has type ``float64``;
+        missing values are ``NaN``. All requested columns must have type Int,
+        Long, Float, Double or Boolean. See :py:meth:`.to_pandas` for how the
+        data is transferred.
+
+        :param columns: Column names. If None, all columns.
+        :type columns: str or list of str or None
+
+        :param int prefetch: Number of partitions to fetch ahead while decoding.
+
+        :rtype: :py:class:`numpy.ndarray`
+        """
+
+        import numpy as np
+
+        if columns is None:
+            columns = self.column_names
+        elif isinstance(columns, str):
+            columns = [columns]
+
+        types = dict((f.name, f.typ) for f in self.schema.fields)
+        for c in columns:
+            if c in types and not isinstance(types[c], (TInt, TLong, TFloat, TDouble, TBoolean)):
+                raise TypeError("to_numpy requires numeric columns, but column '%s' has type %s" % (c, types[c]))
+
+        arrays = self._collect_columns(columns, prefetch)
+        if not arrays:
+            return np.empty((self.count_rows(), 0), dtype=np.float64)
+
+        def as_float(a):
+            if a.dtype == object:
+                return np.array([np.nan if x is None else x for x in a], dtype=np.float64)
+            else:
+                return a.astype(np.float64)
+
+        return np.column_stack([as_float(a) for a in arrays])
+
+    def _collect_columns(self, columns, prefetch):
+        """Collect ``columns`` as NumPy arrays, fetching and decoding one partition at a time."""
+
+        import numpy as np
+
+        types = dict((f.name, f.typ) for f in self.schema.fields)
+        column_types = [types.get(c) for c in columns]
+
+        @handle_py4j
+        def fetch(i):
+            return self._jkt.collectPartitionColumnsBinary(i, columns)
+
+        chunks = [[] for _ in columns]
+        for buf in self._fetch_partitions(fetch, prefetch):
+            for chunk, col in zip(chunks, _decode_columns(buf, column_types)):
+                chunk.append(col)
+
+        result = []
+        for chunk, t in zip(chunks, column_types):
+            if chunk:
+                result.append(np.concatenate(chunk))
+            else:
+                result.append(np.empty(0, dtype=object))
+        return result
+
+    @handle_py4j
+    def num_partitions(self):
+        """Number of RDD partitions.
+
+        :rtype: int
+        """
+
+        return self._jkt.nPartitions()
+
+    def _fetch_partitions(self, fetch, prefetch):
+        """Yield ``fetch(i)`` for each partition index ``i`` in order, running
+        up to ``prefetch`` fetches ahead on a background thread."""
+
+        n = self.num_partitions()
+        queue = Queue(maxsize=max(prefetch, 1))
+        stop = threading.Event()
+
+        def run():
+            for i in xrange(n):
+                try:
+                    item = (fetch(i), None)
+                except Exception:
+                    item = (None, sys.exc_info())
+                while not stop.is_set():
+                    try:
+                        queue.put(item, timeout=0.1)
+                        break
+                    except Full:
+                        pass
+                if stop.is_set() or item[1] is not None:
+                    return
+
+        if prefetch > 0:
+            t = threading.Thread(target=run)
+            t.daemon = True
+            t.start()
+            try:
+                for _ in xrange(n):
+                    buf, exc_info = queue.get()
+                    if exc_info is not None:
+                        raise exc_info[0], exc_info[1], exc_info[2]
+                    yield buf
+            finally:
+                stop.set()
+        else:
+            for i in xrange(n):
+                yield fetch(i)
+
+    def _partition_iterator(self, prefetch):
+        schema = self.schema
+
+        @handle_py4j
+        def fetch(i):
+            return self._jkt.collectPartitionBinary(i)
+
+        for buf in self._fetch_partitions(fetch, prefetch):
+            yield schema._decode_seq(buf)
+
+    def iter_batches(self, batch_size=None, prefetch=1):
+        """Iterate over the rows of this key table in batches.
+
+        **Examples**
+
+        Compute a running sum over a large table without collecting it:
+
+        >>> total = 0
+        >>> for batch in kt1.iter_batches(batch_size=1000):
+        ...     total += sum(row.HT for row in batch)
+
+        **Notes**
+
+        Partitions are transferred to Python one at a time, each in a single
+        binary transfer, and decoded with :py:attr:`.schema`. While a
+        batch is being consumed, the next ``prefetch`` partitions are
+        fetched in the background, so driver memory is bounded by roughly
+        ``prefetch + 1`` partitions rather than by the size of the table.
+
+        Rows are returned as :py:class:`~hail.representation.Struct` objects
+        in partition order.
+
+        :param batch_size: Number of rows per batch. If None, each batch is one partition.
+        :type batch_size: int or None
+
+        :param int prefetch: Number of partitions to fetch ahead of the consumer. If 0, partitions
+            are fetched on demand.
+
+        :return: Iterator over lists of rows.
+        :rtype: iterator of list of :py:class:`~hail.representation.Struct`
+        """
+
+        if batch_size is not None and batch_size < 1:
+            raise ValueError('batch_size must be positive, found %d' % batch_size)
+
+        if batch_size is None:
+            for rows in self._partition_iterator(prefetch):
+                if rows:
+                    yield rows
+        else:
+            batch = []
+            for rows in self._partition_iterator(prefetch):
+                batch.extend(rows)
+                start = 0
+                while len(batch) - start >= batch_size:
+                    yield batch[start:start + batch_size]
+                    start += batch_size
+                batch = batch[start:]
+            if batch:
+                yield batch
+
+    def iter_rows(self, batch_size=None, prefetch=1):
+        """Iterate over the rows of this key table.
+
+        **Examples**
+
+        >>> males = [row.ID for row in kt1.iter_rows() if row.SEX == 'M']
+
+        **Notes**
+
+        This is :py:meth:`.iter_batches` flattened to single rows; see there
+        for the memory behavior of ``batch_size`` and ``prefetch``.
+
+        :param batch_size: Number of rows fetched per batch. If None, batches are partitions.
+        :type batch_size: int or None
+
+        :param int prefetch: Number of partitions to fetch ahead of the consumer.
+
+        :rtype: iterator of :py:class:`~hail.representation.Struct`
+        """
+
+        for batch in self.iter_batches(batch_size, prefetch):
+            for row in batch:
+                yield row
 
     @handle_py4j
     def export_mongodb(self, mode='append'):
@@ -1,6 +1,28 @@
+import math
+
 from hail.java import *
 
 
+def _gt_pair(gt):
+    """Decode a genotype index into its (j, k) allele pair, j <= k."""
+
+    k = int(math.sqrt(8 * gt + 1) / 2 - 0.5)
+    j = gt - k * (k + 1) // 2
+    return j, k
+
+
+def _linear_to_phred(px):
+    x = [-10 * math.log10(0.25 if i == 0 else i) for i in px]
+    m = min(x)
+    return [int(d - m + 0.5) for d in x]
+
+
+def _phred_to_dosage(px):
+    probs = [math.pow(10, i / -10.0) for i in px]
+    s = sum(probs)
+    return [p / s for p in probs]
+
+
 class Genotype(object):
     """
     An object that represents an individual's genotype at a genomic locus.
@@ -21,62 +43,107 @@ class Genotype(object):
     :type pl: list of int or None
     """
 
-    @handle_py4j
+    __slots__ = ['_gt', '_ad', '_dp', '_gq', '_px', '_fake_ref', '_is_dosage', '_jrep_cache']
+
     def __init__(self, gt, ad=None, dp=None, gq=None, pl=None):
         """Initialize a Genotype object."""
 
-        jvm = env.jvm
-        jgt = joption(gt)
-        if ad:
-            jad = jsome(jarray(jvm.int, ad))
-        else:
-            jad = jnone()
-        jdp = joption(dp)
-        jgq = joption(gq)
-        if pl:
-            jpl = jsome(jarray(jvm.int, pl))
-        else:
-            jpl = jnone()
+        self._init(gt, ad if ad else None, dp, gq, pl if pl else None, False, False)
 
-        jrep = scala_object(env.hail.variant, 'Genotype').apply(
-            jgt, jad, jdp, jgq, jpl, False, False)
+    def _init(self, gt, ad, dp, gq, px, fake_ref, is_dosage):
+        if gt is not None and gt < 0:
+            raise FatalError('invalid gt value: %s' % gt)
+        if dp is not None and dp < 0:
+            raise FatalError('invalid dp value: %s' % dp)
         self._gt = gt
         self._ad = ad
         self._dp = dp
         self._gq = gq
-        self._pl = pl
-        self._init_from_java(jrep)
+        self._px = px
+        self._fake_ref = fake_ref
+        self._is_dosage = is_dosage
+        self._jrep_cache = None
+
+    @classmethod
+    def _from_fields(cls, gt, ad, dp, gq, px, fake_ref, is_dosage):
+        g = Genotype.__new__(cls)
+        g._init(gt, ad, dp, gq, px, fake_ref, is_dosage)
+        return g
 
     def __str__(self):
-        return self._jrep.toString()
+        if self._gt is not None:
+            j, k = _gt_pair(self._gt)
+            gt = '%d/%d' % (j, k)
+        else:
+            gt = './.'
+        if self._fake_ref:
+            gt += '*'
+
+        def fmt(x):
+            if x is None:
+                return '.'
+            elif isinstance(x, list):
+                return ','.join([str(e) for e in x])
+            else:
+                return str(x)
+
+        if self._is_dosage:
+            px = 'GP=' + fmt(self.dosage())
+        else:
+            px = 'PL=' + fmt(self.pl)
+        return ':'.join([gt, fmt(self._ad), fmt(self._dp), fmt(self._gq), px])
 
     def __repr__(self):
-        fake_ref = 'FakeRef=True' if self._jrep.fakeRef() else ''
-        if self._jrep.isDosage():
+        fake_ref = 'FakeRef=True' if self._fake_ref else ''
+        if self._is_dosage:
             return 'Genotype(GT=%s, AD=%s, DP=%s, GQ=%s, PP=%s%s)' %\
                    (self.gt, self.ad, self.dp, self.gq, self.dosage(), fake_ref)
         else:
             return 'Genotype(GT=%s, AD=%s, DP=%s, GQ=%s, PL=%s%s)' % \
                    (self.gt, self.ad, self.dp, self.gq, self.pl, fake_ref)
 
+    def _fields(self):
+        return (self._gt, self._ad, self._dp, self._gq, self._px, self._fake_ref, self._is_dosage)
+
     def __eq__(self, other):
-        return self._jrep.equals(other._jrep)
+        return isinstance(other, Genotype) and self._fields() == other._fields()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __hash__(self):
-        return self._jrep.hashCode()
+        return hash((self._gt,
+                     tuple(self._ad) if self._ad is not None else None,
+                     self._dp,
+                     self._gq,
+                     tuple(self._px) if self._px is not None else None,
+                     self._fake_ref,
+                     self._is_dosage))
 
-    def _init_from_java(self, jrep):
-        self._jrep = jrep
+    @property
+    def _jrep(self):
+        if self._jrep_cache is None:
+            def opt(x):
+                return jsome(x) if x is not None else jnone()
+
+            jvm = env.jvm
+            jad = opt(jarray(jvm.int, self._ad) if self._ad is not None else None)
+            jpx = opt(jarray(jvm.int, self._px) if self._px is not None else None)
+            self._jrep_cache = scala_object(env.hail.variant, 'Genotype').apply(
+                opt(self._gt), jad, opt(self._dp), opt(self._gq), jpx, self._fake_ref, self._is_dosage)
+        return self._jrep_cache
 
     @classmethod
     def _from_java(cls, jrep):
         g = Genotype.__new__(cls)
-        g._init_from_java(jrep)
         g._gt = from_option(jrep.gt())
         g._ad = jiterable_to_list(from_option(jrep.ad()))
         g._dp = from_option(jrep.dp())
         g._gq = from_option(jrep.gq())
-        g._pl = jiterable_to_list(from_option(jrep.pl()))
+        g._px = jiterable_to_list(from_option(jrep.px()))
+        g._fake_ref = jrep.fakeRef()
+        g._is_dosage = jrep.isDosage()
+        g._jrep_cache = jrep
         return g
 
     @property
@@ -122,7 +189,12 @@ class Genotype(object):
         :rtype: list of int or None
         """
 
-        return self._pl
+        if self._px is None:
+            return None
+        elif not self._is_dosage:
+            return self._px
+        else:
+            return _linear_to_phred(self._px)
 
     def od(self):
         """Returns the difference between the total depth and the allelic depth sum.
@@ -136,7 +208,10 @@ class Genotype(object):
         :rtype: int or None
         """
 
-        return from_option(self._jrep.od())
+        if self._dp is not None and self._ad is not None:
+            return self._dp - sum(self._ad)
+        else:
+            return None
 
     def dosage(self):
         """Returns the linear-scaled genotype probabilities.
@@ -144,7 +219,12 @@ class Genotype(object):
         :rtype: list of float
         """
 
-        return from_option(self._jrep.dosage())
+        if self._px is None:
+            return None
+        elif self._is_dosage:
+            return [x / 32768.0 for x in self._px]
+        else:
+            return _phred_to_dosage(self._px)
 
     def is_hom_ref(self):
         """True if the genotype call is 0/0
@@ -152,7 +232,7 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isHomRef()
+        return self._gt == 0
 
     def is_het(self):
         """True if the genotype call contains two different alleles.
@@ -160,7 +240,10 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isHet()
+        if self._gt is not None and self._gt > 0:
+            j, k = _gt_pair(self._gt)
+            return j != k
+        return False
 
     def is_hom_var(self):
         """True if the genotype call contains two identical alternate alleles.
@@ -168,7 +251,10 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isHomVar()
+        if self._gt is not None and self._gt > 0:
+            j, k = _gt_pair(self._gt)
+            return j == k
+        return False
 
     def is_called_non_ref(self):
         """True if the genotype call contains any non-reference alleles.
@@ -176,7 +262,7 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isCalledNonRef()
+        return self._gt is not None and self._gt > 0
 
     def is_het_non_ref(self):
         """True if the genotype call contains two different alternate alleles.
@@ -184,7 +270,10 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isHetNonRef()
+        if self._gt is not None and self._gt > 0:
+            j, k = _gt_pair(self._gt)
+            return j > 0 and j != k
+        return False
 
     def is_het_ref(self):
         """True if the genotype call contains one reference and one alternate allele.
@@ -192,7 +281,10 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isHetRef()
+        if self._gt is not None and self._gt > 0:
+            j, k = _gt_pair(self._gt)
+            return j == 0 and k > 0
+        return False
 
     def is_not_called(self):
         """True if the genotype call is missing.
@@ -200,7 +292,7 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isNotCalled()
+        return self._gt is None
 
     def is_called(self):
         """True if the genotype call is non-missing.
@@ -208,7 +300,7 @@ class Genotype(object):
         :rtype: bool
         """
 
-        return self._jrep.isCalled()
+        return self._gt is not None
 
     def num_alt_alleles(self):
         """Returns the count of non-reference alleles.
@@ -218,9 +310,11 @@ class Genotype(object):
         :rtype: int or None
         """
 
-        return from_option(self._jrep.nNonRefAlleles())
+        if self._gt is None:
+            return None
+        j, k = _gt_pair(self._gt)
+        return (1 if j != 0 else 0) + (1 if k != 0 else 0)
 
-    @handle_py4j
     def one_hot_alleles(self, num_alleles):
         """Returns a list containing the one-hot encoded representation of the called alleles.
 
@@ -250,9 +344,14 @@ class Genotype(object):
         :param int num_alleles: number of possible alternate alleles
         :rtype: list of int or None
         """
-        return jiterable_to_list(from_option(self._jrep.oneHotAlleles(num_alleles)))
+        if self._gt is None:
+            return None
+        j, k = _gt_pair(self._gt)
+        r = [0] * num_alleles
+        r[j] += 1
+        r[k] += 1
+        return r
 
-    @handle_py4j
     def one_hot_genotype(self, num_genotypes):
         """Returns a list containing the one-hot encoded representation of the genotype call.
 
@@ -282,7 +381,11 @@ class Genotype(object):
         :rtype: list of int or None
         """
 
-        return jiterable_to_list(from_option(self._jrep.oneHotGenotype(num_genotypes)))
+        if self._gt is None:
+            return None
+        r = [0] * num_genotypes
+        r[self._gt] = 1
+        return r
 
     @handle_py4j
     def p_ab(self, theta=0.5):
@@ -308,4 +411,6 @@ class Genotype(object):
         :rtype: float or None
         """
 
-        return from_option(self._jrep.fractionReadsRef())
+        if self._ad is None or sum(self._ad) == 0:
+            return None
+        return float(self._ad[0]) / sum(self._ad)
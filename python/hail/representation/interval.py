@@ -1,4 +1,4 @@
-from hail.java import scala_object, env, handle_py4j
+from hail.java import scala_object, env, FatalError
 from hail.representation import Locus
 
 
@@ -17,38 +17,48 @@ class Interval(object):
     :type end: :class:`.Locus`
     """
 
-    @handle_py4j
+    __slots__ = ['_start', '_end', '_jrep_cache']
+
     def __init__(self, start, end):
         if not (isinstance(start, Locus) and isinstance(end, Locus)):
             raise TypeError('expect arguments of type (Locus, Locus) but found (%s, %s)' %
                             (str(type(start)), str(type(end))))
-        jrep = scala_object(env.hail.variant, 'Locus').makeInterval(start._jrep, end._jrep)
-        self._init_from_java(jrep)
+        if end < start:
+            raise FatalError('invalid interval: start %s is after end %s' % (start, end))
+        self._start = start
+        self._end = end
+        self._jrep_cache = None
 
     def __str__(self):
-        return self._jrep.toString()
+        return 'Interval(%s,%s)' % (self._start, self._end)
 
     def __repr__(self):
         return 'Interval(start=%s, end=%s)' % (repr(self.start), repr(self.end))
 
     def __eq__(self, other):
-        return self._jrep.equals(other._jrep)
+        return isinstance(other, Interval) and self._start == other._start and self._end == other._end
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __hash__(self):
-        return self._jrep.hashCode()
+        return hash((self._start, self._end))
 
-    def _init_from_java(self, jrep):
-        self._jrep = jrep
-        self._start = Locus._from_java(self._jrep.start())
+    @property
+    def _jrep(self):
+        if self._jrep_cache is None:
+            self._jrep_cache = scala_object(env.hail.variant, 'Locus').makeInterval(self._start._jrep, self._end._jrep)
+        return self._jrep_cache
 
     @classmethod
     def _from_java(cls, jrep):
         interval = Interval.__new__(cls)
-        interval._init_from_java(jrep)
+        interval._start = Locus._from_java(jrep.start())
+        interval._end = Locus._from_java(jrep.end())
+        interval._jrep_cache = jrep
         return interval
 
     @staticmethod
-    @handle_py4j
     def parse(string):
         """Parses a genomic interval from string representation.
 
@@ -65,8 +75,19 @@ class Interval(object):
         :rtype: :class:`.Interval`
         """
 
-        jrep = scala_object(env.hail.variant, 'Locus').parseInterval(string)
-        return Interval._from_java(jrep)
+        fields = string.split('-')
+        if len(fields) != 2:
+            raise FatalError('expected 2 dash-delimited fields, but found %d' % len(fields))
+        start = Locus.parse(fields[0])
+        end_fields = fields[1].split(':')
+        if len(end_fields) == 1:
+            end = Locus(start.contig, int(end_fields[0]))
+        elif len(end_fields) == 2:
+            end = Locus(end_fields[0], int(end_fields[1]))
+        else:
+            raise FatalError('expected end locus in format CHR:POS or POS, but found %d colon-delimited fields' %
+                             len(end_fields))
+        return Interval(start, end)
 
     @property
     def start(self):
@@ -75,7 +96,7 @@ class Interval(object):
 
         :rtype: :class:`.Locus`
         """
-        return Locus._from_java(self._jrep.start())
+        return self._start
 
     @property
     def end(self):
@@ -84,9 +105,8 @@ class Interval(object):
 
         :rtype: :class:`.Locus`
         """
-        return Locus._from_java(self._jrep.end())
+        return self._end
 
-    @handle_py4j
     def contains(self, locus):
         """True if the supplied locus is contained within the interval.
 
@@ -97,9 +117,8 @@ class Interval(object):
         :rtype: bool
         """
 
-        return self._jrep.contains(locus._jrep)
+        return self._start <= locus < self._end
 
-    @handle_py4j
     def overlaps(self, interval):
         """True if the the supplied interval contains any locus in common with this one.
 
@@ -114,4 +133,4 @@ class Interval(object):
         :type: interval: :class:`.Interval`
         :rtype: bool"""
 
-        return self._jrep.overlaps(interval._jrep)
+        return self.contains(interval.start) or interval.contains(self.start)
@@ -1,4 +1,34 @@
-from hail.java import scala_object, env, handle_py4j
+from hail.java import scala_object, env, FatalError
+
+_standard_contigs = [str(i) for i in range(1, 24)] + ['X', 'Y', 'MT']
+_standard_contig_index = dict((c, i) for i, c in enumerate(_standard_contigs))
+
+
+def _contig_key(contig):
+    """Sort key matching ``is.hail.variant.Contig.compare``: standard contigs in order, then the rest lexically."""
+
+    i = _standard_contig_index.get(contig)
+    if i is not None:
+        return 0, i, ''
+    else:
+        return 1, 0, contig
+
+
+def _in_X(contig):
+    return contig.upper() == 'X' or contig == '23' or contig == '25'
+
+
+def _in_Y(contig):
+    return contig.upper() == 'Y' or contig == '24'
+
+
+# PAR regions of sex chromosomes, boundaries for build GRCh37
+def _in_X_PAR_pos(position):
+    return (60001 <= position <= 2699520) or (154931044 <= position <= 155260560)
+
+
+def _in_Y_PAR_pos(position):
+    return (10001 <= position <= 2649520) or (59034050 <= position <= 59363566)
 
 
 class Variant(object):
@@ -18,43 +48,63 @@ class Variant(object):
     :type alts: str or list of str
     """
 
-    @handle_py4j
+    __slots__ = ['_contig', '_start', '_ref', '_alt_alleles', '_jrep_cache']
+
     def __init__(self, contig, start, ref, alts):
         if isinstance(contig, int):
             contig = str(contig)
-        jrep = scala_object(env.hail.variant, 'Variant').apply(contig, start, ref, alts)
-        self._init_from_java(jrep)
+        if not isinstance(alts, (list, tuple)):
+            alts = [alts]
+        if start < 0:
+            raise FatalError("invalid variant: negative position: `%s:%s:%s:%s'" % (contig, start, ref, ','.join(alts)))
+        if not ref:
+            raise FatalError("invalid variant: empty ref allele: `%s:%s'" % (contig, start))
         self._contig = contig
         self._start = start
         self._ref = ref
+        self._alt_alleles = [AltAllele(ref, alt) for alt in alts]
+        self._jrep_cache = None
 
     def __str__(self):
-        return self._jrep.toString()
+        return '%s:%s:%s:%s' % (self._contig, self._start, self._ref, ','.join([a.alt for a in self._alt_alleles]))
 
     def __repr__(self):
         return 'Variant(contig=%s, start=%s, ref=%s, alts=%s)' % (self.contig, self.start, self.ref, self._alt_alleles)
 
+    def _key(self):
+        return (_contig_key(self._contig), self._start, self._ref, len(self._alt_alleles),
+                [a.alt for a in self._alt_alleles])
+
     def __eq__(self, other):
-        return self._jrep.equals(other._jrep)
+        return isinstance(other, Variant) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self._key() < other._key()
 
     def __hash__(self):
-        return self._jrep.hashCode()
+        return hash((self._contig, self._start, self._ref, tuple([a.alt for a in self._alt_alleles])))
 
-    def _init_from_java(self, jrep):
-        self._jrep = jrep
-        self._alt_alleles = map(AltAllele._from_java, [jrep.altAlleles().apply(i) for i in xrange(jrep.nAltAlleles())])
+    @property
+    def _jrep(self):
+        if self._jrep_cache is None:
+            self._jrep_cache = scala_object(env.hail.variant, 'Variant').apply(
+                self._contig, self._start, self._ref, [a.alt for a in self._alt_alleles])
+        return self._jrep_cache
 
     @classmethod
     def _from_java(cls, jrep):
         v = Variant.__new__(cls)
-        v._init_from_java(jrep)
         v._contig = jrep.contig()
         v._start = jrep.start()
         v._ref = jrep.ref()
+        v._alt_alleles = map(AltAllele._from_java, [jrep.altAlleles().apply(i) for i in xrange(jrep.nAltAlleles())])
+        v._jrep_cache = jrep
         return v
 
     @staticmethod
-    @handle_py4j
     def parse(string):
         """Parses a variant object from a string.
 
@@ -67,8 +117,12 @@ class Variant(object):
 
         :rtype: :class:`.Variant`
         """
-        jrep = scala_object(env.hail.variant, 'Variant').parse(string)
-        return Variant._from_java(jrep)
+
+        fields = string.split(':')
+        if len(fields) != 4:
+            raise FatalError('expected 4 colon-delimited fields, but found %d' % len(fields))
+        contig, start, ref, alts = fields
+        return Variant(contig, int(start), ref, alts.split(','))
 
     @property
     def contig(self):
@@ -111,7 +165,7 @@ class Variant(object):
         :rtype: int
         """
 
-        return self._jrep.nAltAlleles()
+        return len(self._alt_alleles)
 
     def is_biallelic(self):
         """True if there is only one alternate allele in this polymorphism.
@@ -119,7 +173,7 @@ class Variant(object):
         :rtype: bool
         """
 
-        return self._jrep.isBiallelic()
+        return len(self._alt_alleles) == 1
 
     def alt_allele(self):
         """Returns the alternate allele object, assumes biallelic.
@@ -129,7 +183,9 @@ class Variant(object):
         :rtype: :class:`.AltAllele`
         """
 
-        return AltAllele._from_java(self._jrep.altAllele())
+        if not self.is_biallelic():
+            raise FatalError('called alt_allele on a non-biallelic variant')
+        return self._alt_alleles[0]
 
     def alt(self):
         """Returns the alternate allele string, assumes biallelic.
@@ -139,7 +195,7 @@ class Variant(object):
         :rtype: str
         """
 
-        return self._jrep.alt()
+        return self.alt_allele().alt
 
     def num_alleles(self):
         """Returns the number of total alleles in this polymorphism, including the reference.
@@ -147,9 +203,8 @@ class Variant(object):
         :rtype: int
         """
 
-        return self._jrep.nAlleles()
+        return 1 + len(self._alt_alleles)
 
-    @handle_py4j
     def allele(self, i):
         """Returns the string allele representation for the ith allele.
 
@@ -169,7 +224,10 @@ class Variant(object):
         :rtype: str
         """
 
-        return self._jrep.allele(i)
+        if i == 0:
+            return self._ref
+        else:
+            return self._alt_alleles[i - 1].alt
 
     def num_genotypes(self):
         """Returns the total number of unique genotypes possible for this variant.
@@ -186,28 +244,29 @@ class Variant(object):
 
         :rtype: int"""
 
-        return self._jrep.nGenotypes()
+        n = self.num_alleles()
+        return n * (n + 1) // 2
 
     def locus(self):
         """Returns the locus object for this polymorphism.
 
         :rtype: :class:`.Locus`
         """
-        return Locus._from_java(self._jrep.locus())
+        return Locus(self._contig, self._start)
 
     def is_autosomal_or_pseudoautosomal(self):
         """True if this polymorphism is found on an autosome, or the PAR on X or Y.
 
         :rtype: bool
         """
-        return self._jrep.isAutosomalOrPseudoAutosomal()
+        return self.is_autosomal() or self.in_X_PAR() or self.in_Y_PAR()
 
     def is_autosomal(self):
         """True if this polymorphism is located on an autosome.
 
         :rtype: bool
         """
-        return self._jrep.isAutosomal()
+        return not (_in_X(self._contig) or _in_Y(self._contig) or self.is_mitochondrial())
 
     def is_mitochondrial(self):
         """True if this polymorphism is mapped to mitochondrial DNA.
@@ -215,7 +274,8 @@ class Variant(object):
         :rtype: bool
         """
 
-        return self._jrep.isMitochondrial()
+        c = self._contig.upper()
+        return c == 'MT' or c == 'M' or c == '26'
 
     def in_X_PAR(self):
         """True of this polymorphism is found on the pseudoautosomal region of chromosome X.
@@ -223,7 +283,7 @@ class Variant(object):
         :rtype: bool
         """
 
-        return self._jrep.inXPar()
+        return _in_X(self._contig) and _in_X_PAR_pos(self._start)
 
     def in_Y_PAR(self):
         """True of this polymorphism is found on the pseudoautosomal region of chromosome Y.
@@ -231,7 +291,7 @@ class Variant(object):
         :rtype: bool
         """
 
-        return self._jrep.inYPar()
+        return _in_Y(self._contig) and _in_Y_PAR_pos(self._start)
 
     def in_X_non_PAR(self):
         """True of this polymorphism is found on the non-pseudoautosomal region of chromosome X.
@@ -239,7 +299,7 @@ class Variant(object):
         :rtype: bool
         """
 
-        return self._jrep.inXNonPar()
+        return _in_X(self._contig) and not _in_X_PAR_pos(self._start)
 
     def in_Y_non_PAR(self):
         """True of this polymorphism is found on the non-pseudoautosomal region of chromosome Y.
@@ -247,7 +307,7 @@ class Variant(object):
         :rtype: bool
         """
 
-        return self._jrep.inYNonPar()
+        return _in_Y(self._contig) and not _in_Y_PAR_pos(self._start)
 
 
 class AltAllele(object):
@@ -258,34 +318,46 @@ class AltAllele(object):
     :param str alt: alternate allele
     """
 
-    @handle_py4j
+    __slots__ = ['_ref', '_alt', '_jrep_cache']
+
     def __init__(self, ref, alt):
-        jaa = scala_object(env.hail.variant, 'AltAllele').apply(ref, alt)
-        self._init_from_java(jaa)
+        if ref == alt:
+            raise FatalError('ref was equal to alt')
+        if not ref:
+            raise FatalError('ref was an empty string')
+        if not alt:
+            raise FatalError('alt was an empty string')
         self._ref = ref
         self._alt = alt
+        self._jrep_cache = None
 
     def __str__(self):
-        return self._jrep.toString()
+        return '%s/%s' % (self._ref, self._alt)
 
     def __repr__(self):
         return 'AltAllele(ref=%s, alt=%s)' % (self.ref, self.alt)
 
     def __eq__(self, other):
-        return self._jrep.equals(other._jrep)
+        return isinstance(other, AltAllele) and self._ref == other._ref and self._alt == other._alt
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __hash__(self):
-        return self._jrep.hashCode()
+        return hash((self._ref, self._alt))
 
-    def _init_from_java(self, jrep):
-        self._jrep = jrep
+    @property
+    def _jrep(self):
+        if self._jrep_cache is None:
+            self._jrep_cache = scala_object(env.hail.variant, 'AltAllele').apply(self._ref, self._alt)
+        return self._jrep_cache
 
     @classmethod
     def _from_java(cls, jaa):
         aa = AltAllele.__new__(cls)
-        aa._init_from_java(jaa)
         aa._ref = jaa.ref()
         aa._alt = jaa.alt()
+        aa._jrep_cache = jaa
         return aa
 
     @property
@@ -314,7 +386,9 @@ class AltAllele(object):
         :rtype: int
         """
 
-        return self._jrep.nMismatch()
+        if len(self._ref) != len(self._alt):
+            raise FatalError("invalid nMismatch call on ref `%s' and alt `%s'" % (self._ref, self._alt))
+        return sum(1 for r, a in zip(self._ref, self._alt) if r != a)
 
     def stripped_snp(self):
         """Returns the one-character reduced SNP.
@@ -324,8 +398,11 @@ class AltAllele(object):
         :rtype: str, str
         """
 
-        r = self._jrep.strippedSNP()
-        return r._1(), r._2()
+        if not self.is_SNP():
+            raise FatalError('called stripped_snp on non-SNP')
+        for r, a in zip(self._ref, self._alt):
+            if r != a:
+                return r, a
 
     def is_SNP(self):
         """True if this alternate allele is a single nucleotide polymorphism (SNP)
@@ -333,7 +410,8 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isSNP()
+        return ((len(self._ref) == 1 and len(self._alt) == 1) or
+                (len(self._ref) == len(self._alt) and self.num_mismatch() == 1))
 
     def is_MNP(self):
         """True if this alternate allele is a multiple nucleotide polymorphism (MNP)
@@ -341,7 +419,7 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isMNP()
+        return len(self._ref) > 1 and len(self._ref) == len(self._alt) and self.num_mismatch() > 1
 
     def is_insertion(self):
         """True if this alternate allele is an insertion of one or more bases
@@ -349,7 +427,7 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isInsertion()
+        return len(self._ref) < len(self._alt) and self._alt.startswith(self._ref)
 
     def is_deletion(self):
         """True if this alternate allele is a deletion of one or more bases
@@ -357,7 +435,7 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isDeletion()
+        return len(self._alt) < len(self._ref) and self._ref.startswith(self._alt)
 
     def is_indel(self):
         """True if this alternate allele is either an insertion or deletion of one or more bases
@@ -365,7 +443,7 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isIndel()
+        return self.is_insertion() or self.is_deletion()
 
     def is_complex(self):
         """True if this alternate allele does not fit into the categories of SNP, MNP, Insertion, or Deletion
@@ -373,7 +451,7 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isComplex()
+        return len(self._ref) != len(self._alt) and not self.is_insertion() and not self.is_deletion()
 
     def is_transition(self):
         """True if this alternate allele is a transition SNP.
@@ -385,7 +463,9 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isTransition()
+        if not self.is_SNP():
+            return False
+        return self.stripped_snp() in [('A', 'G'), ('G', 'A'), ('C', 'T'), ('T', 'C')]
 
     def is_transversion(self):
         """True if this alternate allele is a transversion SNP.
@@ -397,7 +477,7 @@ class AltAllele(object):
         :rtype: bool
         """
 
-        return self._jrep.isTransversion()
+        return self.is_SNP() and not self.is_transition()
 
 
 class Locus(object):
@@ -409,47 +489,70 @@ class Locus(object):
     :param int position: chromosomal position (1-indexed)
     """
 
-    @handle_py4j
+    __slots__ = ['_contig', '_position', '_jrep_cache']
+
     def __init__(self, contig, position):
         if isinstance(contig, int):
             contig = str(contig)
-        jrep = scala_object(env.hail.variant, 'Locus').apply(contig, position)
-        self._init_from_java(jrep)
         self._contig = contig
         self._position = position
+        self._jrep_cache = None
 
     def __str__(self):
-        return self._jrep.toString()
+        return '%s:%s' % (self._contig, self._position)
 
     def __repr__(self):
         return 'Locus(contig=%s, position=%s)' % (self.contig, self.position)
 
+    def _key(self):
+        return _contig_key(self._contig), self._position
+
     def __eq__(self, other):
-        return self._jrep.equals(other._jrep)
+        return isinstance(other, Locus) and self._contig == other._contig and self._position == other._position
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self._key() < other._key()
+
+    def __le__(self, other):
+        return self._key() <= other._key()
+
+    def __gt__(self, other):
+        return self._key() > other._key()
+
+    def __ge__(self, other):
+        return self._key() >= other._key()
 
     def __hash__(self):
-        return self._jrep.hashCode()
+        return hash((self._contig, self._position))
 
-    def _init_from_java(self, jrep):
-        self._jrep = jrep
+    @property
+    def _jrep(self):
+        if self._jrep_cache is None:
+            self._jrep_cache = scala_object(env.hail.variant, 'Locus').apply(self._contig, self._position)
+        return self._jrep_cache
 
     @classmethod
     def _from_java(cls, jrep):
         l = Locus.__new__(cls)
-        l._init_from_java(jrep)
         l._contig = jrep.contig()
         l._position = jrep.position()
+        l._jrep_cache = jrep
         return l
 
     @staticmethod
-    @handle_py4j
     def parse(string):
         """Parses a locus object from a CHR:POS string.
 
         :rtype: :class:`.Locus`
         """
 
-        return Locus._from_java(scala_object(env.hail.variant, 'Locus').parse(string))
+        fields = string.split(':')
+        if len(fields) != 2:
+            raise FatalError('expected 2 colon-delimited fields, but found %d' % len(fields))
+        return Locus(fields[0], int(fields[1]))
 
     @property
     def contig(self):
@@ -42,6 +42,16 @@ class ContextTests(unittest.TestCase):
                               sample_file=test_resources + '/example.sample')
         self.assertEqual(bgen.count()['nVariants'], 199)
 
+        # variants and interval list paths may be given as unicode strings
+        picked = [unicode(v) for v in bgen.query_variants('variants.take(3)')[0]]
+        self.assertEqual(hc.import_bgen(test_resources + '/example.v11.bgen',
+                                        sample_file=test_resources + '/example.sample',
+                                        variants=picked).count_variants(), 3)
+        self.assertEqual(hc.import_bgen(test_resources + '/example.v11.bgen',
+                                        sample_file=test_resources + '/example.sample',
+                                        intervals=unicode(test_resources + '/example1.interval_list')).count_variants(),
+                         bgen.filter_variants_intervals(test_resources + '/example1.interval_list').count_variants())
+
         gen = hc.import_gen(test_resources + '/example.gen',
                             sample_file=test_resources + '/example.sample')
         self.assertEqual(gen.count()['nVariants'], 199)
@@ -60,6 +70,17 @@ class ContextTests(unittest.TestCase):
 
         self.assertTrue(vcf.same(vds))
 
+        region = hc.read('/tmp/sample.vds', intervals=[Interval.parse('20:10000000-13000000')])
+        self.assertEqual(region.count_variants(),
+                         vcf.filter_variants_expr('v.start >= 10000000 && v.start < 13000000').count_variants())
+
+        pruned = hc.read('/tmp/sample.vds', variant_fields=['info.AC'], genotype_fields=['gt'])
+        self.assertEqual([f.name for f in pruned.variant_schema.fields], ['info'])
+        self.assertEqual([(f.name, f.typ) for f in pruned.variant_schema.fields[0].typ.fields],
+                         [('AC', TArray(TInt()))])
+        self.assertEqual(pruned.annotate_variants_expr('va.nDP = gs.filter(g => isDefined(g.dp)).count()')
+                         .query_variants('variants.map(v => va.nDP).sum()')[0], 0)
+
         bn = hc.balding_nichols_model(3, 10, 100, 8)
         bn_count = bn.count()
         self.assertEqual(bn_count['nSamples'], 10)
@@ -335,6 +356,14 @@ class ContextTests(unittest.TestCase):
         (kt.aggregate_by_key("Status = Status", "Sum = qPhen.sum()")
          .count_rows())
 
+        # Iterate
+        rows = list(kt.iter_rows())
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(len([r for r in rows if r.Status == "CASE"]), ktcase.count_rows())
+        batches = list(kt.iter_batches(batch_size=30, prefetch=0))
+        self.assertEqual([len(b) for b in batches], [30, 30, 30, 10])
+        self.assertEqual([r for b in batches for r in b], rows)
+
         # Forall, Exists
         self.assertFalse(kt.forall('Status == "CASE"'))
         self.assertTrue(kt.exists('Status == "CASE"'))
@@ -354,6 +383,15 @@ class ContextTests(unittest.TestCase):
 
         kt.to_dataframe()
 
+        df = kt.to_pandas()
+        self.assertEqual(list(df.columns), kt.column_names)
+        self.assertEqual(len(df), 100)
+        self.assertEqual(sorted(df['Sample']), sorted(r.Sample for r in rows))
+        x = kt.to_numpy(['qPhen'])
+        self.assertEqual(x.shape, (100, 1))
+        self.assertEqual(sum(1 for r in rows if r.qPhen is None), sum(1 for v in x[:, 0] if v != v))
+        self.assertRaises(TypeError, lambda: kt.to_numpy(['Status']))
+
         kt.annotate("newField = [0, 1, 2]").explode(["newField"])
 
         sample = hc.import_vcf(test_resources + '/sample.vcf')
@@ -401,6 +439,18 @@ class ContextTests(unittest.TestCase):
         self.assertFalse(v2.in_X_non_PAR())
         self.assertFalse(v2.in_Y_non_PAR())
 
+        x_par = Variant('X', 60001, 'A', 'T')
+        self.assertTrue(x_par.in_X_PAR())
+        self.assertFalse(x_par.in_X_non_PAR())
+        self.assertFalse(x_par.is_autosomal())
+        self.assertTrue(x_par.is_autosomal_or_pseudoautosomal())
+        self.assertTrue(Variant('MT', 100, 'A', 'T').is_mitochondrial())
+        self.assertEqual(x_par._jrep.inXPar(), x_par.in_X_PAR())
+        self.assertEqual(str(v2), v2._jrep.toString())
+
+        self.assertTrue(Locus('2', 100) < Locus('10', 5) < Locus('X', 1) < Locus('GL000192.1', 1))
+        self.assertEqual(sorted([v2, Variant('1', 50, 'A', 'T')]), [Variant('1', 50, 'A', 'T'), v2])
+
         aa1 = AltAllele('A', 'T')
         aa2 = AltAllele('A', 'AAA')
         aa3 = AltAllele('TTTT', 'T')
@@ -497,6 +547,17 @@ class ContextTests(unittest.TestCase):
 
         self.assertEqual(g.fraction_reads_ref(), 12.0 / (10 + 12))
 
+        self.assertEqual(str(g), '0/1:12,10:25:40:PL=40,0,99')
+        self.assertEqual(str(missing_gt), './.:.:.:.:PL=.')
+        self.assertEqual(g, Genotype(1, [12, 10], 25, 40, [40, 0, 99]))
+        self.assertEqual(hash(g), hash(Genotype(1, [12, 10], 25, 40, [40, 0, 99])))
+        self.assertNotEqual(g, g2)
+        self.assertTrue(hom_ref.is_hom_ref())
+        self.assertEqual(Genotype._from_java(hom_ref._jrep), hom_ref)
+        self.assertEqual(Genotype._from_java(g._jrep), g)
+        self.assertEqual(Genotype(0, ad=[], pl=[]), hom_ref)
+        self.assertIsNone(Genotype(0, ad=[], pl=[]).ad)
+
     def test_types(self):
         self.assertEqual(TInt(), TInt())
         self.assertEqual(TDouble(), TDouble())
@@ -552,10 +613,78 @@ class ContextTests(unittest.TestCase):
                 else:
                     self.assertNotEqual(some_random_types[i], some_random_types_cp[j])
 
+        for t in some_random_types:
+            t2 = Type._from_java(t._jtype)
+            self.assertEqual(t2, t)
+            self.assertIs(Type._from_java(t._jtype), t2)
+
+        vds = hc.import_vcf('src/test/resources/sample.vcf')
+        self.assertIs(vds.variant_schema, vds.filter_variants_expr('v.start > 10').variant_schema)
+
+        # schemas that may differ only in field attributes do not share a tree
+        for v in [vds, vds.annotate_variants_expr('va.info = va.info')]:
+            self.assertTrue(v.variant_schema._jtype.equals(v._jvds.vaSignature()))
+
+    def test_derived_metadata(self):
+        vds = hc.import_vcf('src/test/resources/sample.vcf').sample_qc()
+        sample_ids = vds.sample_ids
+        sample_annotations = vds.sample_annotations
+        va_schema = vds.variant_schema
+
+        filtered = vds.filter_variants_expr('v.start % 2 == 0')
+        self.assertIs(filtered.sample_ids, sample_ids)
+        self.assertIs(filtered.sample_annotations, sample_annotations)
+        self.assertIs(filtered._va_schema, va_schema)
+
+        annotated = filtered.annotate_variants_expr('va.foo = 5')
+        self.assertIs(annotated.sample_ids, sample_ids)
+        self.assertIsNone(annotated._va_schema)
+        self.assertTrue('foo' in [f.name for f in annotated.variant_schema.fields])
+
+        self.assertIsNone(annotated.annotate_samples_expr('sa.bar = 5')._sa_schema)
+        dropped = annotated.drop_samples()
+        self.assertIsNone(dropped._sample_ids)
+        self.assertEqual(dropped.sample_ids, [])
+        self.assertEqual(dropped.num_samples, 0)
+
     def test_query(self):
         vds = hc.import_vcf('src/test/resources/sample.vcf').split_multi().sample_qc()
 
         self.assertEqual(vds.sample_ids, vds.query_samples('samples.collect()')[0])
+        self.assertEqual(vds.query_samples('samples.map(s => sa.qc.nCalled).collect()')[0],
+                         [vds.sample_annotations[s].qc.nCalled for s in vds.sample_ids])
+
+        cols = vds.sample_annotations_frame(['sa.qc.nCalled', 'sa.qc.callRate'], as_pandas=False)
+        self.assertEqual(list(cols['qc.nCalled']), [vds.sample_annotations[s].qc.nCalled for s in vds.sample_ids])
+        self.assertEqual(list(cols['s']), vds.sample_ids)
+        df = vds.sample_annotations_frame()
+        self.assertEqual(len(df), vds.num_samples)
+
+        with vds.batch_queries() as q:
+            counts = q.count(genotypes=True)
+            plain_counts = q.count()
+            n_snps = q.query_variants('variants.filter(v => v.altAllele.isSNP()).count()')
+            n_genotypes = q.query_genotypes('gs.count()')
+            n_called = q.query_genotypes('gs.filter(g => g.isCalled).count()')
+            n_samples = q.query_samples('samples.count()')
+            self.assertFalse(counts.done())
+        self.assertEqual(counts.get(), vds.count(genotypes=True))
+        self.assertEqual(plain_counts.get(), vds.count())
+        self.assertEqual(n_snps.get(), vds.query_variants('variants.filter(v => v.altAllele.isSNP()).count()')[0])
+        self.assertEqual(n_genotypes.get(), counts.get()['nGenotypes'])
+        self.assertEqual(n_called.get(), counts.get()['nCalled'])
+        self.assertEqual(n_samples.get(), vds.num_samples)
+        self.assertRaises(RuntimeError, lambda: vds.batch_queries().count().get())
+
+        s = vds.sample_ids[0]
+        arrays = vds.sample_genotype_arrays(s)
+        gs = (vds.annotate_variants_expr('va.g = gs.filter(g => s.id == "%s").collect()[0]' % s)
+              .query_variants('variants.map(v => va.g).collect()')[0])
+        self.assertEqual(arrays['v'], vds.query_variants('variants.collect()'))
+        self.assertEqual(list(arrays['gt']), [-1 if g.gt is None else g.gt for g in gs])
+        self.assertEqual(list(arrays['dp']), [-1 if g.dp is None else g.dp for g in gs])
+        i = [j for j, g in enumerate(gs) if g.ad is not None][0]
+        self.assertEqual(list(arrays['ad'][arrays['ad_offsets'][i]:arrays['ad_offsets'][i + 1]]), gs[i].ad)
 
     def test_annotate_global(self):
         vds = hc.import_vcf('src/test/resources/sample.vcf')
@@ -1,4 +1,5 @@
 import abc
+import struct
 from hail.java import scala_object, env
 from hail.representation import Variant, AltAllele, Genotype, Locus, Interval, Struct
 
@@ -18,6 +19,59 @@ class TypeCheckError(Exception):
         return self.msg
 
 
+class _BinaryReader(object):
+    """
+    Decoder for the annotation layout written by ``is.hail.expr.BinaryAnnotationImpex``.
+
+    :param buf: encoded annotation bytes
+    :type buf: bytearray or bytes
+    """
+
+    _byte = struct.Struct('>b')
+    _int = struct.Struct('>i')
+    _long = struct.Struct('>q')
+    _float = struct.Struct('>f')
+    _double = struct.Struct('>d')
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def _unpack(self, fmt):
+        x = fmt.unpack_from(self.buf, self.pos)[0]
+        self.pos += fmt.size
+        return x
+
+    def read_bool(self):
+        return self._unpack(self._byte) != 0
+
+    def read_int(self):
+        return self._unpack(self._int)
+
+    def read_long(self):
+        return self._unpack(self._long)
+
+    def read_float(self):
+        return self._unpack(self._float)
+
+    def read_double(self):
+        return self._unpack(self._double)
+
+    def read_string(self):
+        n = self.read_int()
+        s = self.buf[self.pos:self.pos + n].decode('utf-8')
+        self.pos += n
+        return s
+
+    def read(self, typ):
+        """Read one (possibly missing) value of type ``typ``."""
+
+        if self.read_bool():
+            return typ._read(self)
+        else:
+            return None
+
+
 class Type(object):
     """
     Hail type superclass used for annotations and expression language.
@@ -41,6 +95,18 @@ class Type(object):
 
     @classmethod
     def _from_java(cls, jtype):
+        # types are immutable, so trees are shared between all schemas with
+        # the same compact signature, including field attributes, and only
+        # converted once per session
+        key = jtype.toPrettyString(True, True)
+        t = __type_cache__.get(key)
+        if t is None:
+            t = Type._from_java_uncached(jtype)
+            __type_cache__[key] = t
+        return t
+
+    @classmethod
+    def _from_java_uncached(cls, jtype):
         # FIXME string matching is pretty hacky
         class_name = jtype.getClass().getCanonicalName()
 
@@ -66,6 +132,29 @@ class Type(object):
         """
         return
 
+    def _read(self, reader):
+        """Decode a non-missing value of this type from a :class:`._BinaryReader`."""
+
+        raise NotImplementedError('%s cannot be decoded from the binary annotation encoding' % repr(self))
+
+    def _convert_to_py_bulk(self, annotation):
+        """Convert a JVM annotation to python with a single gateway call."""
+
+        buf = scala_object(env.hail.expr, 'BinaryAnnotationImpex').exportAnnotation(annotation, self._jtype)
+        return _BinaryReader(buf).read(self)
+
+    def _convert_seq_to_py(self, annotations):
+        """Convert a JVM ``IndexedSeq`` of annotations of this type to a list of python objects."""
+
+        return self._decode_seq(
+            scala_object(env.hail.expr, 'BinaryAnnotationImpex').exportAnnotations(annotations, self._jtype))
+
+    def _decode_seq(self, buf):
+        """Decode a sequence of values of this type written by ``BinaryAnnotationImpex.exportAnnotations``."""
+
+        reader = _BinaryReader(buf)
+        return [reader.read(self) for _ in xrange(reader.read_int())]
+
 
 class Singleton(type):
     _instances = {}
@@ -89,6 +178,9 @@ class TInt(Type):
     def __init__(self):
         super(TInt, self).__init__(scala_object(env.hail.expr, 'TInt'))
 
+    def _read(self, reader):
+        return reader.read_int()
+
     def _convert_to_py(self, annotation):
         return annotation
 
@@ -112,6 +204,9 @@ class TLong(Type):
     def __init__(self):
         super(TLong, self).__init__(scala_object(env.hail.expr, 'TLong'))
 
+    def _read(self, reader):
+        return reader.read_long()
+
     def _convert_to_py(self, annotation):
         return annotation
 
@@ -135,6 +230,9 @@ class TFloat(Type):
     def __init__(self):
         super(TFloat, self).__init__(scala_object(env.hail.expr, 'TFloat'))
 
+    def _read(self, reader):
+        return reader.read_float()
+
     def _convert_to_py(self, annotation):
         return annotation
 
@@ -161,6 +259,9 @@ class TDouble(Type):
     def __init__(self):
         super(TDouble, self).__init__(scala_object(env.hail.expr, 'TDouble'))
 
+    def _read(self, reader):
+        return reader.read_double()
+
     def _convert_to_py(self, annotation):
         return annotation
 
@@ -184,6 +285,9 @@ class TString(Type):
     def __init__(self):
         super(TString, self).__init__(scala_object(env.hail.expr, 'TString'))
 
+    def _read(self, reader):
+        return reader.read_string()
+
     def _convert_to_py(self, annotation):
         return annotation
 
@@ -204,6 +308,9 @@ class TBoolean(Type):
     def __init__(self):
         super(TBoolean, self).__init__(scala_object(env.hail.expr, 'TBoolean'))
 
+    def _read(self, reader):
+        return reader.read_bool()
+
     def _convert_to_py(self, annotation):
         return annotation
 
@@ -237,14 +344,16 @@ class TArray(Type):
     @classmethod
     def _from_java(cls, jtype):
         t = TArray.__new__(cls)
-        t.element_type = Type._from_java(jtype.elementType())
+        t.element_type = Type._from_java_uncached(jtype.elementType())
         t._jtype = jtype
         return t
 
+    def _read(self, reader):
+        return [reader.read(self.element_type) for _ in xrange(reader.read_int())]
+
     def _convert_to_py(self, annotation):
         if annotation:
-            lst = env.jutils.iterableToArrayList(annotation)
-            return [self.element_type._convert_to_py(x) for x in lst]
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -286,14 +395,16 @@ class TSet(Type):
     @classmethod
     def _from_java(cls, jtype):
         t = TSet.__new__(cls)
-        t.element_type = Type._from_java(jtype.elementType())
+        t.element_type = Type._from_java_uncached(jtype.elementType())
         t._jtype = jtype
         return t
 
+    def _read(self, reader):
+        return set([reader.read(self.element_type) for _ in xrange(reader.read_int())])
+
     def _convert_to_py(self, annotation):
         if annotation:
-            lst = env.jutils.iterableToArrayList(annotation)
-            return set([self.element_type._convert_to_py(x) for x in lst])
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -337,18 +448,21 @@ class TDict(Type):
     @classmethod
     def _from_java(cls, jtype):
         t = TDict.__new__(cls)
-        t.key_type = Type._from_java(jtype.keyType())
-        t.value_type = Type._from_java(jtype.valueType())
+        t.key_type = Type._from_java_uncached(jtype.keyType())
+        t.value_type = Type._from_java_uncached(jtype.valueType())
         t._jtype = jtype
         return t
 
+    def _read(self, reader):
+        d = dict()
+        for _ in xrange(reader.read_int()):
+            k = reader.read(self.key_type)
+            d[k] = reader.read(self.value_type)
+        return d
+
     def _convert_to_py(self, annotation):
         if annotation:
-            lst = env.jutils.iterableToArrayList(annotation)
-            d = dict()
-            for x in lst:
-                d[self.key_type._convert_to_py(x._1())] = self.value_type._convert_to_py(x._2())
-            return d
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -421,14 +535,17 @@ class TStruct(Type):
     def _init_from_java(self, jtype):
 
         jfields = env.jutils.iterableToArrayList(jtype.fields())
-        self.fields = [Field(f.name(), Type._from_java(f.typ())) for f in jfields]
+        self.fields = [Field(f.name(), Type._from_java_uncached(f.typ())) for f in jfields]
+
+    def _read(self, reader):
+        d = dict()
+        for f in self.fields:
+            d[f.name] = reader.read(f.typ)
+        return Struct(d)
 
     def _convert_to_py(self, annotation):
         if annotation:
-            d = dict()
-            for i, f in enumerate(self.fields):
-                d[f.name] = f.typ._convert_to_py(annotation.get(i))
-            return Struct(d)
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -463,9 +580,16 @@ class TVariant(Type):
     def __init__(self):
         super(TVariant, self).__init__(scala_object(env.hail.expr, 'TVariant'))
 
+    def _read(self, reader):
+        contig = reader.read_string()
+        start = reader.read_int()
+        ref = reader.read_string()
+        alts = [reader.read_string() for _ in xrange(reader.read_int())]
+        return Variant(contig, start, ref, alts)
+
     def _convert_to_py(self, annotation):
         if annotation:
-            return Variant._from_java(annotation)
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -490,9 +614,13 @@ class TAltAllele(Type):
     def __init__(self):
         super(TAltAllele, self).__init__(scala_object(env.hail.expr, 'TAltAllele'))
 
+    def _read(self, reader):
+        ref = reader.read_string()
+        return AltAllele(ref, reader.read_string())
+
     def _convert_to_py(self, annotation):
         if annotation:
-            return AltAllele._from_java(annotation)
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -517,9 +645,26 @@ class TGenotype(Type):
     def __init__(self):
         super(TGenotype, self).__init__(scala_object(env.hail.expr, 'TGenotype'))
 
+    def _read(self, reader):
+        def read_int_option():
+            x = reader.read_int()
+            return x if x >= 0 else None
+
+        def read_array():
+            n = reader.read_int()
+            return [reader.read_int() for _ in xrange(n)] if n >= 0 else None
+
+        gt = read_int_option()
+        ad = read_array()
+        dp = read_int_option()
+        gq = read_int_option()
+        px = read_array()
+        fake_ref = reader.read_bool()
+        return Genotype._from_fields(gt, ad, dp, gq, px, fake_ref, reader.read_bool())
+
     def _convert_to_py(self, annotation):
         if annotation:
-            return Genotype._from_java(annotation)
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -544,9 +689,13 @@ class TLocus(Type):
     def __init__(self):
         super(TLocus, self).__init__(scala_object(env.hail.expr, 'TLocus'))
 
+    def _read(self, reader):
+        contig = reader.read_string()
+        return Locus(contig, reader.read_int())
+
     def _convert_to_py(self, annotation):
         if annotation:
-            return Locus._from_java(annotation)
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -571,9 +720,13 @@ class TInterval(Type):
     def __init__(self):
         super(TInterval, self).__init__(scala_object(env.hail.expr, 'TInterval'))
 
+    def _read(self, reader):
+        start = Locus(reader.read_string(), reader.read_int())
+        return Interval(start, Locus(reader.read_string(), reader.read_int()))
+
     def _convert_to_py(self, annotation):
         if annotation:
-            return Interval._from_java(annotation)
+            return self._convert_to_py_bulk(annotation)
         else:
             return annotation
 
@@ -601,3 +754,6 @@ __singletons__ = {'is.hail.expr.TInt$': TInt,
                   'is.hail.expr.TLocus$': TLocus,
                   'is.hail.expr.TGenotype$': TGenotype,
                   'is.hail.expr.TInterval$': TInterval}
+
+# compact type signature with attributes => shared Type tree, see Type._from_java
+__type_cache__ = {}
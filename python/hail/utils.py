@@ -5,15 +5,22 @@ class TextTableConfig(object):
 
     :param bool noheader: File has no header and columns the N columns are named ``_1``, ``_2``, ... ``_N`` (0-indexed)
     :param bool impute: Impute column types from the file
+    :param impute_sample: Impute types from at most this many lines of
+        each partition. If None, every line is read. Parsing fails, suggesting
+        a wider type, if a later line does not match the imputed type.
+    :type impute_sample: int or None
     :param comment: Skip lines beginning with the given pattern
     :type comment: str or None
-    :param str delimiter: Field delimiter regex
+    :param str delimiter: Field delimiter regex. A single literal character,
+        such as ``,`` or ``\\t``, is split without a regex.
     :param str missing: Specify identifier to be treated as missing
     :param types: Define types of fields in annotations files   
     :type types: str or None
 
     :ivar bool noheader: File has no header and columns the N columns are named ``_1``, ``_2``, ... ``_N`` (0-indexed)
     :ivar bool impute: Impute column types from the file
+    :ivar impute_sample: Impute types from at most this many lines of each partition, None for every line
+    :vartype impute_sample: int or None
     :ivar comment: Skip lines beginning with the given pattern
     :vartype comment: str or None
     :ivar str delimiter: Field delimiter regex
@@ -23,9 +30,10 @@ class TextTableConfig(object):
     """
 
     def __init__(self, noheader=False, impute=False,
-                 comment=None, delimiter="\\t", missing="NA", types=None):
+                 comment=None, delimiter="\\t", missing="NA", types=None, impute_sample=None):
         self.noheader = noheader
         self.impute = impute
+        self.impute_sample = impute_sample
         self.comment = comment
         self.delimiter = delimiter
         self.missing = missing
@@ -39,4 +47,112 @@ class TextTableConfig(object):
         """Convert to Java TextTableConfiguration object."""
         return env.hail.utils.TextTableConfiguration.apply(self.types, self.comment,
                                                            self.delimiter, self.missing,
-                                                           self.noheader, self.impute)
+                                                           self.noheader, self.impute,
+                                                           self.impute_sample or 0)
+
+
+def _numpy_column(values, typ):
+    """Convert a list of python values of Hail type ``typ`` to a NumPy array.
+
+    Numeric columns become int64 (no missing values) or float64 (missing values
+    as NaN) arrays, Boolean columns without missing values become bool arrays,
+    and everything else is an object array.
+    """
+
+    import numpy as np
+    from hail.type import TInt, TLong, TFloat, TDouble, TBoolean
+
+    missing = any(x is None for x in values)
+    if isinstance(typ, (TFloat, TDouble)) or (missing and isinstance(typ, (TInt, TLong))):
+        return np.array([np.nan if x is None else x for x in values], dtype=np.float64)
+    elif isinstance(typ, (TInt, TLong)):
+        return np.array(values, dtype=np.int64)
+    elif isinstance(typ, TBoolean) and not missing:
+        return np.array(values, dtype=np.bool_)
+    else:
+        arr = np.empty(len(values), dtype=object)
+        arr[:] = values
+        return arr
+
+
+def _genotype_columns(buf):
+    """Decode genotypes encoded by ``BinaryAnnotationImpex.exportGenotypeColumns`` into NumPy arrays."""
+
+    import numpy as np
+
+    n = int(np.frombuffer(buf, dtype='>i4', count=1)[0])
+    pos = 4
+
+    def take(dtype, count):
+        arr = np.frombuffer(buf, dtype=dtype, count=count, offset=pos)
+        return arr.astype(dtype[1:] if dtype.startswith('>') else dtype), pos + arr.nbytes
+
+    gt, pos = take('>i4', n)
+    dp, pos = take('>i4', n)
+    gq, pos = take('>i4', n)
+    flags, pos = take('u1', n)
+    ad_offsets, pos = take('>i4', n + 1)
+    ad, pos = take('>i4', int(ad_offsets[-1]))
+    pl_offsets, pos = take('>i4', n + 1)
+    pl, pos = take('>i4', int(pl_offsets[-1]))
+
+    return {'gt': gt,
+            'dp': dp,
+            'gq': gq,
+            'missing': (flags & 0x1) != 0,
+            'fake_ref': (flags & 0x2) != 0,
+            'is_dosage': (flags & 0x4) != 0,
+            'has_ad': (flags & 0x8) != 0,
+            'has_pl': (flags & 0x10) != 0,
+            'ad': ad,
+            'ad_offsets': ad_offsets,
+            'pl': pl,
+            'pl_offsets': pl_offsets}
+
+
+def _decode_columns(buf, types):
+    """Decode columns encoded by ``BinaryAnnotationImpex.exportColumns`` into NumPy arrays.
+
+    Numeric and Boolean columns are read directly from the buffer and converted
+    like :func:`_numpy_column`: missing values become NaN in a float64 array.
+    Other columns are decoded value by value into object arrays.
+    """
+
+    import numpy as np
+    from hail.type import _BinaryReader, TInt, TLong, TFloat, TDouble, TBoolean
+
+    formats = {TInt: ('>i4', np.int64),
+               TLong: ('>i8', np.int64),
+               TFloat: ('>f4', np.float64),
+               TDouble: ('>f8', np.float64),
+               TBoolean: ('u1', np.bool_)}
+
+    n = int(np.frombuffer(buf, dtype='>i4', count=1)[0])
+    pos = 4
+    columns = []
+    for t in types:
+        missing = np.frombuffer(buf, dtype='u1', count=n, offset=pos).astype(np.bool_)
+        pos += n
+        fmt = formats.get(type(t))
+        if fmt is not None:
+            raw = np.frombuffer(buf, dtype=fmt[0], count=n, offset=pos)
+            pos += raw.nbytes
+            if missing.any():
+                if isinstance(t, TBoolean):
+                    col = np.empty(n, dtype=object)
+                    col[:] = raw.astype(np.bool_)
+                    col[missing] = None
+                else:
+                    col = raw.astype(np.float64)
+                    col[missing] = np.nan
+            else:
+                col = raw.astype(fmt[1])
+        else:
+            reader = _BinaryReader(buf)
+            reader.pos = pos
+            col = np.empty(n, dtype=object)
+            for i in xrange(n):
+                col[i] = reader.read(t)
+            pos = reader.pos
+        columns.append(col)
+    return columns
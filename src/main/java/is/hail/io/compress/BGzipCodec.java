@@ -1,15 +1,46 @@
 package is.hail.io.compress;
 
+import org.apache.hadoop.conf.Configurable;
+import org.apache.hadoop.conf.Configuration;
 import org.apache.hadoop.io.compress.*;
 
 import java.io.IOException;
 import java.io.InputStream;
 import java.io.OutputStream;
 
-public class BGzipCodec implements SplittableCompressionCodec {
+public class BGzipCodec implements SplittableCompressionCodec, Configurable {
+    /* Number of blocks to read and inflate ahead of the reader on a worker
+       pool.  0, the default, inflates each block on the reading thread. */
+    public static final String READ_AHEAD_BLOCKS_KEY = "hail.bgzip.readAheadBlocks";
+
+    /* Size of the worker pool used by read-ahead streams.  Streams with the
+       same setting share one pool in the JVM; a different setting gets its
+       own pool of that size. */
+    public static final String INFLATE_THREADS_KEY = "hail.bgzip.inflateThreads";
+
+    private Configuration conf;
+
     public BGzipCodec() {
     }
 
+    @Override
+    public void setConf(Configuration conf) {
+        this.conf = conf;
+    }
+
+    @Override
+    public Configuration getConf() {
+        return conf;
+    }
+
+    private int readAheadBlocks() {
+        return (conf == null) ? 0 : conf.getInt(READ_AHEAD_BLOCKS_KEY, 0);
+    }
+
+    private int inflateThreads() {
+        return (conf == null) ? 4 : conf.getInt(INFLATE_THREADS_KEY, 4);
+    }
+
     @Override
     public Compressor createCompressor() {
         return null;
@@ -32,7 +63,7 @@ public class BGzipCodec implements SplittableCompressionCodec {
 
     @Override
     public CompressionInputStream createInputStream(InputStream in) throws IOException {
-        return new BGzipInputStream(in);
+        return new BGzipInputStream(in, 0L, Long.MAX_VALUE, READ_MODE.BYBLOCK, readAheadBlocks(), inflateThreads());
     }
 
     @Override
@@ -44,7 +75,7 @@ public class BGzipCodec implements SplittableCompressionCodec {
     public SplitCompressionInputStream createInputStream(InputStream seekableIn,
                                                          Decompressor decompressor, long start, long end, READ_MODE readMode)
             throws IOException {
-        return new BGzipInputStream(seekableIn, start, end, readMode);
+        return new BGzipInputStream(seekableIn, start, end, readMode, readAheadBlocks(), inflateThreads());
     }
 
     @Override
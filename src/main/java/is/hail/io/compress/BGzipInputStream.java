@@ -3,10 +3,15 @@ package is.hail.io.compress;
 import org.apache.hadoop.fs.Seekable;
 import org.apache.hadoop.io.compress.SplitCompressionInputStream;
 import org.apache.hadoop.io.compress.SplittableCompressionCodec;
-import java.io.ByteArrayInputStream;
 import java.io.IOException;
 import java.io.InputStream;
-import java.util.zip.GZIPInputStream;
+import java.io.InterruptedIOException;
+import java.util.ArrayDeque;
+import java.util.HashMap;
+import java.util.concurrent.*;
+import java.util.zip.CRC32;
+import java.util.zip.DataFormatException;
+import java.util.zip.Inflater;
 import java.util.zip.ZipException;
 
 public class BGzipInputStream extends SplitCompressionInputStream {
@@ -78,6 +83,118 @@ public class BGzipInputStream extends SplitCompressionInputStream {
         }
     }
 
+    /* Returns true if `in' starts with a BGZF block.  Reads at most one
+       maximal block from `in', which the caller must close. */
+    public static boolean isBGzip(InputStream in) throws IOException {
+        byte[] buf = new byte[BGZF_MAX_BLOCK_SIZE];
+        int size = 0;
+        while (size < buf.length) {
+            int result = in.read(buf, size, buf.length - size);
+            if (result < 0)
+                break;
+            size += result;
+        }
+
+        try {
+            new BGzipHeader(buf, 0, size);
+            return true;
+        } catch (ZipException e) {
+            return false;
+        }
+    }
+
+    /* A BGZF block read from the input: its position in the compressed
+       stream, its compressed bytes, and once inflated, its contents. */
+    private static class Block {
+        final long inPos;
+        final int bsize;
+        final int isize;
+        byte[] compressed;
+        byte[] inflated;
+
+        Block(long inPos, int bsize, int isize, byte[] compressed) {
+            this.inPos = inPos;
+            this.bsize = bsize;
+            this.isize = isize;
+            this.compressed = compressed;
+        }
+    }
+
+    /* Buffers (all BGZF_MAX_BLOCK_SIZE long) and inflaters shared by all
+       streams in the JVM, so read-ahead doesn't allocate per block. */
+    private static final ArrayBlockingQueue<byte[]> bufferPool = new ArrayBlockingQueue<byte[]>(256);
+    private static final ArrayBlockingQueue<Inflater> inflaterPool = new ArrayBlockingQueue<Inflater>(64);
+
+    /* Worker pools shared by all read-ahead streams in the JVM, one per
+       distinct inflateThreads setting, so each stream gets a pool of the
+       size it asked for. */
+    private static final HashMap<Integer, ExecutorService> inflateExecutors = new HashMap<Integer, ExecutorService>();
+
+    private static byte[] takeBuffer() {
+        byte[] b = bufferPool.poll();
+        return (b != null) ? b : new byte[BGZF_MAX_BLOCK_SIZE];
+    }
+
+    private static void releaseBuffer(byte[] b) {
+        if (b != null)
+            bufferPool.offer(b);
+    }
+
+    private static synchronized ExecutorService getInflateExecutor(int nThreads) {
+        ExecutorService executor = inflateExecutors.get(nThreads);
+        if (executor == null) {
+            executor = Executors.newFixedThreadPool(nThreads, new ThreadFactory() {
+                public Thread newThread(Runnable r) {
+                    Thread t = new Thread(r, "bgzip-inflate");
+                    t.setDaemon(true);
+                    return t;
+                }
+            });
+            inflateExecutors.put(nThreads, executor);
+        }
+        return executor;
+    }
+
+    /* Inflates the BGZF block of `bsize' bytes at `buf[off]' into `out' and
+       checks its CRC. */
+    private static void inflateBlock(byte[] buf, int off, int bsize, int isize, byte[] out) throws ZipException {
+        int xlen = (buf[off + 10] & 0xff) | ((buf[off + 11] & 0xff) << 8);
+        int dataOff = off + 12 + xlen;
+        int dataLen = bsize - 12 - xlen - 8;
+        if (dataLen < 0)
+            throw new ZipException();
+
+        Inflater inflater = inflaterPool.poll();
+        if (inflater == null)
+            inflater = new Inflater(true);
+        try {
+            inflater.setInput(buf, dataOff, dataLen);
+            int n = 0;
+            while (n < isize) {
+                int result = inflater.inflate(out, n, isize - n);
+                if (result == 0
+                        && (inflater.finished() || inflater.needsInput() || inflater.needsDictionary()))
+                    throw new ZipException();
+                n += result;
+            }
+        } catch (DataFormatException e) {
+            throw new ZipException(e.getMessage());
+        } finally {
+            inflater.reset();
+            if (!inflaterPool.offer(inflater))
+                inflater.end();
+        }
+
+        CRC32 crc = new CRC32();
+        crc.update(out, 0, isize);
+        int expectedCRC = ((buf[off + bsize - 8] & 0xff)
+                | ((buf[off + bsize - 7] & 0xff) << 8)
+                | ((buf[off + bsize - 6] & 0xff) << 16)
+                | ((buf[off + bsize - 5] & 0xff) << 24));
+        if ((int) crc.getValue() != expectedCRC)
+            throw new ZipException("BGZF block CRC mismatch");
+    }
+
     BGzipHeader bgzipHeader;
 
     final byte[] inputBuffer = new byte[INPUT_BUFFER_CAPACITY];
@@ -87,16 +204,38 @@ public class BGzipInputStream extends SplitCompressionInputStream {
     /* `inputBufferInPos' is the position in the compressed input stream corresponding to `inputBuffer[0]'. */
     long inputBufferInPos = 0;
 
-    final byte[] outputBuffer = new byte[OUTPUT_BUFFER_CAPACITY];
+    byte[] outputBuffer;
     int outputBufferSize = 0;
     int outputBufferPos = 0;
 
+    /* `outputBufferInPos' is the position in the compressed input stream of the block in `outputBuffer'. */
+    long outputBufferInPos = 0;
+
     long currentPos;
 
-    public BGzipInputStream(InputStream in, long start, long end, SplittableCompressionCodec.READ_MODE readMode) throws IOException {
+    /* In read-ahead mode (`readAheadBlocks' > 0), up to `readAheadBlocks'
+       blocks past the current one are read and inflated on a shared worker
+       pool; `pending' holds them in stream order. */
+    private final int readAheadBlocks;
+    private final ExecutorService executor;
+    private final ArrayDeque<Future<Block>> pending = new ArrayDeque<Future<Block>>();
+    private boolean inputExhausted = false;
+
+    public BGzipInputStream(InputStream in, long start, long end, SplittableCompressionCodec.READ_MODE readMode,
+                            int readAheadBlocks, int inflateThreads) throws IOException {
         super(in, start, end);
 
         assert (readMode == SplittableCompressionCodec.READ_MODE.BYBLOCK);
+
+        this.readAheadBlocks = readAheadBlocks;
+        if (readAheadBlocks > 0) {
+            executor = getInflateExecutor(Math.max(inflateThreads, 1));
+            outputBuffer = null;
+        } else {
+            executor = null;
+            outputBuffer = new byte[OUTPUT_BUFFER_CAPACITY];
+        }
+
         ((Seekable) in).seek(start);
         resetState();
         decompressNextBlock();
@@ -104,6 +243,10 @@ public class BGzipInputStream extends SplitCompressionInputStream {
         currentPos = start;
     }
 
+    public BGzipInputStream(InputStream in, long start, long end, SplittableCompressionCodec.READ_MODE readMode) throws IOException {
+        this(in, start, end, readMode, 0, 0);
+    }
+
     @Override
     public long getPos() {
         return currentPos;
@@ -131,44 +274,112 @@ public class BGzipInputStream extends SplitCompressionInputStream {
         }
     }
 
+    /* Advances `inputBuffer' to the next non-empty block and parses its
+       header into `bgzipHeader', or sets it to null at the end of input.
+       On return the block starts at `inputBuffer[0]'. */
+    private void nextInputBlock() throws IOException {
+        while (true) {
+            fillInputBuffer();
+            assert (inputBufferPos == 0);
+            if (inputBufferSize == 0) {
+                bgzipHeader = null;
+                return;
+            }
+
+            bgzipHeader = new BGzipHeader(inputBuffer, inputBufferPos, inputBufferSize);
+            if (bgzipHeader.isize != 0)
+                return;
+            inputBufferPos += bgzipHeader.bsize;
+        }
+    }
+
     private void decompressNextBlock() throws IOException {
         outputBufferSize = 0;
         outputBufferPos = 0;
 
-        fillInputBuffer();
-        assert (inputBufferPos == 0);
-        if (inputBufferSize != 0) {
-            bgzipHeader = new BGzipHeader(inputBuffer, inputBufferPos, inputBufferSize);
-        } else {
-            bgzipHeader = null;
+        if (readAheadBlocks > 0) {
+            nextReadAheadBlock();
             return;
         }
 
+        nextInputBlock();
+        if (bgzipHeader == null)
+            return;
+
         int bsize = bgzipHeader.bsize,
                 isize = bgzipHeader.isize;
 
+        inflateBlock(inputBuffer, 0, bsize, isize, outputBuffer);
+        outputBufferInPos = inputBufferInPos;
+        outputBufferSize = isize;
         inputBufferPos += bsize;
-        if (isize == 0) {
-            decompressNextBlock();
-            return;
-        }
+    }
 
-        InputStream decompIS
-                = new GZIPInputStream(new ByteArrayInputStream(inputBuffer, 0, bsize));
+    private void fillReadAhead() throws IOException {
+        while (!inputExhausted && pending.size() < readAheadBlocks) {
+            nextInputBlock();
+            if (bgzipHeader == null) {
+                inputExhausted = true;
+                return;
+            }
 
-        while (outputBufferSize < isize) {
-            int result = decompIS.read(outputBuffer, outputBufferSize, isize - outputBufferSize);
-            if (result < 0)
-                throw new ZipException();
-            outputBufferSize += result;
+            int bsize = bgzipHeader.getBlockSize();
+            byte[] compressed = takeBuffer();
+            System.arraycopy(inputBuffer, 0, compressed, 0, bsize);
+            final Block block = new Block(inputBufferInPos, bsize, bgzipHeader.isize, compressed);
+            inputBufferPos += bsize;
+
+            pending.add(executor.submit(new Callable<Block>() {
+                public Block call() throws IOException {
+                    block.inflated = takeBuffer();
+                    inflateBlock(block.compressed, 0, block.bsize, block.isize, block.inflated);
+                    releaseBuffer(block.compressed);
+                    block.compressed = null;
+                    return block;
+                }
+            }));
         }
+    }
+
+    private void nextReadAheadBlock() throws IOException {
+        releaseBuffer(outputBuffer);
+        outputBuffer = null;
+
+        fillReadAhead();
+        Future<Block> f = pending.poll();
+        if (f == null)
+            return;  // EOF
+
+        Block block;
+        try {
+            block = f.get();
+        } catch (InterruptedException e) {
+            Thread.currentThread().interrupt();
+            throw new InterruptedIOException();
+        } catch (ExecutionException e) {
+            Throwable cause = e.getCause();
+            if (cause instanceof IOException)
+                throw (IOException) cause;
+            throw new IOException(cause);
+        }
+
+        outputBuffer = block.inflated;
+        outputBufferInPos = block.inPos;
+        outputBufferSize = block.isize;
 
-        decompIS.close();
+        fillReadAhead();
+    }
+
+    private void cancelReadAhead() {
+        for (Future<Block> f : pending)
+            f.cancel(false);
+        pending.clear();
+        inputExhausted = false;
     }
 
     public long blockPos() {
         assert(outputBufferPos == 0);
-        return inputBufferInPos;
+        return outputBufferInPos;
     }
 
     public int readBlock(byte[] b) throws IOException {
@@ -194,7 +405,7 @@ public class BGzipInputStream extends SplitCompressionInputStream {
         assert(outputBufferPos < outputBufferSize);
 
         if (outputBufferPos == 0)
-          currentPos = inputBufferInPos + 1;
+          currentPos = outputBufferInPos + 1;
 
         int toCopy = Math.min(len, outputBufferSize - outputBufferPos);
         System.arraycopy(outputBuffer, outputBufferPos, b, off, toCopy);
@@ -212,7 +423,20 @@ public class BGzipInputStream extends SplitCompressionInputStream {
         return (result < 0) ? result : (b[0] & 0xff);
     }
 
+    @Override
+    public void close() throws IOException {
+        cancelReadAhead();
+        if (readAheadBlocks > 0) {
+            releaseBuffer(outputBuffer);
+            outputBuffer = null;
+        }
+        outputBufferSize = 0;
+        super.close();
+    }
+
     public void resetState() throws IOException {
+        cancelReadAhead();
+
         inputBufferSize = 0;
         inputBufferPos = 0;
         inputBufferInPos = ((Seekable) in).getPos();
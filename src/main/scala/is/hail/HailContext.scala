@@ -13,7 +13,7 @@ import is.hail.methods.DuplicateReport
 import is.hail.misc.SeqrServer
 import is.hail.stats.{BaldingNicholsModel, Distribution, UniformDist}
 import is.hail.utils.{log, _}
-import is.hail.variant.{Genotype, VSMSubgen, Variant, VariantDataset, VariantMetadata, VariantSampleMatrix}
+import is.hail.variant.{Genotype, Locus, VSMSubgen, Variant, VariantDataset, VariantMetadata, VariantSampleMatrix}
 import org.apache.hadoop
 import org.apache.log4j.{LogManager, PropertyConfigurator}
 import org.apache.spark.deploy.SparkHadoopUtil
@@ -256,15 +256,19 @@ class HailContext private(val sc: SparkContext,
     sampleFile: Option[String] = None,
     tolerance: Double = 0.2,
     nPartitions: Option[Int] = None,
-    compress: Boolean = true): VariantDataset = {
-    importBgens(List(file), sampleFile, tolerance, nPartitions, compress)
+    compress: Boolean = true,
+    intervals: Option[IntervalTree[Locus]] = None,
+    variants: Option[Seq[Variant]] = None): VariantDataset = {
+    importBgens(List(file), sampleFile, tolerance, nPartitions, compress, intervals, variants)
   }
 
   def importBgens(files: Seq[String],
     sampleFile: Option[String] = None,
     tolerance: Double = 0.2,
     nPartitions: Option[Int] = None,
-    compress: Boolean = true): VariantDataset = {
+    compress: Boolean = true,
+    intervals: Option[IntervalTree[Locus]] = None,
+    variants: Option[Seq[Variant]] = None): VariantDataset = {
 
     val inputs = hadoopConf.globAll(files)
 
@@ -276,7 +280,7 @@ class HailContext private(val sc: SparkContext,
         fatal("unknown input file type")
     }
 
-    BgenLoader.load(this, inputs, sampleFile, tolerance, compress, nPartitions)
+    BgenLoader.load(this, inputs, sampleFile, tolerance, compress, nPartitions, intervals, variants)
   }
 
   def importGen(file: String,
@@ -366,8 +370,8 @@ class HailContext private(val sc: SparkContext,
     quantPheno: Boolean = false,
     compress: Boolean = true): VariantDataset = {
 
+    // genotypes are kept in the packed .bed encoding, compress has no effect
     val ffConfig = FamFileConfig(quantPheno, delimiter, missing)
-    hadoopConf.setBoolean("compressGS", compress)
 
     PlinkLoader(this, bed, bim, fam,
       ffConfig, nPartitions)
@@ -383,17 +387,26 @@ class HailContext private(val sc: SparkContext,
       nPartitions, delimiter, missing, quantPheno, compress)
   }
 
-  def read(file: String, sitesOnly: Boolean = false, samplesOnly: Boolean = false): VariantDataset = {
-    readAll(List(file), sitesOnly, samplesOnly)
+  def read(file: String, sitesOnly: Boolean = false, samplesOnly: Boolean = false,
+    intervals: Option[IntervalTree[Locus]] = None,
+    variantFields: Option[Seq[String]] = None,
+    sampleFields: Option[Seq[String]] = None,
+    genotypeFields: Option[Seq[String]] = None): VariantDataset = {
+    readAll(List(file), sitesOnly, samplesOnly, intervals, variantFields, sampleFields, genotypeFields)
   }
 
-  def readAll(files: Seq[String], sitesOnly: Boolean = false, samplesOnly: Boolean = false): VariantDataset = {
+  def readAll(files: Seq[String], sitesOnly: Boolean = false, samplesOnly: Boolean = false,
+    intervals: Option[IntervalTree[Locus]] = None,
+    variantFields: Option[Seq[String]] = None,
+    sampleFields: Option[Seq[String]] = None,
+    genotypeFields: Option[Seq[String]] = None): VariantDataset = {
     val inputs = hadoopConf.globAll(files)
     if (inputs.isEmpty)
       fatal("arguments refer to no files")
 
     val vdses = inputs.map(input => VariantDataset.read(this, input,
-      skipGenotypes = sitesOnly, skipVariants = samplesOnly))
+      skipGenotypes = sitesOnly, skipVariants = samplesOnly, intervals = intervals,
+      variantFields = variantFields, sampleFields = sampleFields, genotypeFields = genotypeFields))
 
     val sampleIds = vdses.head.sampleIds
     val vaSchema = vdses.head.vaSignature
@@ -454,9 +467,10 @@ class HailContext private(val sc: SparkContext,
     storeGQ: Boolean = false,
     ppAsPL: Boolean = false,
     skipBadAD: Boolean = false,
-    compress: Boolean = true): VariantDataset = {
+    compress: Boolean = true,
+    checkpointBGZ: Boolean = false): VariantDataset = {
     importVCFs(List(file), force, forceBGZ, headerFile, nPartitions, sitesOnly,
-      storeGQ, ppAsPL, skipBadAD, compress)
+      storeGQ, ppAsPL, skipBadAD, compress, checkpointBGZ)
   }
 
   def importVCFs(files: Seq[String], force: Boolean = false,
@@ -467,15 +481,17 @@ class HailContext private(val sc: SparkContext,
     storeGQ: Boolean = false,
     ppAsPL: Boolean = false,
     skipBadAD: Boolean = false,
-    compress: Boolean = true): VariantDataset = {
+    compress: Boolean = true,
+    checkpointBGZ: Boolean = false): VariantDataset = {
 
-    val inputs = LoadVCF.globAllVCFs(hadoopConf.globAll(files), hadoopConf, force || forceBGZ)
+    val (inputs, gzipIsBGZ) = LoadVCF.resolveGzipInputs(
+      LoadVCF.globAllVCFs(hadoopConf.globAll(files), hadoopConf), hadoopConf, force, forceBGZ, checkpointBGZ)
 
     val header = headerFile.getOrElse(inputs.head)
 
     val codecs = sc.hadoopConfiguration.get("io.compression.codecs")
 
-    if (forceBGZ)
+    if (gzipIsBGZ)
       hadoopConf.set("io.compression.codecs",
         codecs.replaceAllLiterally("org.apache.hadoop.io.compress.GzipCodec", "is.hail.io.compress.BGzipCodecGZ"))
 
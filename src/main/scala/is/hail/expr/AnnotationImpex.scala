@@ -1,8 +1,11 @@
 package is.hail.expr
 
+import java.io.{ByteArrayInputStream, ByteArrayOutputStream, DataInputStream, DataOutputStream}
+import java.nio.charset.StandardCharsets
+
 import is.hail.annotations.Annotation
 import is.hail.utils.{Interval, _}
-import is.hail.variant.{AltAllele, Genotype, Locus, Sample, Variant}
+import is.hail.variant.{AltAllele, GenericGenotype, Genotype, Locus, Sample, Variant}
 import org.apache.spark.sql.Row
 import org.apache.spark.sql.types._
 import org.json4s._
@@ -441,3 +444,271 @@ object TableAnnotationImpex extends AnnotationImpex[Unit, String] {
     }
   }
 }
+
+/**
+  * Compact big-endian binary encoding of an annotation tree, used to move
+  * whole annotations (collected query results, globals, sample annotations)
+  * across the Py4J gateway in a single call.  The layout is driven entirely
+  * by the type: every value is prefixed by a presence byte (0 = missing),
+  * strings are a length-prefixed UTF-8 payload, and containers are a
+  * length-prefixed sequence of values.  The Python decoder lives in
+  * python/hail/type.py and must be kept in sync with this layout.
+  */
+object BinaryAnnotationImpex extends AnnotationImpex[Type, Array[Byte]] {
+
+  def exportType(t: Type): Type = t
+
+  def exportAnnotation(a: Annotation, t: Type): Array[Byte] = {
+    val baos = new ByteArrayOutputStream()
+    val out = new DataOutputStream(baos)
+    write(out, a, t)
+    out.flush()
+    baos.toByteArray
+  }
+
+  def exportAnnotations(as: IndexedSeq[Annotation], t: Type): Array[Byte] = {
+    val baos = new ByteArrayOutputStream()
+    val out = new DataOutputStream(baos)
+    out.writeInt(as.length)
+    as.foreach(a => write(out, a, t))
+    out.flush()
+    baos.toByteArray
+  }
+
+  /**
+    * Column-major encoding of the fields `indices` of the struct rows `rs`:
+    * the row count n, then for each field n missing flags followed by the
+    * values.  Int, Long, Float, Double and Boolean fields are written as n
+    * fixed-width values (zero where missing) so they can be decoded as
+    * NumPy arrays without touching individual cells; other fields are
+    * written with `write`.
+    */
+  def exportColumns(rs: IndexedSeq[Annotation], t: TStruct, indices: Array[Int]): Array[Byte] = {
+    val baos = new ByteArrayOutputStream()
+    val out = new DataOutputStream(baos)
+    out.writeInt(rs.length)
+    indices.foreach { j =>
+      val ft = t.fields(j).typ
+      val values = rs.map(r => if (r == null) null else r.asInstanceOf[Row].get(j))
+      values.foreach(v => out.writeBoolean(v == null))
+      ft match {
+        case TInt => values.foreach(v => out.writeInt(if (v == null) 0 else v.asInstanceOf[Int]))
+        case TLong => values.foreach(v => out.writeLong(if (v == null) 0L else v.asInstanceOf[Long]))
+        case TFloat => values.foreach(v => out.writeFloat(if (v == null) 0f else v.asInstanceOf[Float]))
+        case TDouble => values.foreach(v => out.writeDouble(if (v == null) 0d else v.asInstanceOf[Double]))
+        case TBoolean => values.foreach(v => out.writeBoolean(v != null && v.asInstanceOf[Boolean]))
+        case _ => values.foreach(v => write(out, v, ft))
+      }
+    }
+    out.flush()
+    baos.toByteArray
+  }
+
+  final val genotypeMissingBit = 0x1
+  final val genotypeFakeRefBit = 0x2
+  final val genotypeIsDosageBit = 0x4
+  final val genotypeHasADBit = 0x8
+  final val genotypeHasPXBit = 0x10
+
+  /**
+    * Column-major encoding of a sequence of genotypes, decoded into parallel
+    * NumPy arrays on the python side: the count n, then n gt, n dp and n gq
+    * values (-1 for missing), n flag bytes, and for each of AD and PX, n + 1
+    * offsets followed by the packed values.
+    */
+  def exportGenotypeColumns(gs: IndexedSeq[Annotation]): Array[Byte] = {
+    val n = gs.length
+    val genotypes = gs.map(_.asInstanceOf[Genotype])
+
+    val baos = new ByteArrayOutputStream()
+    val out = new DataOutputStream(baos)
+    out.writeInt(n)
+    genotypes.foreach(g => out.writeInt(if (g == null) -1 else g.unboxedGT))
+    genotypes.foreach(g => out.writeInt(if (g == null) -1 else g.dp.getOrElse(-1)))
+    genotypes.foreach(g => out.writeInt(if (g == null) -1 else g.gq.getOrElse(-1)))
+    genotypes.foreach { g =>
+      var flags = 0
+      if (g == null)
+        flags |= genotypeMissingBit
+      else {
+        if (g.fakeRef)
+          flags |= genotypeFakeRefBit
+        if (g.isDosage)
+          flags |= genotypeIsDosageBit
+        if (g.ad.isDefined)
+          flags |= genotypeHasADBit
+        if (g.px.isDefined)
+          flags |= genotypeHasPXBit
+      }
+      out.writeByte(flags)
+    }
+
+    def writePacked(f: Genotype => Option[Array[Int]]) {
+      val arrays = genotypes.map(g => if (g == null) null else f(g).orNull)
+      var offset = 0
+      out.writeInt(offset)
+      arrays.foreach { arr =>
+        if (arr != null)
+          offset += arr.length
+        out.writeInt(offset)
+      }
+      arrays.foreach { arr =>
+        if (arr != null)
+          arr.foreach(out.writeInt)
+      }
+    }
+
+    writePacked(_.ad)
+    writePacked(_.px)
+
+    out.flush()
+    baos.toByteArray
+  }
+
+  private def writeString(out: DataOutputStream, s: String) {
+    val bytes = s.getBytes(StandardCharsets.UTF_8)
+    out.writeInt(bytes.length)
+    out.write(bytes)
+  }
+
+  private def writeIntArray(out: DataOutputStream, arr: Array[Int]) {
+    if (arr == null)
+      out.writeInt(-1)
+    else {
+      out.writeInt(arr.length)
+      arr.foreach(out.writeInt)
+    }
+  }
+
+  private def writeLocus(out: DataOutputStream, l: Locus) {
+    writeString(out, l.contig)
+    out.writeInt(l.position)
+  }
+
+  def write(out: DataOutputStream, a: Annotation, t: Type) {
+    if (a == null)
+      out.writeByte(0)
+    else {
+      out.writeByte(1)
+      (t: @unchecked) match {
+        case TBoolean => out.writeBoolean(a.asInstanceOf[Boolean])
+        case TInt => out.writeInt(a.asInstanceOf[Int])
+        case TLong => out.writeLong(a.asInstanceOf[Long])
+        case TFloat => out.writeFloat(a.asInstanceOf[Float])
+        case TDouble => out.writeDouble(a.asInstanceOf[Double])
+        case TString | TChar | TSample => writeString(out, a.asInstanceOf[String])
+        case TArray(elementType) =>
+          val arr = a.asInstanceOf[IndexedSeq[Annotation]]
+          out.writeInt(arr.length)
+          arr.foreach(elem => write(out, elem, elementType))
+        case TSet(elementType) =>
+          val s = a.asInstanceOf[Set[Annotation]]
+          out.writeInt(s.size)
+          s.foreach(elem => write(out, elem, elementType))
+        case TDict(keyType, valueType) =>
+          val m = a.asInstanceOf[Map[Annotation, Annotation]]
+          out.writeInt(m.size)
+          m.foreach { case (k, v) =>
+            write(out, k, keyType)
+            write(out, v, valueType)
+          }
+        case TAltAllele =>
+          val aa = a.asInstanceOf[AltAllele]
+          writeString(out, aa.ref)
+          writeString(out, aa.alt)
+        case TVariant =>
+          val v = a.asInstanceOf[Variant]
+          writeString(out, v.contig)
+          out.writeInt(v.start)
+          writeString(out, v.ref)
+          out.writeInt(v.nAltAlleles)
+          v.altAlleles.foreach(aa => writeString(out, aa.alt))
+        case TLocus => writeLocus(out, a.asInstanceOf[Locus])
+        case TInterval =>
+          val i = a.asInstanceOf[Interval[Locus]]
+          writeLocus(out, i.start)
+          writeLocus(out, i.end)
+        case TGenotype =>
+          val g = a.asInstanceOf[Genotype]
+          out.writeInt(g.unboxedGT)
+          writeIntArray(out, g.ad.orNull)
+          out.writeInt(g.dp.getOrElse(-1))
+          out.writeInt(g.gq.getOrElse(-1))
+          writeIntArray(out, g.px.orNull)
+          out.writeBoolean(g.fakeRef)
+          out.writeBoolean(g.isDosage)
+        case TStruct(fields) =>
+          val r = a.asInstanceOf[Row]
+          fields.foreach(f => write(out, r.get(f.index), f.typ))
+      }
+    }
+  }
+
+  def importAnnotation(bytes: Array[Byte], t: Type): Annotation =
+    read(new DataInputStream(new ByteArrayInputStream(bytes)), t)
+
+  private def readString(in: DataInputStream): String = {
+    val bytes = new Array[Byte](in.readInt())
+    in.readFully(bytes)
+    new String(bytes, StandardCharsets.UTF_8)
+  }
+
+  private def readIntArray(in: DataInputStream): Array[Int] = {
+    val n = in.readInt()
+    if (n < 0)
+      null
+    else
+      Array.fill(n)(in.readInt())
+  }
+
+  private def readLocus(in: DataInputStream): Locus = {
+    val contig = readString(in)
+    Locus(contig, in.readInt())
+  }
+
+  def read(in: DataInputStream, t: Type): Annotation = {
+    if (in.readByte() == 0)
+      null
+    else
+      (t: @unchecked) match {
+        case TBoolean => in.readBoolean()
+        case TInt => in.readInt()
+        case TLong => in.readLong()
+        case TFloat => in.readFloat()
+        case TDouble => in.readDouble()
+        case TString | TChar | TSample => readString(in)
+        case TArray(elementType) =>
+          Array.fill[Annotation](in.readInt())(read(in, elementType)): IndexedSeq[Annotation]
+        case TSet(elementType) =>
+          Array.fill[Annotation](in.readInt())(read(in, elementType)).toSet
+        case TDict(keyType, valueType) =>
+          Array.fill[(Annotation, Annotation)](in.readInt()) {
+            val k = read(in, keyType)
+            (k, read(in, valueType))
+          }.toMap
+        case TAltAllele =>
+          val ref = readString(in)
+          AltAllele(ref, readString(in))
+        case TVariant =>
+          val contig = readString(in)
+          val start = in.readInt()
+          val ref = readString(in)
+          val alts = Array.fill[String](in.readInt())(readString(in))
+          Variant(contig, start, ref, alts)
+        case TLocus => readLocus(in)
+        case TInterval =>
+          val start = readLocus(in)
+          Interval(start, readLocus(in))
+        case TGenotype =>
+          val gt = in.readInt()
+          val ad = readIntArray(in)
+          val dp = in.readInt()
+          val gq = in.readInt()
+          val px = readIntArray(in)
+          val fakeRef = in.readBoolean()
+          new GenericGenotype(gt, ad, dp, gq, px, fakeRef, in.readBoolean())
+        case TStruct(fields) =>
+          Annotation.fromSeq(fields.map(f => read(in, f.typ)))
+      }
+  }
+}
@@ -0,0 +1,177 @@
+package is.hail.io.annotators
+
+import java.security.MessageDigest
+
+import is.hail.HailContext
+import is.hail.annotations.Annotation
+import is.hail.expr.{Parser, SparkAnnotationImpex, Type}
+import is.hail.sparkextras.{OrderedKey, OrderedPartitioner, OrderedRDD}
+import is.hail.utils._
+import is.hail.variant.{Locus, LocusImplicits, Variant}
+import org.apache.hadoop
+import org.apache.spark.sql.Row
+import org.apache.spark.sql.types.{StructField, StructType}
+import org.json4s.jackson.{JsonMethods, Serialization}
+
+/**
+  * Parsed annotation sources stored under a user-chosen cache directory, so
+  * that later annotations against the same source skip parsing. Entries are
+  * keyed by a digest of the source files and the options they were parsed
+  * with. Tables are stored sorted and range-partitioned by key, so joining
+  * against a cached table does not shuffle it.
+  */
+object AnnotationCache {
+
+  /**
+    * Hex SHA-1 of each file's qualified path and checksum, or its length and
+    * modification time on filesystems without checksums, followed by options.
+    */
+  def digest(hConf: hadoop.conf.Configuration, files: Seq[String], options: String*): String = {
+    val md = MessageDigest.getInstance("SHA-1")
+
+    def update(s: String) {
+      md.update(s.getBytes("UTF-8"))
+      md.update(0.toByte)
+    }
+
+    files.foreach { f =>
+      val fs = hConf.fileSystem(f)
+      val path = new hadoop.fs.Path(f)
+      val status = fs.getFileStatus(path)
+      update(status.getPath.toString)
+      Option(fs.getFileChecksum(path)) match {
+        case Some(checksum) => update(checksum.toString)
+        case None =>
+          update(status.getLen.toString)
+          update(status.getModificationTime.toString)
+      }
+    }
+    options.foreach(update)
+
+    md.digest().map("%02x".format(_)).mkString
+  }
+
+  private def entryPath(cacheDir: String, digest: String): String = cacheDir + "/" + digest
+
+  // entries are written to a temporary directory and renamed into place, so
+  // an existing entry is always complete
+  private def create(hConf: hadoop.conf.Configuration, cacheDir: String, digest: String)(write: String => Unit) {
+    hConf.mkDir(cacheDir)
+    val tmp = hConf.getTemporaryFile(cacheDir)
+    write(tmp)
+
+    val fs = hConf.fileSystem(cacheDir)
+    val tmpPath = new hadoop.fs.Path(tmp)
+    val entry = new hadoop.fs.Path(entryPath(cacheDir, digest))
+    if (fs.exists(entry) || !fs.rename(tmpPath, entry)) {
+      // another job cached the same source first
+      hConf.delete(tmp, recursive = true)
+    } else {
+      // HDFS renames onto an existing directory by moving into it, so if
+      // another job won the race since the check, tmp is now inside its entry
+      val nested = new hadoop.fs.Path(entry, tmpPath.getName)
+      if (fs.exists(nested))
+        fs.delete(nested, true)
+    }
+  }
+
+  private def writeTable[PK, K](hc: HailContext, dirname: String, signature: Type, keySchema: StructType,
+    keyToRow: K => Row, rdd: OrderedRDD[PK, K, Annotation])(implicit pkjw: JSONWriter[PK]) {
+    val hConf = hc.hadoopConf
+
+    hConf.writeTextFile(dirname + "/signature") { out =>
+      val sb = new StringBuilder
+      signature.pretty(sb, printAttrs = true, compact = true)
+      out.write(sb.result())
+    }
+
+    hConf.writeTextFile(dirname + "/partitioner.json.gz") { out =>
+      Serialization.write(rdd.orderedPartitioner.toJSON, out)
+    }
+
+    val requiresConversion = SparkAnnotationImpex.requiresConversion(signature)
+    val rowRDD = rdd.map { case (k, a) =>
+      Row(keyToRow(k), if (requiresConversion) SparkAnnotationImpex.exportAnnotation(a, signature) else a)
+    }
+    hc.sqlContext.createDataFrame(rowRDD, StructType(Array(
+      StructField("key", keySchema, nullable = false),
+      StructField("annotation", signature.schema))))
+      .write.parquet(dirname + "/rdd.parquet")
+  }
+
+  private def readTable[PK, K](hc: HailContext, dirname: String, keyFromRow: Row => K)
+    (implicit pkjr: JSONReader[PK], kOk: OrderedKey[PK, K]): (Type, OrderedRDD[PK, K, Annotation]) = {
+    val hConf = hc.hadoopConf
+
+    val signature = Parser.parseType(hConf.readFile(dirname + "/signature")(scala.io.Source.fromInputStream(_).mkString))
+    val partitioner = hConf.readFile(dirname + "/partitioner.json.gz")(JsonMethods.parse(_))
+      .fromJSON[OrderedPartitioner[PK, K]]
+
+    val requiresConversion = SparkAnnotationImpex.requiresConversion(signature)
+    val rdd = hc.sqlContext.readParquetSorted(dirname + "/rdd.parquet")
+      .map { row =>
+        (keyFromRow(row.getAs[Row](0)),
+          if (requiresConversion) SparkAnnotationImpex.importAnnotation(row.get(1), signature) else row.get(1))
+      }
+
+    (signature, OrderedRDD(rdd, partitioner))
+  }
+
+  def variantTable(hc: HailContext, cacheDir: String, files: Seq[String], options: String*)
+    (parse: => (Type, OrderedRDD[Locus, Variant, Annotation])): (Type, OrderedRDD[Locus, Variant, Annotation]) = {
+    import Variant.orderedKey
+
+    val hConf = hc.hadoopConf
+    val d = digest(hConf, files, "variants" +: options: _*)
+
+    if (!hConf.exists(entryPath(cacheDir, d))) {
+      info(s"caching parsed table in `${ entryPath(cacheDir, d) }'")
+      val (signature, rdd) = parse
+      create(hConf, cacheDir, d) { tmp =>
+        writeTable[Locus, Variant](hc, tmp, signature, Variant.schema, _.toRow, rdd)
+      }
+    } else
+      info(s"reading parsed table from cache `${ entryPath(cacheDir, d) }'")
+
+    readTable[Locus, Variant](hc, entryPath(cacheDir, d), Variant.fromRow)
+  }
+
+  def locusTable(hc: HailContext, cacheDir: String, files: Seq[String], options: String*)
+    (parse: => (Type, OrderedRDD[Locus, Locus, Annotation])): (Type, OrderedRDD[Locus, Locus, Annotation]) = {
+    import LocusImplicits.orderedKey
+
+    val hConf = hc.hadoopConf
+    val d = digest(hConf, files, "loci" +: options: _*)
+
+    if (!hConf.exists(entryPath(cacheDir, d))) {
+      info(s"caching parsed table in `${ entryPath(cacheDir, d) }'")
+      val (signature, rdd) = parse
+      create(hConf, cacheDir, d) { tmp =>
+        writeTable[Locus, Locus](hc, tmp, signature, Locus.schema, _.toRow, rdd)
+      }
+    } else
+      info(s"reading parsed table from cache `${ entryPath(cacheDir, d) }'")
+
+    readTable[Locus, Locus](hc, entryPath(cacheDir, d), r => Locus(r.getString(0), r.getInt(1)))
+  }
+
+  /**
+    * Interval sources are small enough to load on the driver, so they are
+    * cached as a serialized object.
+    */
+  def intervals[T](hConf: hadoop.conf.Configuration, cacheDir: String, file: String, options: String*)(load: => T): T = {
+    val d = digest(hConf, Seq(file), options: _*)
+
+    if (!hConf.exists(entryPath(cacheDir, d))) {
+      info(s"caching parsed intervals in `${ entryPath(cacheDir, d) }'")
+      val t = load
+      create(hConf, cacheDir, d) { tmp =>
+        hConf.writeObjectFile(tmp)(_.writeObject(t))
+      }
+      t
+    } else {
+      info(s"reading parsed intervals from cache `${ entryPath(cacheDir, d) }'")
+      hConf.readObjectFile(entryPath(cacheDir, d))(_.readObject().asInstanceOf[T])
+    }
+  }
+}
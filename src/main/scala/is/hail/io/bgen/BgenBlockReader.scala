@@ -5,7 +5,7 @@ import java.util.zip.Inflater
 import is.hail.annotations._
 import is.hail.io._
 import is.hail.io.gen.GenReport._
-import is.hail.variant.{Genotype, GenotypeBuilder, GenotypeStreamBuilder, Variant}
+import is.hail.variant.{DosageGenotypeStreamBuilder, Genotype, Variant}
 import org.apache.hadoop.conf.Configuration
 import org.apache.hadoop.io.LongWritable
 import org.apache.hadoop.mapred.FileSplit
@@ -15,8 +15,7 @@ object BgenRecord {
 }
 
 class BgenRecord(compressed: Boolean,
-  gb: GenotypeBuilder,
-  gsb: GenotypeStreamBuilder,
+  dsb: DosageGenotypeStreamBuilder,
   nSamples: Int,
   tolerance: Double) extends KeySerializedValueRecord[Variant, Iterable[Genotype]] {
   var ann: Annotation = _
@@ -47,32 +46,27 @@ class BgenRecord(compressed: Boolean,
 
     resetWarnings()
 
-    gsb.clear()
+    dsb.clear()
     val bar = new ByteArrayReader(bytes)
 
     for (_ <- 0 until nSamples) {
-      gb.clear()
-
       val d0 = bar.readShort()
       val d1 = bar.readShort()
       val d2 = bar.readShort()
       val dosageSum = (d0 + d1 + d2) / BgenRecord.dosageDivisor
-      if (dosageSum == 0.0)
+      if (dosageSum == 0.0) {
         setWarning(dosageNoCall)
-      else if (1d - dosageSum > tolerance)
+        dsb.addMissing()
+      } else if (1d - dosageSum > tolerance) {
         setWarning(dosageLessThanTolerance)
-      else if (dosageSum - 1d > tolerance)
+        dsb.addMissing()
+      } else if (dosageSum - 1d > tolerance) {
         setWarning(dosageGreaterThanTolerance)
-      else {
-        val px = Genotype.weightsToLinear(d0, d1, d2)
-        val gt = Genotype.gtFromLinear(px)
-        gt.foreach(gb.setGT)
-        gb.setPX(px)
-      }
-
-      gsb.write(gb)
+        dsb.addMissing()
+      } else
+        dsb.add(Genotype.weightsToLinear(d0, d1, d2))
     }
-    gsb.result()
+    dsb.result()
   }
 }
 
@@ -85,12 +79,18 @@ class BgenBlockReader(job: Configuration, split: FileSplit) extends IndexedBinar
   val compressGS = job.getBoolean("compressGS", false)
   val tolerance = job.get("tolerance").toDouble
 
-  val gb = new GenotypeBuilder(2, isDosage = true)
-  val gsb = new GenotypeStreamBuilder(2, isDosage = true, compress = compressGS)
+  val dsb = new DosageGenotypeStreamBuilder(bState.nSamples, compress = compressGS)
+
+  // byte ranges of whole blocks; a plain FileSplit is read from its first block up to its end
+  val ranges: Array[(Long, Long)] = split match {
+    case s: BgenRangesSplit => s.ranges
+    case _ => Array((split.getStart, end))
+  }
+  var rangeIndex = 0
 
   seekToFirstBlockInSplit(split.getStart)
 
-  override def createValue(): BgenRecord = new BgenRecord(bState.compressed, gb, gsb, bState.nSamples, tolerance)
+  override def createValue(): BgenRecord = new BgenRecord(bState.compressed, dsb, bState.nSamples, tolerance)
 
   def seekToFirstBlockInSplit(start: Long) {
     pos = btree.queryIndex(start) match {
@@ -103,7 +103,13 @@ class BgenBlockReader(job: Configuration, split: FileSplit) extends IndexedBinar
   }
 
   def next(key: LongWritable, value: BgenRecord): Boolean = {
-    if (pos >= end)
+    while (pos >= ranges(rangeIndex)._2 && rangeIndex + 1 < ranges.length) {
+      rangeIndex += 1
+      pos = ranges(rangeIndex)._1
+      bfis.seek(pos)
+    }
+
+    if (pos >= ranges(rangeIndex)._2)
       false
     else {
       val nRow = bfis.readInt()
@@ -119,15 +125,7 @@ class BgenBlockReader(job: Configuration, split: FileSplit) extends IndexedBinar
       val ref = bfis.readLengthAndString(4)
       val alt = bfis.readLengthAndString(4)
 
-      val recodedChr = chr match {
-        case "23" => "X"
-        case "24" => "Y"
-        case "25" => "X"
-        case "26" => "MT"
-        case x => x
-      }
-
-      val variant = Variant(recodedChr, position, ref, alt)
+      val variant = Variant(BgenLoader.recodeChromosome(chr), position, ref, alt)
 
       val bytesInput = if (bState.compressed) {
         val compressedBytes = bfis.readInt()
@@ -1,10 +1,75 @@
 package is.hail.io.bgen
 
+import java.io.{DataInput, DataOutput}
+
 import is.hail.io.IndexedBinaryInputFormat
+import org.apache.hadoop.fs.Path
 import org.apache.hadoop.io.LongWritable
 import org.apache.hadoop.mapred._
 
+object BgenInputFormat {
+  // semicolon-separated splits, each a space-separated list of start,end byte ranges of variant blocks
+  val splitsKey = "hail.bgen.splits"
+
+  def encodeSplits(splits: Array[Array[(Long, Long)]]): String =
+    splits.map(_.map { case (start, end) => s"$start,$end" }.mkString(" ")).mkString(";")
+
+  def decodeSplits(s: String): Array[Array[(Long, Long)]] =
+    s.split(";")
+      .filter(_.nonEmpty)
+      .map(_.split(" ").map { r =>
+        val Array(start, end) = r.split(",").map(_.toLong)
+        (start, end)
+      })
+}
+
+/**
+  * A split of one or more byte ranges [start, end) of whole variant blocks,
+  * read in order. getStart and getLength span from the first range to the
+  * end of the last.
+  */
+class BgenRangesSplit(file: Path, private var _ranges: Array[(Long, Long)])
+  extends FileSplit(file,
+    if (_ranges.isEmpty) 0L else _ranges.head._1,
+    if (_ranges.isEmpty) 0L else _ranges.last._2 - _ranges.head._1,
+    Array.empty[String]) {
+
+  def this() = this(null, Array.empty)
+
+  def ranges: Array[(Long, Long)] = _ranges
+
+  override def write(out: DataOutput) {
+    super.write(out)
+    out.writeInt(_ranges.length)
+    _ranges.foreach { case (start, end) =>
+      out.writeLong(start)
+      out.writeLong(end)
+    }
+  }
+
+  override def readFields(in: DataInput) {
+    super.readFields(in)
+    _ranges = Array.fill(in.readInt()) {
+      val start = in.readLong()
+      (start, in.readLong())
+    }
+  }
+
+  override def toString: String = s"${ super.toString } in ${ _ranges.length } ranges"
+}
+
 class BgenInputFormat extends IndexedBinaryInputFormat[BgenRecord] {
+  override def getSplits(job: JobConf, numSplits: Int): Array[InputSplit] = {
+    val splits = job.get(BgenInputFormat.splitsKey)
+    if (splits == null)
+      super.getSplits(job, numSplits)
+    else {
+      val path = FileInputFormat.getInputPaths(job)(0)
+      BgenInputFormat.decodeSplits(splits)
+        .map(ranges => new BgenRangesSplit(path, ranges): InputSplit)
+    }
+  }
+
   override def getRecordReader(split: InputSplit, job: JobConf, reporter: Reporter): RecordReader[LongWritable,
     BgenRecord] = {
     reporter.setStatus(split.toString)
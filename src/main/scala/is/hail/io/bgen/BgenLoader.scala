@@ -8,6 +8,7 @@ import is.hail.io.gen.GenReport
 import is.hail.utils._
 import is.hail.variant._
 import org.apache.hadoop.io.LongWritable
+import org.apache.hadoop.mapred.{FileInputFormat, JobConf}
 import org.apache.spark.rdd.RDD
 
 import scala.collection.mutable
@@ -20,8 +21,17 @@ case class BgenResult(file: String, nSamples: Int, nVariants: Int, rdd: RDD[(Lon
 
 object BgenLoader {
 
+  def recodeChromosome(chr: String): String = chr match {
+    case "23" => "X"
+    case "24" => "Y"
+    case "25" => "X"
+    case "26" => "MT"
+    case x => x
+  }
+
   def load(hc: HailContext, files: Array[String], sampleFile: Option[String] = None,
-    tolerance: Double, compress: Boolean, nPartitions: Option[Int] = None): VariantDataset = {
+    tolerance: Double, compress: Boolean, nPartitions: Option[Int] = None,
+    intervals: Option[IntervalTree[Locus]] = None, variants: Option[Seq[Variant]] = None): VariantDataset = {
     require(files.nonEmpty)
     val samples = sampleFile.map(file => BgenLoader.readSampleFile(hc.hadoopConf, file))
       .getOrElse(BgenLoader.readSamples(hc.hadoopConf, files.head))
@@ -39,13 +49,34 @@ object BgenLoader {
     hc.hadoopConf.setDouble("tolerance", tolerance)
 
     val sc = hc.sc
+    val subset = intervals.isDefined || variants.isDefined
     val results = files.map { file =>
       val reportAcc = sc.accumulable[mutable.Map[Int, Int], Int](mutable.Map.empty[Int, Int])
       val bState = readState(sc.hadoopConfiguration, file)
       GenReport.accumulators ::= (file, reportAcc)
+
+      val jobConf = new JobConf(hc.hadoopConf)
+      FileInputFormat.setInputPaths(jobConf, file)
+      val minPartitions = nPartitions.getOrElse(sc.defaultMinPartitions)
+
+      BgenVariantIndex.read(hc.hadoopConf, file) match {
+        case Some(vIndex) =>
+          val nSplits = nPartitions.getOrElse(new BgenInputFormat().getSplits(jobConf, minPartitions).length)
+          val selected =
+            if (subset)
+              vIndex.select(intervals, variants)
+            else
+              Array.range(0, vIndex.nVariants)
+          if (subset)
+            info(s"$file: reading ${ selected.length } of ${ vIndex.nVariants } variant blocks")
+          jobConf.set(BgenInputFormat.splitsKey, BgenInputFormat.encodeSplits(vIndex.splits(selected, nSplits)))
+        case None =>
+          if (subset)
+            fatal(s"no variant index found for `$file', create with index_bgen to import a subset of variants")
+      }
+
       BgenResult(file, bState.nSamples, bState.nVariants,
-        sc.hadoopFile(file, classOf[BgenInputFormat], classOf[LongWritable], classOf[BgenRecord],
-          nPartitions.getOrElse(sc.defaultMinPartitions)))
+        sc.hadoopRDD(jobConf, classOf[BgenInputFormat], classOf[LongWritable], classOf[BgenRecord], minPartitions))
     }
 
     val unequalSamples = results.filter(_.nSamples != nSamples).map(x => (x.file, x.nSamples))
@@ -68,11 +99,15 @@ object BgenLoader {
 
     val signature = TStruct("rsid" -> TString, "varid" -> TString)
 
-    val fastKeys = sc.union(results.map(_.rdd.map(_._2.getKey)))
+    val variantSet = variants.map(_.toSet)
+    val keep: (Variant) => Boolean = v => variantSet.forall(_.contains(v))
+
+    val fastKeys = sc.union(results.map(_.rdd.map(_._2.getKey).filter(keep)))
 
-    val rdd = sc.union(results.map(_.rdd.map { case (_, decoder) =>
-      (decoder.getKey, (decoder.getAnnotation, decoder.getValue))
-    })).toOrderedRDD[Locus](fastKeys)
+    val rdd = sc.union(results.map(_.rdd.filter { case (_, decoder) => keep(decoder.getKey) }
+      .map { case (_, decoder) =>
+        (decoder.getKey, (decoder.getAnnotation, decoder.getValue))
+      })).toOrderedRDD[Locus](fastKeys)
 
     VariantSampleMatrix(hc, VariantMetadata(
       sampleIds = samples,
@@ -95,6 +130,10 @@ object BgenLoader {
 
     dataBlockStarts(0) = position
 
+    val contigs = mutable.LinkedHashMap.empty[String, Int]
+    val contigIndex = new Array[Int](bState.nVariants)
+    val positions = new Array[Int](bState.nVariants)
+
     hConf.readFile(file) { is =>
       val reader = new HadoopFSDataBinaryReader(is)
       reader.seek(0)
@@ -112,6 +151,8 @@ object BgenLoader {
         reader.readLengthAndString(4) // read an allele
         reader.readLengthAndString(4) // read an allele
 
+        contigIndex(i - 1) = contigs.getOrElseUpdate(recodeChromosome(chr), contigs.size)
+        positions(i - 1) = pos
 
         position = if (bState.compressed)
           reader.readInt() + reader.getPosition
@@ -124,6 +165,8 @@ object BgenLoader {
 
     IndexBTree.write(dataBlockStarts, indexFile, hConf)
 
+    BgenVariantIndex(contigs.keys.toArray, contigIndex, positions, dataBlockStarts)
+      .write(hConf, file)
   }
 
   def readSamples(hConf: org.apache.hadoop.conf.Configuration, file: String): Array[String] = {
@@ -0,0 +1,110 @@
+package is.hail.io.bgen
+
+import is.hail.utils._
+import is.hail.variant.{Locus, Variant}
+import org.apache.hadoop.conf.Configuration
+
+import scala.collection.mutable
+
+/**
+  * Locus and byte offset of every variant block in a BGEN file, written by
+  * index_bgen next to the B-tree index. offsets has one more entry than
+  * there are variants, the last being the end of the final block.
+  */
+case class BgenVariantIndex(contigs: Array[String], contigIndex: Array[Int], positions: Array[Int],
+  offsets: Array[Long]) {
+
+  def nVariants: Int = positions.length
+
+  def locus(i: Int): Locus = Locus(contigs(contigIndex(i)), positions(i))
+
+  def write(hConf: Configuration, file: String) {
+    hConf.writeDataFile(BgenVariantIndex.path(file)) { out =>
+      out.writeInt(BgenVariantIndex.version)
+      out.writeInt(contigs.length)
+      contigs.foreach(out.writeUTF)
+      out.writeInt(nVariants)
+      var i = 0
+      while (i < nVariants) {
+        out.writeInt(contigIndex(i))
+        out.writeInt(positions(i))
+        i += 1
+      }
+      offsets.foreach(out.writeLong)
+    }
+  }
+
+  /**
+    * Splits of at most ceil(nSelected / nSplits) selected variant blocks
+    * each, as byte ranges [start, end) of blocks. Each range covers a
+    * contiguous run of selected variants, so scattered selections give
+    * splits of several ranges. Unselected blocks are never part of a range.
+    */
+  def splits(selected: Array[Int], nSplits: Int): Array[Array[(Long, Long)]] = {
+    if (selected.isEmpty)
+      return Array.empty
+
+    val maxPerSplit = math.max(1, (selected.length + nSplits - 1) / nSplits)
+    val ab = new mutable.ArrayBuilder.ofRef[Array[(Long, Long)]]
+
+    selected.grouped(maxPerSplit).foreach { blocks =>
+      val ranges = new mutable.ArrayBuilder.ofRef[(Long, Long)]
+      var first = blocks(0)
+      var last = first
+      var i = 1
+      while (i < blocks.length) {
+        val next = blocks(i)
+        if (next != last + 1) {
+          ranges += ((offsets(first), offsets(last + 1)))
+          first = next
+        }
+        last = next
+        i += 1
+      }
+      ranges += ((offsets(first), offsets(last + 1)))
+      ab += ranges.result()
+    }
+
+    ab.result()
+  }
+
+  def select(intervals: Option[IntervalTree[Locus]], variants: Option[Seq[Variant]]): Array[Int] = {
+    val loci = variants.map(_.map(_.locus).toSet)
+    (0 until nVariants).filter { i =>
+      val l = locus(i)
+      intervals.forall(_.contains(l)) && loci.forall(_.contains(l))
+    }.toArray
+  }
+}
+
+object BgenVariantIndex {
+  val version = 1
+
+  def path(file: String): String = file + ".idx.loci"
+
+  def read(hConf: Configuration, file: String): Option[BgenVariantIndex] = {
+    val p = path(file)
+    if (!hConf.exists(p))
+      None
+    else
+      Some(hConf.readDataFile(p) { in =>
+        val v = in.readInt()
+        if (v != version)
+          fatal(s"unsupported BGEN variant index version $v in `$p', recreate with index_bgen")
+
+        val contigs = Array.fill(in.readInt())(in.readUTF())
+        val nVariants = in.readInt()
+        val contigIndex = new Array[Int](nVariants)
+        val positions = new Array[Int](nVariants)
+        var i = 0
+        while (i < nVariants) {
+          contigIndex(i) = in.readInt()
+          positions(i) = in.readInt()
+          i += 1
+        }
+        val offsets = Array.fill(nVariants + 1)(in.readLong())
+
+        BgenVariantIndex(contigs, contigIndex, positions, offsets)
+      })
+  }
+}
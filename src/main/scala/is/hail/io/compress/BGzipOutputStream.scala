@@ -37,6 +37,7 @@ class BGzipConstants {
 class BGzipOutputStream(out: OutputStream) extends CompressionOutputStream(out) {
   val constants = new BGzipConstants
   var numUncompressedBytes = 0
+  var numCompressedBytes = 0L // excludes the terminating empty block written by finish
   var uncompressedBuffer = new Array[Byte](constants.defaultUncompressedBlockSize)
   var compressedBuffer = new Array[Byte](constants.maxCompressedBlockSize - constants.blockHeaderLength)
 
@@ -94,10 +95,14 @@ class BGzipOutputStream(out: OutputStream) extends CompressionOutputStream(out)
     crc32.update(uncompressedBuffer, 0, numUncompressedBytes)
 
     val totalBlockSize: Int = writeGzipBlock(compressedSize, numUncompressedBytes, crc32.getValue)
+    numCompressedBytes += totalBlockSize
 
     numUncompressedBytes = 0 // reset variable
   }
 
+  // BGZF virtual offset of the next byte written
+  def virtualOffset: Long = (numCompressedBytes << 16) | numUncompressedBytes
+
   def writeInt8(i: Int) = {
     out.write(i & 0xff)
   }
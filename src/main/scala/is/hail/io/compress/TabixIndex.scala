@@ -0,0 +1,180 @@
+package is.hail.io.compress
+
+import java.io.OutputStream
+
+import scala.collection.mutable
+
+object TabixIndex {
+  val minShift = 14
+
+  // tabix preset for VCF: sequence in column 1, start in column 2, end derived from REF, '#' comments
+  val formatVCF = 2
+
+  // UCSC binning scheme over 0-based, half-open [beg, end), as in the SAM/tabix specification
+  def reg2bin(beg: Int, end: Int): Int = {
+    val e = end - 1
+    if (beg >> 14 == e >> 14)
+      ((1 << 15) - 1) / 7 + (beg >> 14)
+    else if (beg >> 17 == e >> 17)
+      ((1 << 12) - 1) / 7 + (beg >> 17)
+    else if (beg >> 20 == e >> 20)
+      ((1 << 9) - 1) / 7 + (beg >> 20)
+    else if (beg >> 23 == e >> 23)
+      ((1 << 6) - 1) / 7 + (beg >> 23)
+    else if (beg >> 26 == e >> 26)
+      ((1 << 3) - 1) / 7 + (beg >> 26)
+    else
+      0
+  }
+
+  private def writeInt32(out: OutputStream, i: Int) {
+    out.write(i & 0xff)
+    out.write((i >> 8) & 0xff)
+    out.write((i >> 16) & 0xff)
+    out.write((i >> 24) & 0xff)
+  }
+
+  private def writeInt64(out: OutputStream, l: Long) {
+    writeInt32(out, l.toInt)
+    writeInt32(out, (l >>> 32).toInt)
+  }
+}
+
+class TabixContigIndex extends Serializable {
+
+  import TabixIndex._
+
+  // bin => chunks of [start, end) virtual offsets, in file order
+  val bins = mutable.Map.empty[Int, mutable.ArrayBuffer[(Long, Long)]]
+
+  // 16kb window => smallest virtual offset of a record overlapping it, -1 if none
+  val linear = mutable.ArrayBuffer.empty[Long]
+
+  private def addChunk(bin: Int, start: Long, end: Long) {
+    val chunks = bins.getOrElseUpdate(bin, mutable.ArrayBuffer.empty[(Long, Long)])
+    if (chunks.nonEmpty && chunks.last._2 == start)
+      chunks(chunks.length - 1) = (chunks.last._1, end)
+    else
+      chunks += ((start, end))
+  }
+
+  private def updateLinear(w: Int, offset: Long) {
+    while (linear.length <= w)
+      linear += -1L
+    if (linear(w) == -1L || offset < linear(w))
+      linear(w) = offset
+  }
+
+  def add(beg: Int, end: Int, start: Long, stop: Long) {
+    addChunk(reg2bin(beg, end), start, stop)
+
+    var w = beg >> minShift
+    val lastW = (math.max(end, beg + 1) - 1) >> minShift
+    while (w <= lastW) {
+      updateLinear(w, start)
+      w += 1
+    }
+  }
+
+  def shift(delta: Long) {
+    bins.values.foreach { chunks =>
+      chunks.indices.foreach { i =>
+        val (start, end) = chunks(i)
+        chunks(i) = (start + delta, end + delta)
+      }
+    }
+    linear.indices.foreach { w =>
+      if (linear(w) != -1L)
+        linear(w) += delta
+    }
+  }
+
+  // other must follow this in the file
+  def merge(other: TabixContigIndex) {
+    other.bins.foreach { case (bin, chunks) =>
+      chunks.foreach { case (start, end) => addChunk(bin, start, end) }
+    }
+    other.linear.indices.foreach { w =>
+      if (other.linear(w) != -1L)
+        updateLinear(w, other.linear(w))
+    }
+  }
+
+  def write(out: OutputStream) {
+    writeInt32(out, bins.size)
+    bins.toArray.sortBy(_._1).foreach { case (bin, chunks) =>
+      writeInt32(out, bin)
+      writeInt32(out, chunks.length)
+      chunks.foreach { case (start, end) =>
+        writeInt64(out, start)
+        writeInt64(out, end)
+      }
+    }
+
+    // empty windows point at the preceding non-empty one
+    writeInt32(out, linear.length)
+    var last = 0L
+    linear.foreach { offset =>
+      if (offset != -1L)
+        last = offset
+      writeInt64(out, last)
+    }
+  }
+}
+
+/**
+  * Accumulates a tabix (.tbi) index for a BGZF-compressed VCF. Records are
+  * added with their BGZF virtual offsets. Indices built independently over
+  * BGZF files that are later concatenated can be shifted by each file's
+  * starting compressed offset and merged in file order.
+  */
+class TabixIndex extends Serializable {
+
+  import TabixIndex._
+
+  val contigs = mutable.LinkedHashMap.empty[String, TabixContigIndex]
+
+  /**
+    * @param beg 0-based start, inclusive
+    * @param end 0-based end, exclusive
+    * @param start virtual offset of the first byte of the record
+    * @param stop virtual offset just past the end of the record
+    */
+  def add(contig: String, beg: Int, end: Int, start: Long, stop: Long) {
+    contigs.getOrElseUpdate(contig, new TabixContigIndex).add(beg, end, start, stop)
+  }
+
+  def shift(compressedOffset: Long) {
+    contigs.values.foreach(_.shift(compressedOffset << 16))
+  }
+
+  def merge(other: TabixIndex) {
+    other.contigs.foreach { case (contig, ci) =>
+      contigs.get(contig) match {
+        case Some(ci2) => ci2.merge(ci)
+        case None => contigs += contig -> ci
+      }
+    }
+  }
+
+  // out should be a BGzipOutputStream, .tbi files are BGZF-compressed
+  def write(out: OutputStream) {
+    out.write(Array('T'.toByte, 'B'.toByte, 'I'.toByte, 1.toByte))
+    writeInt32(out, contigs.size)
+    writeInt32(out, formatVCF)
+    writeInt32(out, 1) // col_seq
+    writeInt32(out, 2) // col_beg
+    writeInt32(out, 0) // col_end
+    writeInt32(out, '#'.toInt) // meta
+    writeInt32(out, 0) // skip
+
+    val names = contigs.keys.map(_.getBytes("UTF-8")).toArray
+    writeInt32(out, names.map(_.length + 1).sum)
+    names.foreach { name =>
+      out.write(name)
+      out.write(0)
+    }
+
+    contigs.values.foreach(_.write(out))
+  }
+}
@@ -114,34 +114,25 @@ object GenLoader {
     if (dosages.length != (3 * nSamples))
       fatal("Number of dosages does not match number of samples. If no chromosome column is included, use -c to input the chromosome.")
 
-    val dosageArray = new Array[Int](3)
-    val gsb = new GenotypeStreamBuilder(2, isDosage = true, compress)
-    val gb = new GenotypeBuilder(2, isDosage = true)
+    val dsb = new DosageGenotypeStreamBuilder(nSamples, compress)
 
     for (i <- dosages.indices by 3) {
-      gb.clear()
-
       val d0 = dosages(i)
       val d1 = dosages(i + 1)
       val d2 = dosages(i + 2)
       val sumDosages = d0 + d1 + d2
-      if (sumDosages == 0.0)
+      if (sumDosages == 0.0) {
         reportAcc += GenReport.dosageNoCall
-      else if (math.abs(sumDosages - 1.0) > tolerance)
+        dsb.addMissing()
+      } else if (math.abs(sumDosages - 1.0) > tolerance) {
         reportAcc += GenReport.dosageLessThanTolerance
-      else {
-        val px = Genotype.weightsToLinear(d0, d1, d2)
-        val gt = Genotype.gtFromLinear(px)
-
-        gt.foreach(gt => gb.setGT(gt))
-        gb.setPX(px)
-      }
-
-      gsb.write(gb)
+        dsb.addMissing()
+      } else
+        dsb.add(Genotype.weightsToLinear(d0, d1, d2))
     }
 
     val annotations = Annotation(rsid, varid)
 
-    (variant, (annotations, gsb.result()))
+    (variant, (annotations, dsb.result()))
   }
 }
\ No newline at end of file
@@ -6,7 +6,12 @@ import scala.collection.mutable
 
 object ExportBedBimFam {
 
-  def makeBedRow(gs: Iterable[Genotype]): Array[Byte] = {
+  def makeBedRow(gs: Iterable[Genotype]): Array[Byte] = gs match {
+    case pgs: PackedGenotypeStream => pgs.a
+    case _ => encodeBedRow(gs)
+  }
+
+  private def encodeBedRow(gs: Iterable[Genotype]): Array[Byte] = {
     val ab = new mutable.ArrayBuilder.ofByte()
     var j = 0
     var b = 0
@@ -1,49 +1,53 @@
 package is.hail.io.plink
 
+import java.io.RandomAccessFile
+import java.nio.MappedByteBuffer
+import java.nio.channels.FileChannel
+
 import is.hail.io.{IndexedBinaryBlockReader, KeySerializedValueRecord}
-import is.hail.variant.{Genotype, GenotypeBuilder, GenotypeStreamBuilder}
+import is.hail.variant.{Genotype, PackedGenotypeStream}
 import org.apache.hadoop.conf.Configuration
+import org.apache.hadoop.fs.LocalFileSystem
 import org.apache.hadoop.io.LongWritable
 import org.apache.hadoop.mapred.FileSplit
 
-class PlinkRecord(nSamples: Int, gb: GenotypeBuilder, gsb: GenotypeStreamBuilder) extends KeySerializedValueRecord[Int, Iterable[Genotype]] {
+class PlinkRecord(nSamples: Int) extends KeySerializedValueRecord[Int, Iterable[Genotype]] {
   override def getValue: Iterable[Genotype] = {
     require(input != null, "called getValue before serialized value was set")
 
-    gsb.clear()
-
-    input
-      .iterator
-      .flatMap { i => Iterator(i & 3, (i >> 2) & 3, (i >> 4) & 3, (i >> 6) & 3) }
-      .take(nSamples)
-      .map(PlinkBlockReader.GT_CONVERSION)
-      .foreach { i =>
-        gb.clear()
-        if (i >= 0)
-          gb.setGT(i)
-        gsb.write(gb)
-      }
-    gsb.result()
+    new PackedGenotypeStream(nSamples, input)
   }
 }
 
-
-object PlinkBlockReader {
-  final val GT_CONVERSION = Array(2, -1, 1, 0)
-}
-
 class PlinkBlockReader(job: Configuration, split: FileSplit) extends IndexedBinaryBlockReader[PlinkRecord](job, split) {
   var variantIndex: Long = 0L
   val nSamples = job.getInt("nSamples", 0)
-  val compressGS = job.getBoolean("compressGS", false)
   val blockLength = (nSamples + 3) / 4
 
-  val gb = new GenotypeBuilder(2, isDosage = false)
-  val gsb = new GenotypeStreamBuilder(2, isDosage = false, compress = compressGS)
-
   seekToFirstBlockInSplit(split.getStart)
 
-  override def createValue(): PlinkRecord = new PlinkRecord(nSamples, gb, gsb)
+  // local .bed files are memory-mapped from the first block in the split
+  // through the end of the last
+  val mapped: Option[MappedByteBuffer] = split.getPath.getFileSystem(job) match {
+    case lfs: LocalFileSystem =>
+      val file = lfs.pathToFile(split.getPath)
+      val lastBlockEnd = math.min(
+        3 + math.max(0, (end - 3 + blockLength - 1) / blockLength) * blockLength,
+        file.length())
+      val length = lastBlockEnd - pos
+      if (length > 0 && length <= Int.MaxValue) {
+        val raf = new RandomAccessFile(file, "r")
+        try {
+          Some(raf.getChannel.map(FileChannel.MapMode.READ_ONLY, pos, length))
+        } finally {
+          raf.close()
+        }
+      } else
+        None
+    case _ => None
+  }
+
+  override def createValue(): PlinkRecord = new PlinkRecord(nSamples)
 
   def seekToFirstBlockInSplit(start: Long) {
     variantIndex = math.max(0, (start - 3 + blockLength - 1) / blockLength)
@@ -63,7 +67,14 @@ class PlinkBlockReader(job: Configuration, split: FileSplit) extends IndexedBina
     if (pos >= end)
       false
     else {
-      value.setSerializedValue(bfis.readBytes(blockLength))
+      val block = mapped match {
+        case Some(buf) =>
+          val b = new Array[Byte](blockLength)
+          buf.get(b)
+          b
+        case None => bfis.readBytes(blockLength)
+      }
+      value.setSerializedValue(block)
 
       assert(variantIndex >= 0 && variantIndex <= Integer.MAX_VALUE)
       value.setKey(variantIndex.toInt)
@@ -5,6 +5,26 @@ import org.apache.hadoop.io.LongWritable
 import org.apache.hadoop.mapred._
 
 class PlinkInputFormat extends IndexedBinaryInputFormat[PlinkRecord] {
+
+  // as many splits as FileInputFormat makes (by goal and block size), with
+  // boundaries moved to variant record edges so no reader seeks into a record
+  override def getSplits(job: JobConf, numSplits: Int): Array[InputSplit] = {
+    val fileSplits = super.getSplits(job, numSplits)
+    val blockLength = (job.getInt("nSamples", 0) + 3) / 4
+    if (blockLength == 0)
+      return fileSplits
+
+    val path = FileInputFormat.getInputPaths(job)(0)
+    val nVariants = (path.getFileSystem(job).getFileStatus(path).getLen - 3) / blockLength
+    val nSplits = math.max(1L, math.min(fileSplits.length.toLong, nVariants)).toInt
+
+    (0 until nSplits).map { i =>
+      val first = nVariants * i / nSplits
+      val last = nVariants * (i + 1) / nSplits
+      new FileSplit(path, 3 + first * blockLength, (last - first) * blockLength, Array.empty[String]): InputSplit
+    }.toArray
+  }
+
   override def getRecordReader(split: InputSplit, job: JobConf, reporter: Reporter): RecordReader[LongWritable,
     PlinkRecord] = {
     reporter.setStatus(split.toString)
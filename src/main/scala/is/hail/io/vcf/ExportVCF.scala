@@ -2,8 +2,12 @@ package is.hail.io.vcf
 
 import is.hail.annotations.{Annotation, Querier}
 import is.hail.expr.{Field, TArray, TBoolean, TChar, TDouble, TInt, TIterable, TSet, TString, TStruct, Type}
+import is.hail.io.compress.{BGzipCodec, BGzipOutputStream, TabixIndex}
 import is.hail.utils._
 import is.hail.variant.{Genotype, Variant, VariantDataset}
+import org.apache.hadoop
+import org.apache.hadoop.io.compress.CompressionCodecFactory
+import org.apache.spark.rdd.RDD
 import org.apache.spark.sql.Row
 
 import scala.io.Source
@@ -289,13 +293,94 @@ object ExportVCF {
       }
     }
 
-    vds.rdd.mapPartitions { it: Iterator[(Variant, (Annotation, Iterable[Genotype]))] =>
+    val lines = vds.rdd.mapPartitions { it: Iterator[(Variant, (Annotation, Iterable[Genotype]))] =>
       val sb = new StringBuilder
       it.map { case (v, (va, gs)) =>
         sb.clear()
         appendRow(sb, v, va, gs)
         sb.result()
       }
-    }.writeTable(path, vds.hc.tmpDir, Some(header), parallelWrite = parallel)
+    }
+
+    val codec = Option(new CompressionCodecFactory(vds.hc.hadoopConf).getCodec(new hadoop.fs.Path(path)))
+    if (!parallel && codec.exists(_.isInstanceOf[BGzipCodec]))
+      writeIndexedBGzip(lines, path, vds.hc.tmpDir, header)
+    else
+      lines.writeTable(path, vds.hc.tmpDir, Some(header), parallelWrite = parallel)
+  }
+
+  /**
+    * Writes header and lines to path as a single BGZF file together with a
+    * tabix index at path + ".tbi". Each partition is compressed to its own
+    * BGZF part while recording the virtual offsets of its records. The parts
+    * are then concatenated without recompression and the per-partition indices
+    * are shifted by the compressed offset of their part and merged.
+    */
+  def writeIndexedBGzip(lines: RDD[String], path: String, tmpDir: String, header: String) {
+    val sc = lines.sparkContext
+    val hConf = sc.hadoopConfiguration
+
+    hConf.delete(path, recursive = true) // overwriting by default
+    hConf.delete(path + ".tbi", recursive = false)
+
+    val partsDir = hConf.getTemporaryFile(tmpDir)
+    val sHConf = new SerializableHadoopConfiguration(hConf)
+
+    val nonEmpty =
+      if (lines.partitions.isEmpty)
+        sc.parallelize(Seq.empty[String], 1)
+      else
+        lines
+
+    val parts = nonEmpty.mapPartitionsWithIndex { case (i, it) =>
+      val partPath = partsDir + "/part-" + "%05d".format(i)
+      val hPath = new hadoop.fs.Path(partPath)
+      val out = new BGzipOutputStream(hPath.getFileSystem(sHConf.value).create(hPath))
+      val index = new TabixIndex
+
+      try {
+        if (i == 0)
+          out.write((header + "\n").getBytes("UTF-8"))
+
+        it.foreach { line =>
+          // CHROM, POS, ID, REF
+          val t1 = line.indexOf('\t')
+          val t2 = line.indexOf('\t', t1 + 1)
+          val t3 = line.indexOf('\t', t2 + 1)
+          val t4 = line.indexOf('\t', t3 + 1)
+          val contig = line.substring(0, t1)
+          val beg = line.substring(t1 + 1, t2).toInt - 1
+          val end = beg + (t4 - t3 - 1)
+
+          val start = out.virtualOffset
+          out.write((line + "\n").getBytes("UTF-8"))
+          index.add(contig, beg, end, start, out.virtualOffset)
+        }
+      } finally {
+        out.close()
+      }
+
+      Iterator((i, out.numCompressedBytes, index))
+    }.collect().sortBy(_._1)
+
+    hConf.writeTextFile(partsDir + "/_SUCCESS")(_ => ())
+
+    val index = new TabixIndex
+    var offset = 0L
+    parts.foreach { case (_, size, partIndex) =>
+      partIndex.shift(offset)
+      index.merge(partIndex)
+      offset += size
+    }
+
+    hConf.copyMerge(partsDir, path, deleteSource = true, hasHeader = false)
+
+    val indexPath = new hadoop.fs.Path(path + ".tbi")
+    val indexOut = new BGzipOutputStream(hConf.fileSystem(path + ".tbi").create(indexPath))
+    try {
+      index.write(indexOut)
+    } finally {
+      indexOut.close()
+    }
   }
 }
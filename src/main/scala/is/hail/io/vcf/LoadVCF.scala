@@ -97,7 +97,7 @@ object VCFReport {
 
 object LoadVCF {
 
-  def globAllVCFs(arguments: Array[String], hConf: hadoop.conf.Configuration, forcegz: Boolean = false): Array[String] = {
+  def globAllVCFs(arguments: Array[String], hConf: hadoop.conf.Configuration): Array[String] = {
     val inputs = hConf.globAll(arguments)
 
     if (inputs.isEmpty)
@@ -105,17 +105,81 @@ object LoadVCF {
 
     inputs.foreach { input =>
       if (!input.endsWith(".vcf")
-        && !input.endsWith(".vcf.bgz")) {
-        if (input.endsWith(".vcf.gz")) {
-          if (!forcegz)
-            fatal(".gz cannot be loaded in parallel, use .bgz or -f override")
-        } else
-          fatal(s"unknown input file type `$input', expect .vcf[.bgz]")
-      }
+        && !input.endsWith(".vcf.bgz")
+        && !input.endsWith(".vcf.gz"))
+        fatal(s"unknown input file type `$input', expect .vcf[.bgz|.gz]")
     }
     inputs
   }
 
+  /**
+    * Prepare `.gz' inputs for parallel loading.  Files that start with a
+    * BGZF block are loaded as BGZF.  Plain gzip files cannot be split: with
+    * `force', they are loaded serially, and with `checkpointBGZ', each is
+    * recompressed once to a BGZF copy `<input>.bgz' next to it, which later
+    * imports reuse while it is newer than the input.
+    *
+    * @return the files to load, and whether all `.gz' files among them are
+    *         BGZF, so the BGZF codec can be used for `.gz'
+    */
+  def resolveGzipInputs(inputs: Array[String], hConf: hadoop.conf.Configuration,
+    force: Boolean, forceBGZ: Boolean, checkpointBGZ: Boolean = false): (Array[String], Boolean) = {
+    val gzInputs = inputs.filter(_.endsWith(".gz"))
+
+    if (forceBGZ || gzInputs.isEmpty)
+      (inputs, forceBGZ)
+    else {
+      val plainGzip = gzInputs.filterNot(hConf.isBGzipFile).toSet
+
+      if (plainGzip.isEmpty)
+        (inputs, true)
+      else if (checkpointBGZ) {
+        val resolved = inputs.map(input => if (plainGzip.contains(input)) gzipToBGzip(input, hConf) else input)
+        (resolved, resolved.forall(input => !plainGzip.contains(input)))
+      } else if (force) {
+        warn(s"loading ${ plainGzip.size } plain gzip ${ plural(plainGzip.size, "file") } serially")
+        (inputs, false)
+      } else
+        fatal(".gz cannot be loaded in parallel, use .bgz, -f override, or checkpoint to BGZF")
+    }
+  }
+
+  def gzipToBGzip(input: String, hConf: hadoop.conf.Configuration): String = {
+    val output = input + ".bgz"
+
+    if (hConf.exists(output)
+      && hConf.fileStatus(output).getModificationTime >= hConf.fileStatus(input).getModificationTime) {
+      info(s"loading BGZF copy `$output' of plain gzip file `$input'")
+      output
+    } else {
+      info(s"recompressing plain gzip file `$input' to BGZF `$output' so it can be loaded in parallel")
+
+      val partial = input + ".partial.bgz"
+      try {
+        hConf.readFile(input) { is =>
+          hConf.writeDataFile(partial) { os =>
+            val buf = new Array[Byte](64 * 1024)
+            var n = is.read(buf)
+            while (n >= 0) {
+              os.write(buf, 0, n)
+              n = is.read(buf)
+            }
+          }
+        }
+        val fs = hConf.fileSystem(output)
+        fs.delete(new hadoop.fs.Path(output), false)
+        if (!fs.rename(new hadoop.fs.Path(partial), new hadoop.fs.Path(output)))
+          throw new java.io.IOException(s"could not rename `$partial' to `$output'")
+        output
+      } catch {
+        case e: java.io.IOException =>
+          warn(s"could not write BGZF copy of `$input', loading it serially: ${ e.getMessage }")
+          hConf.delete(partial, recursive = false)
+          input
+      }
+    }
+  }
+
   def lineRef(s: String): String = {
     var i = 0
     var t = 0
@@ -472,6 +472,38 @@ case class KeyTable(@transient hc: HailContext, @transient rdd: RDD[(Annotation,
       Annotation.flattenType(valueSignature).asInstanceOf[TStruct])
   }
 
+  def nPartitions: Int = rdd.partitions.length
+
+  private def runOnPartition(i: Int, f: Iterator[Annotation] => Array[Byte]): Array[Byte] = {
+    if (i < 0 || i >= nPartitions)
+      fatal(s"partition index $i out of range: KeyTable has $nPartitions partitions")
+
+    hc.sc.runJob(KeyTable.toSingleRDD(rdd, nKeys, nValues), f, Seq(i))(0)
+  }
+
+  def collectPartitionBinary(i: Int): Array[Byte] = {
+    val localSignature = signature
+    runOnPartition(i, it => BinaryAnnotationImpex.exportAnnotations(it.toIndexedSeq, localSignature))
+  }
+
+  def collectPartitionColumnsBinary(i: Int, columns: Array[String]): Array[Byte] = {
+    val indices = columns.map { name =>
+      signature.fieldOption(name) match {
+        case Some(f) => f.index
+        case None =>
+          fatal(
+            s"""Input field name `$name' not found in KeyTable.
+               |KeyTable field names are `${ fieldNames.mkString(", ") }'.""".stripMargin)
+      }
+    }
+
+    val localSignature = signature
+    runOnPartition(i, it => BinaryAnnotationImpex.exportColumns(it.toIndexedSeq, localSignature, indices))
+  }
+
+  def collectPartitionColumnsBinary(i: Int, columns: java.util.ArrayList[String]): Array[Byte] =
+    collectPartitionColumnsBinary(i, columns.asScala.toArray)
+
   def toDF(sqlContext: SQLContext): DataFrame = {
     val localSignature = signature
     sqlContext.createDataFrame(KeyTable.toSingleRDD(rdd, nKeys, nValues)
@@ -3,7 +3,7 @@ package is.hail.methods
 import is.hail.annotations.Annotation
 import is.hail.expr.{EvalContext, Parser, TVariant, Type}
 import is.hail.utils._
-import is.hail.variant.{Genotype, Variant, VariantDataset}
+import is.hail.variant.{Genotype, PackedGenotypeStream, Variant, VariantDataset}
 import org.apache.spark.rdd.RDD
 
 import scala.language.higherKinds
@@ -141,7 +141,12 @@ object IBD {
     val nSamples = vds.nSamples
 
     val chunkedGenotypeMatrix = vds.rdd
-      .map { case (v, (va, gs)) => gs.map(_.gt.map(IBSFFI.gtToCRep).getOrElse(IBSFFI.missingGTCRep)).toArray[Byte] }
+      .map { case (v, (va, gs)) =>
+        gs match {
+          case pgs: PackedGenotypeStream => pgs.ibsCRep
+          case _ => gs.map(_.gt.map(IBSFFI.gtToCRep).getOrElse(IBSFFI.missingGTCRep)).toArray[Byte]
+        }
+      }
       .zipWithIndex()
       .flatMap { case (gts, variantId) =>
         val vid = (variantId % chunkSize).toInt
@@ -37,7 +37,9 @@ object LinearMixedRegression {
     optDelta: Option[Double],
     sparsityThreshold: Double,
     forceBlock: Boolean,
-    forceGrammian: Boolean): VariantDataset = {
+    forceGrammian: Boolean,
+    kinshipCache: Option[String] = None,
+    rank: Option[Int] = None): VariantDataset = {
 
     if (!assocVds.wasSplit)
       fatal("lmmreg requires bi-allelic VDS for association. Run split_multi or filter_multi first")
@@ -75,23 +77,63 @@ object LinearMixedRegression {
     if (d < 1)
       fatal(s"$n samples and $k ${plural(k, "covariate")} including intercept implies $d degrees of freedom.")
 
+    rank.foreach { r =>
+      if (r < 1 || r >= n)
+        fatal(s"lmmreg: rank must lie in [1, ${ n - 1 }] for $n samples, got $r")
+    }
+
     info(s"lmmreg: running lmmreg on $n samples with $k sample ${plural(k, "covariate")} including intercept...")
 
-    info(s"lmmreg: Computing RRM for $n samples...")
+    def computeEig(): (DenseMatrix[Double], DenseVector[Double], Int) = rank match {
+      case Some(r) =>
+        info(s"lmmreg: Computing top $r eigenvectors of RRM for $n samples by randomized SVD...")
+
+        val (u, s, m) = ComputeLowRankRRM(filtKinshipVds, r)
 
-    val (rrm, m) = ComputeRRM(kinshipVds, useBlock)
+        info(s"lmmreg: RRM approximated using $m variants")
+        (u, s, m)
 
-    info(s"lmmreg: RRM computed using $m variants")
-    info(s"lmmreg: Computing eigenvectors of RRM...")
+      case None =>
+        info(s"lmmreg: Computing RRM for $n samples...")
 
-    val eigK = eigSymD(rrm)
-    val Ut = eigK.eigenvectors.t
-    val S = eigK.eigenvalues // increasing order
+        val (rrm, m) = ComputeRRM(filtKinshipVds, useBlock)
 
-    assert(S.length == n)
+        info(s"lmmreg: RRM computed using $m variants")
+        info(s"lmmreg: Computing eigenvectors of RRM...")
+
+        val eigK = eigSymD(rrm)
+        (eigK.eigenvectors, eigK.eigenvalues, m)
+    }
 
-    info("lmmreg: 20 largest evals: " + ((n - 1) to math.max(0, n - 20) by -1).map(S(_).formatted("%.5f")).mkString(", "))
-    info("lmmreg: 20 smallest evals: " + (0 until math.min(n, 20)).map(S(_).formatted("%.5f")).mkString(", "))
+    val (eigU, eigS, _) = kinshipCache match {
+      case Some(cacheDir) =>
+        KinshipCache(assocVds.hc.hadoopConf, cacheDir, filtKinshipVds, rank.map(r => s"rank=$r").toSeq: _*)(computeEig())
+      case None => computeEig()
+    }
+    val S = eigS // increasing order
+    val nEigs = S.length
+
+    assert(nEigs == rank.getOrElse(n))
+
+    info("lmmreg: 20 largest evals: " + ((nEigs - 1) to math.max(0, nEigs - 20) by -1).map(S(_).formatted("%.5f")).mkString(", "))
+    info("lmmreg: 20 smallest evals: " + (0 until math.min(nEigs, 20)).map(S(_).formatted("%.5f")).mkString(", "))
+
+    // A low-rank kinship has eigenvalue 0 on the complement of its
+    // eigenvectors. Any orthonormal basis of the complement diagonalizes it,
+    // so the rotation is completed with a basis of the residuals of the
+    // covariates and phenotype; the nOmitted remaining coordinates of C and
+    // y are 0 and only enter the model through their count.
+    val (Ut, rotS) =
+      if (nEigs == n)
+        (eigU.t, S)
+      else {
+        val Q = residualBasis(eigU, DenseMatrix.horzcat(cov, new DenseMatrix(n, 1, y.toArray)))
+        if (Q.cols < k + 1)
+          info(s"lmmreg: ${ k + 1 - Q.cols } of ${ k + 1 } covariate and phenotype residuals lie in the span of the top $nEigs eigenvectors")
+        (DenseMatrix.vertcat(eigU.t, Q.t), DenseVector.vertcat(S, DenseVector.zeros[Double](Q.cols)))
+      }
+    val nOmitted = n - Ut.rows
+    assert(nOmitted >= 0)
 
     optDelta match {
       case Some(_) => info(s"lmmreg: Delta specified by user")
@@ -101,7 +143,7 @@ object LinearMixedRegression {
     val UtC = Ut * cov
     val Uty = Ut * y
 
-    val diagLMM = DiagLMM(UtC, Uty, S, optDelta, useML)
+    val diagLMM = DiagLMM(UtC, Uty, rotS, optDelta, useML, nOmitted)
 
     val delta = diagLMM.delta
     val globalBetaMap = covNames.zip(diagLMM.globalB.toArray).toMap
@@ -110,7 +152,7 @@ object LinearMixedRegression {
     val h2 = globalSg2 / (globalSg2 + globalSe2)
 
     val header = "rank\teval"
-    val evalString = (0 until n).map(i => s"$i\t${ S(n - i - 1) }").mkString("\n")
+    val evalString = (0 until nEigs).map(i => s"$i\t${ S(nEigs - i - 1) }").mkString("\n")
     log.info(s"\nlmmreg: table of eigenvalues\n$header\n$evalString\n")
 
     info(s"lmmreg: global model fit: beta = $globalBetaMap")
@@ -128,7 +170,18 @@ object LinearMixedRegression {
     val sc = assocVds.sparkContext
     val TBc = sc.broadcast(T)
     val sampleMaskBc = sc.broadcast(sampleMask)
-    val scalerLMMBc = sc.broadcast(ScalerLMM(diagLMM.Ty, diagLMM.TyTy, Qt, QtTy, TyQtTy, diagLMM.logNullS2, useML))
+    val scalerLMMBc = sc.broadcast(ScalerLMM(diagLMM.Ty, diagLMM.TyTy, Qt, QtTy, TyQtTy, diagLMM.logNullS2, useML, n))
+    val sqrtInvDBc = sc.broadcast(diagLMM.sqrtInvD)
+
+    // squared norm of the part of the rotation of x on the omitted
+    // coordinates, from the norm of x and of its rotated coordinates Tx
+    def omittedXX(xx: Double, Tx: DenseVector[Double]): Double =
+      if (nOmitted == 0)
+        0d
+      else {
+        val Utx = Tx :/ sqrtInvDBc.value
+        (xx - (Utx dot Utx)) / delta
+      }
 
     val vds1 = assocVds.annotateGlobal(
       Annotation(useML, globalBetaMap, globalSg2, globalSe2, delta, h2, S.data.reverse: IndexedSeq[Double]),
@@ -149,30 +202,81 @@ object LinearMixedRegression {
     if (runAssoc) {
       val (newVAS, inserter) = vds2.insertVA(LinearMixedRegression.schema, pathVA)
 
-      vds2.mapAnnotations { case (v, va, gs) =>
-        val SparseGtVectorAndStats(x0, isConstant, af, nHomRef, nHet, nHomVar, nMissing) =
-          gs.iterator.zipWithIndex
-            .filter { case (g, i) => sampleMaskBc.value(i)}
-            .foldLeft(new SparseGtBuilder()){ case (b, (g, i)) => b.merge(g) }
-            .toSparseGtVector(n)
-
-        val lmmregAnnot =
-          if (!isConstant) {
-            val x: Vector[Double] = if (af <= sparsityThreshold) x0 else x0.toDenseVector
-            val (b, s2, chi2, p) = scalerLMMBc.value.likelihoodRatioTest(TBc.value * x)
-
-            Some(Annotation(b, s2, chi2, p, af, nHomRef, nHet, nHomVar, nMissing))
-          } else
-            None
-
-        val newAnnotation = inserter(va, lmmregAnnot)
-        assert(newVAS.typeCheck(newAnnotation))
-        newAnnotation
-      }.copy(vaSignature = newVAS)
+      // variants above the sparsity threshold are rotated a block at a time
+      val newRDD = vds2.rdd.mapPartitions({ it =>
+        RegressionUtils.mapGtBlocks(it, sampleMaskBc.value, n, gts => !gts.isConstant && gts.af > sparsityThreshold) { X =>
+          val TX = TBc.value * X
+          val omitted = DenseVector.tabulate(X.cols) { i =>
+            val x = X(::, i)
+            omittedXX(x dot x, TX(::, i))
+          }
+          scalerLMMBc.value.likelihoodRatioTest(TX, omitted)
+        }.map { case ((v, (va, gs)), gts, blockStats) =>
+          val lmmStats = blockStats.orElse {
+            if (!gts.isConstant) {
+              val x: Vector[Double] = gs.iterator.zipWithIndex
+                .filter { case (g, i) => sampleMaskBc.value(i) }
+                .foldLeft(new SparseGtBuilder()) { case (b, (g, i)) => b.merge(g) }
+                .toSparseGtVector(n)
+                .x
+              val Tx: DenseVector[Double] = TBc.value * x
+              Some(scalerLMMBc.value.likelihoodRatioTest(Tx, omittedXX(x dot x, Tx)))
+            } else
+              None
+          }
+
+          val lmmregAnnot = lmmStats.map { case (b, s2, chi2, p) =>
+            Annotation(b, s2, chi2, p, gts.af, gts.nHomRef, gts.nHet, gts.nHomVar, gts.nMissing)
+          }
+
+          val newAnnotation = inserter(va, lmmregAnnot)
+          assert(newVAS.typeCheck(newAnnotation))
+          (v, (newAnnotation, gs))
+        }
+      }, preservesPartitioning = true).asOrderedRDD
+
+      vds2.copy(rdd = newRDD, vaSignature = newVAS)
     }
     else
       vds2
   }
+
+  // relative norm below which a residual direction is taken to lie in the span of U
+  val residualTolerance = 1e-6
+
+  /**
+    * Orthonormal basis of the residuals of the columns of X after projecting
+    * out the orthonormal columns of U, with at most U.rows - U.cols columns.
+    * Columns of X are scaled to unit norm and the residuals' directions with
+    * singular value below residualTolerance are dropped, so columns of X in
+    * (or collinear modulo) the span of U add no rounding-noise columns.
+    */
+  def residualBasis(U: DenseMatrix[Double], X: DenseMatrix[Double]): DenseMatrix[Double] = {
+    val n = U.rows
+    val Xn = X.copy
+    var j = 0
+    while (j < Xn.cols) {
+      val nj = norm(Xn(::, j))
+      if (nj > 0)
+        Xn(::, j) :*= 1d / nj
+      j += 1
+    }
+
+    val R = Xn - U * (U.t * Xn)
+    // squared singular values of R, increasing
+    val eigR = eigSymD(R.t * R)
+    val keep = (0 until R.cols).reverse
+      .filter(i => eigR.eigenvalues(i) > residualTolerance * residualTolerance)
+      .take(n - U.cols)
+
+    if (keep.isEmpty)
+      DenseMatrix.zeros[Double](n, 0)
+    else {
+      // project out U once more, as small residual directions carry relatively large rounding error
+      val B = R * eigR.eigenvectors(::, keep).toDenseMatrix
+      qr.reduced.justQ(B - U * (U.t * B))
+    }
+  }
 }
 
 object DiagLMM {
@@ -181,17 +285,18 @@ object DiagLMM {
     y: DenseVector[Double],
     S: DenseVector[Double],
     optDelta: Option[Double] = None,
-    useML: Boolean = false): DiagLMM = {
+    useML: Boolean = false,
+    nOmitted: Int = 0): DiagLMM = {
 
     require(C.rows == y.length)
 
     val (delta, maxLogLkhd, gridLogLkhd) =
       optDelta match {
         case Some(d) => (d, None, None)
-        case None => fitDelta(C, y, S, useML)
+        case None => fitDelta(C, y, S, useML, nOmitted)
       }
 
-    val n = y.length
+    val n = y.length + nOmitted
     val sqrtInvD = sqrt(S + delta).map(1 / _)
     val TC = C(::, *) :* sqrtInvD
     val Ty = y :* sqrtInvD
@@ -204,9 +309,12 @@ object DiagLMM {
     DiagLMM(b, s2, math.log(s2), delta, maxLogLkhd, gridLogLkhd, sqrtInvD, TC, Ty, TyTy, useML)
   }
 
-  def fitDelta(C: DenseMatrix[Double], y: DenseVector[Double], S: DenseVector[Double], useML: Boolean): (Double, Option[Double], Option[IndexedSeq[(Double, Double)]]) = {
+  // nOmitted further rotated coordinates have eigenvalue 0 and C and y equal
+  // to 0 there, as for a low-rank kinship
+  def fitDelta(C: DenseMatrix[Double], y: DenseVector[Double], S: DenseVector[Double], useML: Boolean,
+    nOmitted: Int = 0): (Double, Option[Double], Option[IndexedSeq[(Double, Double)]]) = {
 
-    val n = y.length
+    val n = y.length + nOmitted
     val c = C.cols
 
     object LogLkhdML extends UnivariateFunction {
@@ -221,7 +329,7 @@ object DiagLMM {
         val b = CdC \ Cdy
         val r = ydy - (Cdy dot b)
 
-        -0.5 * (sum(breeze.numerics.log(D)) + n * math.log(r) + shift)
+        -0.5 * (sum(breeze.numerics.log(D)) + nOmitted * logDelta + n * math.log(r) + shift)
       }
     }
 
@@ -237,7 +345,7 @@ object DiagLMM {
         val b = CdC \ Cdy
         val r = ydy - (Cdy dot b)
 
-        -0.5 * (sum(breeze.numerics.log(D)) + (n - c) * math.log(r) + logdet(CdC)._2 + shift)
+        -0.5 * (sum(breeze.numerics.log(D)) + nOmitted * logDelta + (n - c) * math.log(r) + logdet(CdC)._2 + shift)
       }
     }
 
@@ -300,15 +408,32 @@ case class ScalerLMM(
   Qty: DenseVector[Double],
   yQty: Double,
   logNullS2: Double,
-  useML: Boolean) {
+  useML: Boolean,
+  n: Int) {
 
-  def likelihoodRatioTest(x: Vector[Double]): (Double, Double, Double, Double) = {
-
-    val n = y.length
+  // omittedXX is the squared norm of the rotated x on coordinates omitted
+  // from y, which are orthogonal to y and the covariates
+  def likelihoodRatioTest(x: Vector[Double], omittedXX: Double = 0d): (Double, Double, Double, Double) = {
     val Qtx = Qt * x
-    val xQtx: Double = (x dot x) - (Qtx dot Qtx)
+    val xQtx: Double = (x dot x) + omittedXX - (Qtx dot Qtx)
     val xQty: Double = (x dot y) - (Qtx dot Qty)
 
+    likelihoodRatioTest(xQtx, xQty)
+  }
+
+  // tests each column of X, projecting out covariates with one matrix product
+  def likelihoodRatioTest(X: DenseMatrix[Double], omittedXX: DenseVector[Double]): IndexedSeq[(Double, Double, Double, Double)] = {
+    val QtX = Qt * X
+    val XQty = X.t * y - QtX.t * Qty
+
+    (0 until X.cols).map { i =>
+      val x = X(::, i)
+      val Qtx = QtX(::, i)
+      likelihoodRatioTest((x dot x) + omittedXX(i) - (Qtx dot Qtx), XQty(i))
+    }
+  }
+
+  private def likelihoodRatioTest(xQtx: Double, xQty: Double): (Double, Double, Double, Double) = {
     val b: Double = xQty / xQtx
     val s2 = (yQty - xQty * b) / (if (useML) n else n - Qt.rows)
     val chi2 = n * (logNullS2 - math.log(s2))
@@ -52,30 +52,31 @@ object LinearRegression {
     val pathVA = Parser.parseAnnotationRoot(root, Annotation.VARIANT_HEAD)
     val (newVAS, inserter) = vds.insertVA(LinearRegression.`type`, pathVA)
 
-    vds.mapAnnotations{ case (v, va, gs) =>
-      val lrb = new LinRegBuilder(yBc.value)
-      gs.iterator.zipWithIndex.foreach { case (g, i) => if (sampleMaskBc.value(i)) lrb.merge(g) }
-
-      val linregAnnot = lrb.stats(yBc.value, n, combinedMinAC).map { stats =>
-        val (x, xx, xy) = stats
-
-        val qtx = QtBc.value * x
-        val qty = QtyBc.value
-        val xxp: Double = xx - (qtx dot qtx)
-        val xyp: Double = xy - (qtx dot qty)
+    val newRDD = vds.rdd.mapPartitions({ it =>
+      RegressionUtils.mapGtBlocks(it, sampleMaskBc.value, n, gts => gts.sumX >= combinedMinAC && !gts.isConstant) { X =>
+        val QtX = QtBc.value * X
+        val xyp = X.t * yBc.value - QtX.t * QtyBc.value
         val yyp: Double = yypBc.value
 
-        val b = xyp / xxp
-        val se = math.sqrt((yyp / xxp - b * b) / d)
-        val t = b / se
-        val p = 2 * tDistBc.value.cumulativeProbability(-math.abs(t))
-
-        Annotation(b, se, t, p)
+        (0 until X.cols).map { i =>
+          val x = X(::, i)
+          val qtx = QtX(::, i)
+          val xxp: Double = (x dot x) - (qtx dot qtx)
+
+          val b = xyp(i) / xxp
+          val se = math.sqrt((yyp / xxp - b * b) / d)
+          val t = b / se
+          val p = 2 * tDistBc.value.cumulativeProbability(-math.abs(t))
+
+          Annotation(b, se, t, p)
+        }
+      }.map { case ((v, (va, gs)), _, linregAnnot) =>
+        val newAnnotation = inserter(va, linregAnnot)
+        assert(newVAS.typeCheck(newAnnotation))
+        (v, (newAnnotation, gs))
       }
+    }, preservesPartitioning = true).asOrderedRDD
 
-      val newAnnotation = inserter(va, linregAnnot)
-      assert(newVAS.typeCheck(newAnnotation))
-      newAnnotation
-    }.copy(vaSignature = newVAS)
+    vds.copy(rdd = newRDD, vaSignature = newVAS)
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,95 @@
+package is.hail.methods
+
+import breeze.linalg._
+import breeze.numerics.sqrt
+import is.hail.annotations.Annotation
+import is.hail.expr._
+import is.hail.stats._
+import is.hail.utils._
+import is.hail.variant._
+import org.apache.commons.math3.distribution.TDistribution
+
+object LinearRegressionMultiPheno {
+  def `type`: Type = TStruct(
+    ("beta", TArray(TDouble)),
+    ("se", TArray(TDouble)),
+    ("tstat", TArray(TDouble)),
+    ("pval", TArray(TDouble)))
+
+  def apply(vds: VariantDataset, ySA: Array[String], covSA: Array[String], root: String, minAC: Int,
+    minAF: Double): VariantDataset = {
+
+    if (!vds.wasSplit)
+      fatal("linreg requires bi-allelic VDS. Run split_multi or filter_multi first")
+
+    if (ySA.isEmpty)
+      fatal("linreg requires at least one phenotype")
+
+    val (y, cov, completeSamples) = RegressionUtils.getPhenosCovCompleteSamples(vds, ySA, covSA)
+    val sampleMask = vds.sampleIds.map(completeSamples.toSet).toArray
+
+    val n = y.rows
+    val m = y.cols
+    val k = cov.cols
+    val d = n - k - 1
+
+    if (minAC < 1)
+      fatal(s"Minumum alternate allele count must be a positive integer, got $minAC")
+    if (minAF < 0d || minAF > 1d)
+      fatal(s"Minumum alternate allele frequency must lie in [0.0, 1.0], got $minAF")
+    val combinedMinAC = math.max(minAC, (math.ceil(2 * n * minAF) + 0.5).toInt)
+
+    if (d < 1)
+      fatal(s"$n samples and $k ${ plural(k, "covariate") } including intercept implies $d degrees of freedom.")
+
+    info(s"Running linreg on $m ${ plural(m, "phenotype") } and $n samples with $k ${ plural(k, "covariate") } including intercept...")
+
+    // covariates are projected out of all phenotypes once
+    val Qt = qr.reduced.justQ(cov).t
+    val QtY = Qt * y
+    val yyp = DenseVector.tabulate(m) { j =>
+      val yj = y(::, j)
+      val qtyj = QtY(::, j)
+      (yj dot yj) - (qtyj dot qtyj)
+    }
+
+    val sc = vds.sparkContext
+    val sampleMaskBc = sc.broadcast(sampleMask)
+    val yBc = sc.broadcast(y)
+    val QtBc = sc.broadcast(Qt)
+    val QtYBc = sc.broadcast(QtY)
+    val yypBc = sc.broadcast(yyp)
+    val tDistBc = sc.broadcast(new TDistribution(null, d.toDouble))
+
+    val pathVA = Parser.parseAnnotationRoot(root, Annotation.VARIANT_HEAD)
+    val (newVAS, inserter) = vds.insertVA(LinearRegressionMultiPheno.`type`, pathVA)
+
+    val newRDD = vds.rdd.mapPartitions({ it =>
+      RegressionUtils.mapGtBlocks(it, sampleMaskBc.value, n, gts => gts.sumX >= combinedMinAC && !gts.isConstant) { X =>
+        // one matrix product per block for all phenotypes
+        val QtX = QtBc.value * X
+        val xyp = X.t * yBc.value - QtX.t * QtYBc.value
+
+        (0 until X.cols).map { i =>
+          val xi = X(::, i)
+          val qtxi = QtX(::, i)
+          val xxp = (xi dot xi) - (qtxi dot qtxi)
+
+          val b = xyp(i, ::).t / xxp
+          val se = sqrt((yypBc.value / xxp - (b :* b)) / d.toDouble)
+          val t = b :/ se
+          val p = t.map(ti => 2 * tDistBc.value.cumulativeProbability(-math.abs(ti)))
+
+          Annotation(b.toArray: IndexedSeq[Double], se.toArray: IndexedSeq[Double], t.toArray: IndexedSeq[Double],
+            p.toArray: IndexedSeq[Double])
+        }
+      }.map { case ((v, (va, gs)), _, linregAnnot) =>
+        val newAnnotation = inserter(va, linregAnnot)
+        assert(newVAS.typeCheck(newAnnotation))
+        (v, (newAnnotation, gs))
+      }
+    }, preservesPartitioning = true).asOrderedRDD
+
+    vds.copy(rdd = newRDD, vaSignature = newVAS)
+  }
+}
@@ -3,7 +3,6 @@ package is.hail.methods
 import breeze.linalg._
 import is.hail.annotations.Annotation
 import is.hail.expr._
-import is.hail.stats.RegressionUtils._
 import is.hail.stats._
 import is.hail.utils._
 import is.hail.variant._
@@ -11,24 +10,32 @@ import org.apache.spark.rdd.RDD
 
 object LogisticRegression {
 
-  def apply(vds: VariantDataset, test: String, ySA: String, covSA: Array[String], root: String): VariantDataset = {
+  def apply(vds: VariantDataset, test: String, ySA: String, covSA: Array[String], root: String,
+    screenPval: Option[Double] = None): VariantDataset = {
 
     if (!vds.wasSplit)
       fatal("logreg requires bi-allelic VDS. Run split_multi or filter_multi first")
 
     def tests = Map("wald" -> WaldTest, "lrt" -> LikelihoodRatioTest, "score" -> ScoreTest, "firth" -> FirthTest)
 
+    if (!tests.isDefinedAt(test))
+      fatal(s"Supported tests are ${tests.keys.mkString(", ")}, got: $test")
+
     val logRegTest = tests(test)
 
+    screenPval.foreach { t =>
+      if (test == "score")
+        fatal("Score test screening applies only to the wald, lrt and firth tests")
+      if (t <= 0d || t > 1d)
+        fatal(s"Screening p-value threshold must lie in (0.0, 1.0], got $t")
+    }
+
     val (y, cov, completeSamples) = RegressionUtils.getPhenoCovCompleteSamples(vds, ySA, covSA)
     val sampleMask = vds.sampleIds.map(completeSamples.toSet).toArray
 
     if (! y.forall(yi => yi == 0d || yi == 1d))
       fatal(s"For logistic regression, phenotype must be Boolean or numeric with all values equal to 0 or 1")
 
-    if (!tests.isDefinedAt(test))
-      fatal(s"Supported tests are ${tests.keys.mkString(", ")}, got: $test")
-
     val n = y.size
     val k = cov.cols
     val d = n - k - 1
@@ -48,30 +55,49 @@ object LogisticRegression {
         else
          "Newton iteration failed to converge"))
 
+    // the null fit is computed once; Wald and LRT fits start from it, and
+    // Firth fits start from the penalized fit of the covariates alone
+    val startFit =
+      if (test == "firth") {
+        val nullFitFirth = nullModel.fitFirth(nullFit.b)
+        if (nullFitFirth.converged) nullFit.copy(b = nullFitFirth.b) else nullFit
+      } else
+        nullFit
+
     val sc = vds.sparkContext
     val sampleMaskBc = sc.broadcast(sampleMask)
     val yBc = sc.broadcast(y)
     val covBc = sc.broadcast(cov)
     val nullFitBc = sc.broadcast(nullFit)
+    val startFitBc = sc.broadcast(startFit)
     val logRegTestBc = sc.broadcast(logRegTest)
 
     val pathVA = Parser.parseAnnotationRoot(root, Annotation.VARIANT_HEAD)
     val (newVAS, inserter) = vds.insertVA(logRegTest.`type`, pathVA)
     val emptyStats = logRegTest.emptyStats
-
-    vds.mapAnnotations{ case (v, va, gs) =>
-      val maskedGts = gs.zipWithIndex.filter{ case (g, i) => sampleMaskBc.value(i) }.map(_._1.gt)
-
-      val logregAnnot =
-        buildGtColumn(maskedGts).map { gts =>
-          val X = DenseMatrix.horzcat(covBc.value, gts)
-          logRegTestBc.value.test(X, yBc.value, nullFitBc.value).toAnnotation(emptyStats)
+    // variants failing the score test screen have missing statistics and fit
+    val screenedAnnot = Annotation.fromSeq(emptyStats :+ null)
+
+    val newRDD = vds.rdd.mapPartitions({ it =>
+      // covariates with the genotype column last, refilled for each variant
+      val X = DenseMatrix.horzcat(covBc.value, DenseMatrix.zeros[Double](n, 1))
+
+      RegressionUtils.mapGtBlocks(it, sampleMaskBc.value, n, gts => !gts.isConstant) { G =>
+        (0 until G.cols).map { i =>
+          X(::, k) := G(::, i)
+          if (screenPval.forall(t => ScoreTest.test(X, yBc.value, nullFitBc.value).stats.forall(_.p <= t)))
+            logRegTestBc.value.test(X, yBc.value, startFitBc.value).toAnnotation(emptyStats)
+          else
+            screenedAnnot
         }
-
-      val newAnnotation = inserter(va, logregAnnot)
-      assert(newVAS.typeCheck(newAnnotation))
-      newAnnotation
-    }.copy(vaSignature = newVAS)
+      }.map { case ((v, (va, gs)), _, logregAnnot) =>
+        val newAnnotation = inserter(va, logregAnnot)
+        assert(newVAS.typeCheck(newAnnotation))
+        (v, (newAnnotation, gs))
+      }
+    }, preservesPartitioning = true).asOrderedRDD
+
+    vds.copy(rdd = newRDD, vaSignature = newVAS)
   }
 }
 
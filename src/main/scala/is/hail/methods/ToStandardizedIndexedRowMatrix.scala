@@ -1,7 +1,7 @@
 package is.hail.methods
 
 import is.hail.utils._
-import is.hail.variant.{Variant, VariantDataset}
+import is.hail.variant._
 import org.apache.spark.mllib.linalg.Vectors
 import org.apache.spark.mllib.linalg.distributed.{IndexedRow, IndexedRowMatrix}
 
@@ -15,11 +15,18 @@ object ToStandardizedIndexedRowMatrix {
     val standardized = vds
       .rdd
       .map { case (v, (va, gs)) =>
-        val (count, sum) = gs.foldLeft((0, 0)) { case ((c, s), g) =>
-          g.nNonRefAlleles match {
-            case Some(n) => (c + 1, s + n)
-            case None => (c, s)
+        // split, so the hard call is the number of non-ref alleles
+        val gts = gs.hardCallIterator.toArray
+
+        var count = 0
+        var sum = 0
+        var i = 0
+        while (i < gts.length) {
+          if (gts(i) >= 0) {
+            count += 1
+            sum += gts(i)
           }
+          i += 1
         }
 
         val p =
@@ -29,11 +36,16 @@ object ToStandardizedIndexedRowMatrix {
         val sdRecip =
           if (sum == 0 || sum == 2 * count) 0.0
           else 1.0 / math.sqrt(2 * p * (1 - p) * nVariants)
-        def standardize(c: Int): Double =
-          (c - mean) * sdRecip
 
-        IndexedRow(variantIdxBroadcast.value(v),
-          Vectors.dense(gs.iterator.map(_.nNonRefAlleles.map(standardize).getOrElse(0.0)).toArray))
+        val standardized = new Array[Double](gts.length)
+        i = 0
+        while (i < gts.length) {
+          if (gts(i) >= 0)
+            standardized(i) = (gts(i) - mean) * sdRecip
+          i += 1
+        }
+
+        IndexedRow(variantIdxBroadcast.value(v), Vectors.dense(standardized))
       }
 
     (variants, new IndexedRowMatrix(standardized.cache(), nVariants, nSamples))
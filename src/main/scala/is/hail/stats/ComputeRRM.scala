@@ -3,17 +3,21 @@ package is.hail.stats
 import breeze.linalg._
 import is.hail.utils._
 import is.hail.variant.VariantDataset
-import org.apache.spark.mllib.linalg.Vectors
+import org.apache.spark.mllib.linalg.{Vector, Vectors}
 import org.apache.spark.mllib.linalg.distributed.{IndexedRow, IndexedRowMatrix, RowMatrix}
+import org.apache.spark.rdd.RDD
+import org.apache.spark.storage.StorageLevel
 
 // each row has mean 0, norm sqrt(n), variance 1 (constant variants are dropped)
 object ToNormalizedRowMatrix {
-  def apply(vds: VariantDataset): RowMatrix = {
+  def apply(vds: VariantDataset): RowMatrix = fromRows(rows(vds), vds.nSamples)
+
+  def rows(vds: VariantDataset): RDD[Vector] = {
     val n = vds.nSamples
-    val rows = vds.rdd.flatMap { case (v, (va, gs)) => toNormalizedGtArray(gs, n) }.map(Vectors.dense)
-    val m = rows.count()
-    new RowMatrix(rows, m, n)
+    vds.rdd.flatMap { case (v, (va, gs)) => toNormalizedGtArray(gs, n) }.map(Vectors.dense)
   }
+
+  def fromRows(rows: RDD[Vector], n: Int): RowMatrix = new RowMatrix(rows, rows.count(), n)
 }
 
 // each row has mean 0, norm sqrt(n), variance 1, constant variants are dropped
@@ -58,3 +62,67 @@ object ComputeRRM {
     }
   }
 }
+
+/**
+  * Top k eigenvectors and (increasing) eigenvalues of the RRM by randomized
+  * subspace iteration (Halko, Martinsson and Tropp, 2011). The normalized
+  * genotypes are only multiplied by n x (k + oversampling) matrices, so the
+  * n x n RRM is never formed.
+  */
+object ComputeLowRankRRM {
+  def apply(vds: VariantDataset, k: Int, oversampling: Int = 10, nPowerIter: Int = 2,
+    seed: Int = 0): (DenseMatrix[Double], DenseVector[Double], Int) = {
+    // the power iterations pass over the rows several times
+    val rows = ToNormalizedRowMatrix.rows(vds).persist(StorageLevel.MEMORY_AND_DISK)
+    try {
+      apply(ToNormalizedRowMatrix.fromRows(rows, vds.nSamples), k, oversampling, nPowerIter, seed)
+    } finally {
+      rows.unpersist()
+    }
+  }
+
+  def apply(A: RowMatrix, k: Int, oversampling: Int, nPowerIter: Int,
+    seed: Int): (DenseMatrix[Double], DenseVector[Double], Int) = {
+    val n = A.numCols().toInt
+    val m = A.numRows().toInt
+    require(k > 0 && k < n)
+
+    val l = math.min(n, k + oversampling)
+    val rand = new scala.util.Random(seed)
+
+    var Q = qr.reduced.justQ(DenseMatrix.fill(n, l)(rand.nextGaussian()))
+    var i = 0
+    while (i < nPowerIter) {
+      Q = qr.reduced.justQ(gramianTimes(A, Q))
+      i += 1
+    }
+
+    val B = Q.t * gramianTimes(A, Q)
+    val eigB = eigSymD((B + B.t) :* 0.5)
+
+    val U = Q * eigB.eigenvectors(::, l - k until l)
+    val S = eigB.eigenvalues(l - k until l) :* (1d / m)
+
+    (U, S, m)
+  }
+
+  // A^T * A * Q, with blocks of rows of A multiplied on the workers
+  def gramianTimes(A: RowMatrix, Q: DenseMatrix[Double]): DenseMatrix[Double] = {
+    val n = Q.rows
+    val l = Q.cols
+    val QBc = A.rows.sparkContext.broadcast(Q)
+    val blockSize = RegressionUtils.gtBlockSize(n)
+
+    val Z = A.rows.mapPartitions { it =>
+      val Z = DenseMatrix.zeros[Double](n, l)
+      it.grouped(blockSize).foreach { rows =>
+        val At = new DenseMatrix(n, rows.length, Array.concat(rows.map(_.toArray): _*))
+        Z += At * (At.t * QBc.value)
+      }
+      Iterator(Z)
+    }.treeReduce(_ += _)
+
+    QBc.unpersist()
+    Z
+  }
+}
@@ -0,0 +1,148 @@
+package is.hail.stats
+
+import java.io.{DataInputStream, DataOutputStream}
+import java.nio.ByteBuffer
+import java.security.MessageDigest
+
+import breeze.linalg.{DenseMatrix, DenseVector}
+import is.hail.utils._
+import is.hail.variant._
+import org.apache.hadoop
+
+import scala.util.hashing.MurmurHash3
+
+/**
+  * Eigendecompositions of the RRM stored under a user-chosen cache
+  * directory, so that lmmreg runs with the same kinship variants and
+  * samples, such as runs on different phenotypes, skip computing the RRM
+  * and its eigendecomposition. Entries are keyed by the sample IDs and a
+  * fingerprint of the kinship variants and their hard calls.
+  */
+object KinshipCache {
+  val version = 2
+
+  /**
+    * Number of variants and the sum of a 64-bit hash of each variant and
+    * its hard calls, which does not depend on partitioning.
+    */
+  def fingerprint(vds: VariantDataset): (Long, Long) = {
+    vds.rdd.map { case (v, (va, gs)) =>
+      val vh = v.hashCode
+      var h1 = MurmurHash3.mix(0x6b696e31, vh)
+      var h2 = MurmurHash3.mix(0x6b696e32, vh)
+      val it = gs.hardCallIterator
+      var i = 0
+      while (it.hasNext) {
+        val gt = it.nextInt()
+        h1 = MurmurHash3.mix(h1, gt)
+        h2 = MurmurHash3.mix(h2, gt)
+        i += 1
+      }
+      (1L, (MurmurHash3.finalizeHash(h1, i).toLong << 32) | (MurmurHash3.finalizeHash(h2, i) & 0xffffffffL))
+    }.fold((0L, 0L)) { case ((n1, s1), (n2, s2)) => (n1 + n2, s1 + s2) }
+  }
+
+  def digest(vds: VariantDataset, options: String*): String = {
+    val md = MessageDigest.getInstance("SHA-1")
+
+    def update(s: String) {
+      md.update(s.getBytes("UTF-8"))
+      md.update(0.toByte)
+    }
+
+    update(version.toString)
+    vds.sampleIds.foreach(update)
+    val (nVariants, sumHash) = fingerprint(vds)
+    update(nVariants.toString)
+    update(sumHash.toString)
+    options.foreach(update)
+
+    md.digest().map("%02x".format(_)).mkString
+  }
+
+  // doubles per bulk transfer; ByteBuffer is big-endian, like DataOutput.writeDouble
+  private val chunkSize = 1 << 16
+
+  private def writeDoubles(out: DataOutputStream, a: Array[Double]) {
+    val buf = ByteBuffer.allocate(8 * math.min(chunkSize, a.length))
+    var i = 0
+    while (i < a.length) {
+      val n = math.min(chunkSize, a.length - i)
+      buf.clear()
+      buf.asDoubleBuffer().put(a, i, n)
+      out.write(buf.array(), 0, 8 * n)
+      i += n
+    }
+  }
+
+  private def readDoubles(in: DataInputStream, n: Int): Array[Double] = {
+    val a = new Array[Double](n)
+    val buf = ByteBuffer.allocate(8 * math.min(chunkSize, n))
+    var i = 0
+    while (i < n) {
+      val m = math.min(chunkSize, n - i)
+      in.readFully(buf.array(), 0, 8 * m)
+      buf.clear()
+      buf.asDoubleBuffer().get(a, i, m)
+      i += m
+    }
+    a
+  }
+
+  private def write(hConf: hadoop.conf.Configuration, file: String, U: DenseMatrix[Double], S: DenseVector[Double],
+    m: Int) {
+    hConf.writeDataFile(file) { out =>
+      out.writeInt(version)
+      out.writeInt(m)
+      out.writeInt(U.rows)
+      out.writeInt(S.length)
+      writeDoubles(out, S.toArray)
+      writeDoubles(out, U.toArray)
+    }
+  }
+
+  private def read(hConf: hadoop.conf.Configuration, file: String): (DenseMatrix[Double], DenseVector[Double], Int) = {
+    hConf.readDataFile(file) { in =>
+      val v = in.readInt()
+      if (v != version)
+        fatal(s"unsupported kinship cache version $v in `$file'")
+
+      val m = in.readInt()
+      val n = in.readInt()
+      val k = in.readInt()
+      val S = DenseVector(readDoubles(in, k))
+      val U = new DenseMatrix(n, k, readDoubles(in, n * k))
+      (U, S, m)
+    }
+  }
+
+  /**
+    * Eigenvectors U, increasing eigenvalues S and number of variants of the
+    * RRM of vds, computed by compute if not already cached in cacheDir.
+    * Options distinguish decompositions of the same RRM, such as low-rank
+    * approximations.
+    */
+  def apply(hConf: hadoop.conf.Configuration, cacheDir: String, vds: VariantDataset, options: String*)
+    (compute: => (DenseMatrix[Double], DenseVector[Double], Int)): (DenseMatrix[Double], DenseVector[Double], Int) = {
+    val file = cacheDir + "/" + digest(vds, options: _*) + ".eig"
+
+    if (hConf.exists(file)) {
+      info(s"lmmreg: Reading eigendecomposition of RRM from cache `$file'")
+      read(hConf, file)
+    } else {
+      val result@(U, S, m) = compute
+
+      info(s"lmmreg: Caching eigendecomposition of RRM in `$file'")
+      hConf.mkDir(cacheDir)
+      // written to a temporary file and renamed into place, so an existing
+      // entry is always complete
+      val tmp = hConf.getTemporaryFile(cacheDir)
+      write(hConf, tmp, U, S, m)
+      val fs = hConf.fileSystem(cacheDir)
+      if (!fs.rename(new hadoop.fs.Path(tmp), new hadoop.fs.Path(file)))
+        hConf.delete(tmp, recursive = false)
+
+      result
+    }
+  }
+}
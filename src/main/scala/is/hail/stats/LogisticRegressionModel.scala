@@ -162,7 +162,7 @@ object ScoreTest extends LogisticRegressionTest {
         val X1 = X(::, r1)
 
         b(r0) := nullFit.b
-        val mu = sigmoid(X * b)
+        val mu = nullFit.mu.getOrElse(sigmoid(X * b))
         score(r0) := nullFit.score.get
         score(r1) := X1.t * (y - mu)
         fisher(r0, r0) := nullFit.fisher.get
@@ -235,7 +235,8 @@ class LogisticRegressionModel(X: DenseMatrix[Double], y: DenseVector[Double]) {
         val X1 = X(::, r1)
 
         b(r0) := nullFit.b
-        mu := sigmoid(X * b)
+        // the genotype coefficients start at 0, so mu starts at the null fit's
+        mu := nullFit.mu.getOrElse(sigmoid(X * b))
         score(r0) := nullFit.score.get
         score(r1) := X1.t * (y - mu)
         fisher(r0, r0) := nullFit.fisher.get
@@ -271,7 +272,7 @@ class LogisticRegressionModel(X: DenseMatrix[Double], y: DenseVector[Double]) {
 
     val logLkhd = sum(breeze.numerics.log((y :* mu) + ((1d - y) :* (1d - mu))))
 
-    LogisticRegressionFit(b, Some(score), Some(fisher), logLkhd, iter, converged, exploded)
+    LogisticRegressionFit(b, Some(score), Some(fisher), logLkhd, iter, converged, exploded, Some(mu))
   }
 
   def fitFirth(b0: DenseVector[Double], maxIter: Int = 100, tol: Double = 1E-6): LogisticRegressionFit = {
@@ -323,7 +324,8 @@ case class LogisticRegressionFit(
   logLkhd: Double,
   nIter: Int,
   converged: Boolean,
-  exploded: Boolean) {
+  exploded: Boolean,
+  mu: Option[DenseVector[Double]] = None) {
 
   def toAnnotation: Annotation = Annotation(nIter, converged, exploded)
 }
@@ -1,9 +1,10 @@
 package is.hail.stats
 
 import breeze.linalg.{DenseMatrix, DenseVector, SparseVector}
+import is.hail.annotations.Annotation
 import is.hail.expr._
 import is.hail.utils._
-import is.hail.variant.{Genotype, VariantDataset}
+import is.hail.variant._
 
 import scala.collection.mutable
 
@@ -22,17 +23,27 @@ object RegressionUtils {
     ySA: String,
     covSA: Array[String]): (DenseVector[Double], DenseMatrix[Double], IndexedSeq[String]) = {
 
+    val (y, cov, completeSamples) = getPhenosCovCompleteSamples(vds, Array(ySA), covSA)
+    (y(::, 0), cov, completeSamples)
+  }
+
+  // samples are complete if all phenotypes and all covariates are defined
+  def getPhenosCovCompleteSamples(
+    vds: VariantDataset,
+    ySA: Array[String],
+    covSA: Array[String]): (DenseMatrix[Double], DenseMatrix[Double], IndexedSeq[String]) = {
+
     val symTab = Map(
       "s" -> (0, TSample),
       "sa" -> (1, vds.saSignature))
 
     val ec = EvalContext(symTab)
 
-    val (yT, yQ) = Parser.parseExpr(ySA, ec)
-    val yToDouble = toDouble(yT, ySA)
+    val (yT, yQ) = Parser.parseExprs(ySA.mkString(","), ec)
+    val yToDouble = (yT, ySA).zipped.map(toDouble)
     val yIS = vds.sampleIdsAndAnnotations.map { case (s, sa) =>
       ec.setAll(s, sa)
-      yQ().map(yToDouble)
+      (yQ(), yToDouble).zipped.map(_.map(_))
     }
 
     val (covT, covQ) = Parser.parseExprs(covSA.mkString(","), ec)
@@ -45,16 +56,29 @@ object RegressionUtils {
     val (yForCompleteSamples, covForCompleteSamples, completeSamples) =
       (yIS, covIS, vds.sampleIds)
         .zipped
-        .filter((y, c, s) => y.isDefined && c.forall(_.isDefined))
+        .filter((y, c, s) => y.forall(_.isDefined) && c.forall(_.isDefined))
 
     val n = completeSamples.size
     if (n == 0)
       fatal("No complete samples: each sample is missing its phenotype or some covariate")
 
-    val yArray = yForCompleteSamples.map(_.get).toArray
-    if (yArray.toSet.size == 1)
-      fatal(s"Constant phenotype: all complete samples have phenotype ${yArray(0)}")
-    val y = DenseVector(yArray)
+    val m = yT.size
+    val y = new DenseMatrix(
+      rows = n,
+      cols = m,
+      data = yForCompleteSamples.flatMap(_.map(_.get)).toArray,
+      offset = 0,
+      majorStride = m,
+      isTranspose = true)
+
+    (0 until m).foreach { j =>
+      val yj = y(::, j)
+      if (yj.forall(_ == yj(0)))
+        if (m == 1)
+          fatal(s"Constant phenotype: all complete samples have phenotype ${ yj(0) }")
+        else
+          fatal(s"Constant phenotype `${ ySA(j) }': all complete samples have phenotype ${ yj(0) }")
+    }
 
     val k = covT.size
     val covArray = covForCompleteSamples.flatMap(1.0 +: _.map(_.get)).toArray
@@ -66,21 +90,122 @@ object RegressionUtils {
           majorStride = 1 + k,
           isTranspose = true)
 
-    (y, cov, completeSamples)
+    (y.copy, cov, completeSamples)
+  }
+
+  // bound on the doubles in a block of mean-imputed genotypes
+  val maxGtBlockEntries: Int = 1 << 22
+
+  val maxGtBlockSize = 128
+
+  def gtBlockSize(n: Int): Int = math.max(1, math.min(maxGtBlockSize, maxGtBlockEntries / n))
+
+  /**
+    * Groups the variants of a partition into blocks and passes f the
+    * column-major matrix of mean-imputed hard calls of the masked samples
+    * for those variants of each block whose stats satisfy keep. f returns
+    * one result per column, which is paired with its variant; other
+    * variants are paired with None.
+    */
+  def mapGtBlocks[T](it: Iterator[(Variant, (Annotation, Iterable[Genotype]))], mask: Array[Boolean], n: Int,
+    keep: GtStats => Boolean)
+    (f: DenseMatrix[Double] => IndexedSeq[T]): Iterator[((Variant, (Annotation, Iterable[Genotype])), GtStats, Option[T])] = {
+    val blockSize = gtBlockSize(n)
+    val builder = new GtBlockBuilder(mask, n, blockSize)
+
+    it.grouped(blockSize).flatMap { block =>
+      builder.clear()
+      val stats = block.map { case (_, (_, gs)) => builder.add(gs.hardCallIterator, keep) }
+      val results = if (builder.nCols > 0) f(builder.result()) else IndexedSeq.empty[T]
+      assert(results.length == builder.nCols)
+
+      var j = 0
+      block.iterator.zip(stats.iterator).map { case (x, s) =>
+        val r = if (keep(s)) {
+          j += 1
+          Some(results(j - 1))
+        } else
+          None
+        (x, s, r)
+      }
+    }
   }
+}
+
+case class GtStats(nHomRef: Int, nHet: Int, nHomVar: Int, nMissing: Int) {
+  def nPresent: Int = nHomRef + nHet + nHomVar
+
+  def sumX: Int = nHet + 2 * nHomVar
+
+  def meanX: Double = if (nPresent > 0) sumX.toDouble / nPresent else Double.NaN
+
+  def af: Double = meanX / 2
+
+  // includes the case of no called genotypes
+  def isConstant: Boolean = nHomRef == nPresent || nHet == nPresent || nHomVar == nPresent
+}
+
+// fills the columns of a column-major n x maxCols matrix with hard calls of
+// the masked samples, missing calls mean-imputed; the buffer is reused
+// across blocks, so a result is only valid until the next clear
+class GtBlockBuilder(mask: Array[Boolean], n: Int, maxCols: Int) {
+  private val data = new Array[Double](n * maxCols)
+  private val missingRows = new Array[Int](n)
+  private var cols = 0
 
-  def buildGtColumn(gts: Iterable[Option[Int]]): Option[DenseMatrix[Double]] = {
-    val (nCalled, gtSum, allHet) = gts.flatten.foldLeft((0, 0, true))((acc, gt) => (acc._1 + 1, acc._2 + gt, acc._3 && (gt == 1) ))
+  def nCols: Int = cols
 
-    // allHomRef || allHet || allHomVar || allNoCall
-    if (gtSum == 0 || allHet || gtSum == 2 * nCalled || nCalled == 0 )
-      None
-    else {
-      val gtMean = gtSum.toDouble / nCalled
-      val gtArray = gts.map(_.map(_.toDouble).getOrElse(gtMean)).toArray
-      Some(new DenseMatrix(gtArray.length, 1, gtArray))
+  def clear() {
+    cols = 0
+  }
+
+  // writes gts to the next column, keeping it if keep(stats)
+  def add(gts: IntIterator, keep: GtStats => Boolean): GtStats = {
+    require(cols < maxCols)
+
+    val off = cols * n
+    var nHet = 0
+    var nHomVar = 0
+    var nMissing = 0
+    var i = 0
+    var row = 0
+    while (gts.hasNext) {
+      val gt = gts.nextInt()
+      if (mask(i)) {
+        (gt: @unchecked) match {
+          case 0 =>
+            data(off + row) = 0d
+          case 1 =>
+            data(off + row) = 1d
+            nHet += 1
+          case 2 =>
+            data(off + row) = 2d
+            nHomVar += 1
+          case -1 =>
+            missingRows(nMissing) = row
+            nMissing += 1
+        }
+        row += 1
+      }
+      i += 1
+    }
+    assert(row == n)
+
+    val stats = GtStats(n - nHet - nHomVar - nMissing, nHet, nHomVar, nMissing)
+    if (keep(stats)) {
+      val meanX = stats.meanX
+      i = 0
+      while (i < nMissing) {
+        data(off + missingRows(i)) = meanX
+        i += 1
+      }
+      cols += 1
     }
+
+    stats
   }
+
+  def result(): DenseMatrix[Double] = new DenseMatrix(n, cols, data)
 }
 
 
@@ -134,7 +259,7 @@ class SparseGtBuilder extends Serializable {
 
     var i = 0
     while (i < missingRowIndicesArray.length) {
-      valsXArray(i) = meanX
+      valsXArray(missingRowIndicesArray(i)) = meanX
       i += 1
     }
 
@@ -144,74 +269,3 @@ class SparseGtBuilder extends Serializable {
 
 case class SparseGtVectorAndStats(x: SparseVector[Double], isConstant: Boolean, af: Double, nHomRef: Int, nHet: Int, nHomVar: Int, nMissing: Int)
 
-
-// constructs SparseVector of genotype calls (with missing values mean-imputed) in parallel with other statistics sufficient for linear regression
-class LinRegBuilder(y: DenseVector[Double]) extends Serializable {
-  private val missingRowIndices = new mutable.ArrayBuilder.ofInt()
-  private val rowsX = new mutable.ArrayBuilder.ofInt()
-  private val valsX = new mutable.ArrayBuilder.ofDouble()
-  private var row = 0
-  private var sparseLength = 0 // length of rowsX and valsX (ArrayBuilder has no length), used to track missingRowIndices
-  private var sumX = 0
-  private var sumXX = 0
-  private var sumXY = 0.0
-  private var sumYMissing = 0.0
-
-  def merge(g: Genotype): LinRegBuilder = {
-    (g.unboxedGT: @unchecked) match {
-      case 0 =>
-      case 1 =>
-        rowsX += row
-        valsX += 1d
-        sparseLength += 1
-        sumX += 1
-        sumXX += 1
-        sumXY += y(row)
-      case 2 =>
-        rowsX += row
-        valsX += 2d
-        sparseLength += 1
-        sumX += 2
-        sumXX += 4
-        sumXY += 2 * y(row)
-      case -1 =>
-        missingRowIndices += sparseLength
-        rowsX += row
-        valsX += 0d // placeholder for meanX
-        sparseLength += 1
-        sumYMissing += y(row)
-    }
-    row += 1
-
-    this
-  }
-
-  def stats(y: DenseVector[Double], n: Int, minAC: Int): Option[(SparseVector[Double], Double, Double)] = {
-    require(minAC > 0)
-
-    val missingRowIndicesArray = missingRowIndices.result()
-    val nMissing = missingRowIndicesArray.size
-    val nPresent = n - nMissing
-    val allHet = sumX == nPresent && sumXX == nPresent
-    val allHomVar = sumX == 2 * nPresent
-
-    if (sumX < minAC || allHomVar || allHet)
-      None
-    else {
-      val rowsXArray = rowsX.result()
-      val valsXArray = valsX.result()
-      val meanX = sumX.toDouble / nPresent
-
-      missingRowIndicesArray.foreach(valsXArray(_) = meanX)
-
-      // variant is atomic => combOp merge not called => rowsXArray is sorted (as expected by SparseVector constructor)
-      assert(rowsXArray.isIncreasing)
-
-      val x = new SparseVector[Double](rowsXArray, valsXArray, n)
-      val xx = sumXX + meanX * meanX * nMissing
-      val xy = sumXY + meanX * sumYMissing
-
-      Some((x, xx, xy))
-    }
-  }
-}
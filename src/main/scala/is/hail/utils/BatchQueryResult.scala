@@ -0,0 +1,8 @@
+package is.hail.utils
+
+import is.hail.annotations.Annotation
+import is.hail.expr.Type
+
+case class BatchQueryResult(variantResults: Array[(Annotation, Type)],
+  genotypeResults: Array[(Annotation, Type)],
+  count: CountResult)
@@ -1,5 +1,7 @@
 package is.hail.utils
 
+import java.nio.ByteBuffer
+
 import scala.collection.JavaConverters._
 
 trait Py4jUtils {
@@ -26,6 +28,25 @@ trait Py4jUtils {
 
   def makeIndexedSeq[T](arr: Array[T]): IndexedSeq[T] = arr: IndexedSeq[T]
 
+  // big-endian primitive buffers packed on the python side, see hail.java.jarray
+  def bytesToIntArray(bytes: Array[Byte]): Array[Int] = {
+    val arr = new Array[Int](bytes.length / 4)
+    ByteBuffer.wrap(bytes).asIntBuffer().get(arr)
+    arr
+  }
+
+  def bytesToLongArray(bytes: Array[Byte]): Array[Long] = {
+    val arr = new Array[Long](bytes.length / 8)
+    ByteBuffer.wrap(bytes).asLongBuffer().get(arr)
+    arr
+  }
+
+  def bytesToDoubleArray(bytes: Array[Byte]): Array[Double] = {
+    val arr = new Array[Double](bytes.length / 8)
+    ByteBuffer.wrap(bytes).asDoubleBuffer().get(arr)
+    arr
+  }
+
   def makeInt(i: Int): Int = i
 
   def makeInt(l: Long): Int = l.toInt
@@ -34,19 +34,29 @@ trait TextTableOptions {
     usage = "impute column types from the file")
   var impute: Boolean = _
 
+  @Args4jOption(required = false, name = "--impute-sample",
+    usage = "impute types from at most this many lines of each partition instead of every line")
+  var imputeSample: Int = 0
+
   def config: TextTableConfiguration = TextTableConfiguration(
     types = Parser.parseAnnotationTypes(Option(types).getOrElse("")),
     noHeader = noHeader,
     impute = impute,
     separator = separator,
     missing = missingIdentifier,
-    commentChar = Option(commentChar)
+    commentChar = Option(commentChar),
+    imputeSample = someIf(imputeSample > 0, imputeSample)
   )
 }
 
 object TextTableConfiguration {
   def apply(types: String, commentChar: String, separator: String, missing: String, noHeader: Boolean, impute: Boolean): TextTableConfiguration =
     TextTableConfiguration(Parser.parseAnnotationTypes(Option(types).getOrElse("")), Option(commentChar), separator, missing, noHeader, impute)
+
+  def apply(types: String, commentChar: String, separator: String, missing: String, noHeader: Boolean, impute: Boolean,
+    imputeSample: Int): TextTableConfiguration =
+    TextTableConfiguration(Parser.parseAnnotationTypes(Option(types).getOrElse("")), Option(commentChar), separator, missing, noHeader, impute,
+      someIf(imputeSample > 0, imputeSample))
 }
 
 case class TextTableConfiguration(
@@ -55,7 +65,41 @@ case class TextTableConfiguration(
   separator: String = "\t",
   missing: String = "NA",
   noHeader: Boolean = false,
-  impute: Boolean = false)
+  impute: Boolean = false,
+  imputeSample: Option[Int] = None)
+
+/**
+  * Splits on a single literal character, keeping trailing empty fields like
+  * String.split(regex, -1).
+  */
+class CharSplitter(c: Char) extends (String => Array[String]) with Serializable {
+  def apply(s: String): Array[String] = {
+    var n = 1
+    var i = s.indexOf(c)
+    while (i >= 0) {
+      n += 1
+      i = s.indexOf(c, i + 1)
+    }
+
+    val a = new Array[String](n)
+    var start = 0
+    var j = 0
+    while (j < n - 1) {
+      val end = s.indexOf(c, start)
+      a(j) = s.substring(start, end)
+      start = end + 1
+      j += 1
+    }
+    a(j) = s.substring(start)
+    a
+  }
+}
+
+class RegexSplitter(regex: String) extends (String => Array[String]) with Serializable {
+  val pattern: Pattern = Pattern.compile(regex)
+
+  def apply(s: String): Array[String] = pattern.split(s, -1)
+}
 
 object TextTableReader {
 
@@ -65,17 +109,53 @@ object TextTableReader {
   val doubleRegex = """^[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?$"""
   val intRegex = """^-?\d+$"""
 
+  private val regexMetaChars = ".$|()[]{}^?*+\\"
+
+  /**
+    * The single character a delimiter regex matches, if it matches exactly
+    * one literal character, e.g. "," or "\\t".
+    */
+  def literalDelimiter(delimiter: String): Option[Char] = delimiter match {
+    case s if s.length == 1 && !regexMetaChars.contains(s(0)) => Some(s(0))
+    case s if s.length == 2 && s(0) == '\\' =>
+      s(1) match {
+        case 't' => Some('\t')
+        case 'n' => Some('\n')
+        case 'r' => Some('\r')
+        case 'f' => Some('\f')
+        case c if !c.isLetterOrDigit => Some(c)
+        case _ => None
+      }
+    case _ => None
+  }
+
+  def splitter(delimiter: String): String => Array[String] = literalDelimiter(delimiter) match {
+    case Some(c) => new CharSplitter(c)
+    case None => new RegexSplitter(delimiter)
+  }
+
+  /**
+    * Imputes the type of each column from every line, or from at most
+    * sampleSize lines of each partition.
+    */
   def imputeTypes(values: RDD[WithContext[String]], header: Array[String],
-    delimiter: String, missing: String): Array[Option[Type]] = {
+    delimiter: String, missing: String, sampleSize: Option[Int] = None): Array[Option[Type]] = {
     val nFields = header.length
     val regexes = Array(booleanRegex, variantRegex, locusRegex, intRegex, doubleRegex).map(Pattern.compile)
 
     val regexTypes: Array[Type] = Array(TBoolean, TVariant, TLocus, TInt, TDouble)
     val nRegex = regexes.length
 
-    val imputation = values.treeAggregate(MultiArray2.fill[Boolean](nFields, nRegex + 1)(true))({ case (ma, line) =>
+    val splitLine = splitter(delimiter)
+
+    val sampled = sampleSize match {
+      case Some(n) => values.mapPartitions(_.take(n))
+      case None => values
+    }
+
+    val imputation = sampled.treeAggregate(MultiArray2.fill[Boolean](nFields, nRegex + 1)(true))({ case (ma, line) =>
       line.foreach { l =>
-        val split = l.split(delimiter)
+        val split = splitLine(l)
         if (split.length != nFields)
           fatal(s"expected $nFields fields, but found ${ split.length }")
 
@@ -116,6 +196,12 @@ object TextTableReader {
     }.toArray
   }
 
+  def widenedType(t: Type, field: String): Type =
+    if (t == TInt && field.matches(doubleRegex))
+      TDouble
+    else
+      TString
+
   def read(sc: SparkContext)(files: Array[String],
     config: TextTableConfiguration = TextTableConfiguration(),
     nPartitions: Int = sc.defaultMinPartitions): (TStruct, RDD[WithContext[Annotation]]) = {
@@ -127,6 +213,7 @@ object TextTableReader {
     val commentChar = config.commentChar
     val missing = config.missing
     val types = config.types
+    val splitLine = splitter(separator)
 
     val firstFile = files.head
     val header = sc.hadoopConfiguration.readLines(firstFile) { lines =>
@@ -143,12 +230,12 @@ object TextTableReader {
     }
 
     val columns = if (noHeader) {
-      header.split(separator, -1)
+      splitLine(header)
         .zipWithIndex
         .map {
           case (_, i) => s"_$i"
         }
-    } else header.split(separator, -1).map(unescapeString)
+    } else splitLine(header).map(unescapeString)
 
     val nField = columns.length
 
@@ -169,10 +256,13 @@ object TextTableReader {
 
     val namesAndTypes = {
       if (impute) {
-        info("Reading table to impute column types")
+        config.imputeSample match {
+          case Some(n) => info(s"Reading up to $n ${ plural(n, "line") } of each partition to impute column types")
+          case None => info("Reading table to impute column types")
+        }
 
         sb.append("Finished type imputation")
-        val imputedTypes = imputeTypes(rdd, columns, separator, missing)
+        val imputedTypes = imputeTypes(rdd, columns, separator, missing, config.imputeSample)
         columns.zip(imputedTypes).map { case (name, imputedType) =>
           types.get(name) match {
             case Some(t) =>
@@ -208,12 +298,15 @@ object TextTableReader {
 
     val schema = TStruct(namesAndTypes: _*)
 
+    // sampled types may not hold past the sample
+    val sampledColumn = columns.map(c => impute && config.imputeSample.isDefined && !types.contains(c))
+
     val parsed = rdd
       .map {
         _.map { line =>
           val a = new Array[Annotation](nField)
 
-          val split = line.split(separator, -1)
+          val split = splitLine(line)
           if (split.length != nField)
             fatal(s"expected $nField fields, but found ${ split.length } fields")
 
@@ -228,7 +321,13 @@ object TextTableReader {
                 a(i) = TableAnnotationImpex.importAnnotation(field, t)
             } catch {
               case e: Exception =>
-                fatal(s"""${ e.getClass.getName }: could not convert "$field" to $t in column "$name" """)
+                if (sampledColumn(i))
+                  fatal(
+                    s"""could not convert "$field" to $t in column "$name"
+                       |  The type of `$name' was imputed from the first ${ config.imputeSample.get } lines of each partition.
+                       |  Specify it with types, e.g. `$name: ${ widenedType(t, field) }', or impute from every line by not setting an impute sample.""".stripMargin)
+                else
+                  fatal(s"""${ e.getClass.getName }: could not convert "$field" to $t in column "$name" """)
             }
             i += 1
           }
@@ -2,7 +2,7 @@ package is.hail.utils.richUtils
 
 import java.io._
 
-import is.hail.io.compress.BGzipCodec
+import is.hail.io.compress.{BGzipCodec, BGzipInputStream}
 import is.hail.utils.{TextContext, WithContext, _}
 import org.apache.hadoop
 import org.apache.hadoop.fs.FileStatus
@@ -47,6 +47,15 @@ class RichHadoopConfiguration(val hConf: hadoop.conf.Configuration) extends AnyV
     fs.getFileStatus(hPath).getLen
   }
 
+  def isBGzipFile(filename: String): Boolean = {
+    val is = fileSystem(filename).open(new hadoop.fs.Path(filename))
+    try {
+      BGzipInputStream.isBGzip(is)
+    } finally {
+      is.close()
+    }
+  }
+
   def exists(files: String*): Boolean = {
     files.forall(filename => fileSystem(filename).exists(new hadoop.fs.Path(filename)))
   }
@@ -1,17 +1,30 @@
 package is.hail.utils.richUtils
 
 import is.hail.utils._
+import org.apache.hadoop
+import org.apache.parquet.filter2.predicate.FilterPredicate
+import org.apache.parquet.hadoop.ParquetInputFormat
 import org.apache.spark.rdd.RDD
 import org.apache.spark.sql.functions._
+import org.apache.spark.sql.types.StructType
 import org.apache.spark.sql.{Row, SQLContext}
 
 class RichSQLContext(val sqlContext: SQLContext) extends AnyVal {
-  def readParquetSorted(dirname: String, selection: Option[Array[String]] = None): RDD[Row] = {
+  def readParquetSorted(dirname: String, selection: Option[Array[String]] = None,
+    filter: Option[FilterPredicate] = None, schema: Option[StructType] = None): RDD[Row] = {
     val parquetFiles = sqlContext.sparkContext.hadoopConfiguration.globAll(Array(dirname + "/*.parquet"))
     if (parquetFiles.isEmpty)
       return sqlContext.sparkContext.emptyRDD[Row]
 
-    var df = sqlContext.read.parquet(dirname + "/part-*")
+    // parquet-mr drops row groups whose column statistics cannot satisfy the predicate
+    val reader = filter.map { f =>
+      val conf = new hadoop.conf.Configuration(false)
+      ParquetInputFormat.setFilterPredicate(conf, f)
+      sqlContext.read.option(ParquetInputFormat.FILTER_PREDICATE, conf.get(ParquetInputFormat.FILTER_PREDICATE))
+    }.getOrElse(sqlContext.read)
+
+    // a pruned schema restricts which nested columns are read
+    var df = schema.map(s => reader.schema(s)).getOrElse(reader).parquet(dirname + "/part-*")
     selection.foreach { cols =>
       df = df.select(cols.map(col): _*)
     }
@@ -0,0 +1,146 @@
+package is.hail.variant
+
+import is.hail.utils.IntIterator
+
+object DosageGenotypeStream {
+  final val missing = 0xffff
+
+  // 2 little-endian unsigned shorts per sample: the linear-scaled
+  // probabilities of hom ref and het, the hom var probability being the
+  // remainder of 32768
+  final val bytesPerSample = 4
+}
+
+/**
+  * Bi-allelic dosage genotypes packed as fixed-point probabilities, as
+  * produced by import_bgen and import_gen. Decodes to the same genotypes as
+  * a dosage GenotypeStream in about half the space, and exposes the
+  * probabilities without allocating genotypes.
+  */
+class DosageGenotypeStream(val nSamples: Int, val decompLenOption: Option[Int], val a: Array[Byte])
+  extends Iterable[Genotype] with Serializable {
+
+  import DosageGenotypeStream._
+
+  def bytes: Array[Byte] = decompLenOption match {
+    case Some(decompLen) => LZ4Utils.decompress(decompLen, a)
+    case None => a
+  }
+
+  override def size: Int = nSamples
+
+  /**
+    * The same genotypes with the packed buffer LZ4-compressed or not.
+    */
+  def withCompression(compress: Boolean): DosageGenotypeStream = decompLenOption match {
+    case Some(_) if !compress => new DosageGenotypeStream(nSamples, None, bytes)
+    case None if compress && a.nonEmpty => new DosageGenotypeStream(nSamples, Some(a.length), LZ4Utils.compress(a))
+    case _ => this
+  }
+
+  override def iterator: Iterator[Genotype] = new Iterator[Genotype] {
+    val b = bytes
+    var i = 0
+
+    def hasNext: Boolean = i < nSamples
+
+    def next(): Genotype = {
+      val g = decode(b, i)
+      i += 1
+      g
+    }
+  }
+
+  def hardCallIterator: IntIterator = new IntIterator {
+    val b = bytes
+    var i = 0
+
+    def hasNext: Boolean = i < nSamples
+
+    def nextInt(): Int = {
+      val p0 = readShort(b, i * bytesPerSample)
+      val gt =
+        if (p0 == missing)
+          -1
+        else {
+          val p1 = readShort(b, i * bytesPerSample + 2)
+          Genotype.gtFromLinear(Array(p0, p1, 32768 - p0 - p1)).getOrElse(-1)
+        }
+      i += 1
+      gt
+    }
+  }
+
+  /**
+    * Expected alternate allele count of each sample, NaN if missing.
+    */
+  def dosages: Array[Double] = {
+    val b = bytes
+    val r = new Array[Double](nSamples)
+    var i = 0
+    while (i < nSamples) {
+      val p0 = readShort(b, i * bytesPerSample)
+      r(i) =
+        if (p0 == missing)
+          Double.NaN
+        else {
+          val p1 = readShort(b, i * bytesPerSample + 2)
+          (p1 + 2 * (32768 - p0 - p1)) / 32768.0
+        }
+      i += 1
+    }
+    r
+  }
+
+  private def readShort(b: Array[Byte], off: Int): Int =
+    (b(off) & 0xff) | ((b(off + 1) & 0xff) << 8)
+
+  private def decode(b: Array[Byte], i: Int): Genotype = {
+    val p0 = readShort(b, i * bytesPerSample)
+    if (p0 == missing)
+      new GenericGenotype(-1, null, -1, -1, null, false, true)
+    else {
+      val p1 = readShort(b, i * bytesPerSample + 2)
+      val px = Array(p0, p1, 32768 - p0 - p1)
+      new GenericGenotype(Genotype.gtFromLinear(px).getOrElse(-1), null, -1, -1, px, false, true)
+    }
+  }
+}
+
+class DosageGenotypeStreamBuilder(nSamples: Int, compress: Boolean = true) {
+
+  import DosageGenotypeStream._
+
+  private val b = new Array[Byte](nSamples * bytesPerSample)
+  private var i = 0
+
+  def clear() {
+    i = 0
+  }
+
+  private def writeShort(x: Int) {
+    b(i) = x.toByte
+    b(i + 1) = (x >> 8).toByte
+    i += 2
+  }
+
+  def addMissing() {
+    writeShort(missing)
+    writeShort(0)
+  }
+
+  // px is linear-scaled and sums to 32768
+  def add(px: Array[Int]) {
+    assert(px.length == 3)
+    writeShort(px(0))
+    writeShort(px(1))
+  }
+
+  def result(): DosageGenotypeStream = {
+    assert(i == b.length)
+    if (compress && b.nonEmpty)
+      new DosageGenotypeStream(nSamples, Some(b.length), LZ4Utils.compress(b))
+    else
+      new DosageGenotypeStream(nSamples, None, b.clone())
+  }
+}
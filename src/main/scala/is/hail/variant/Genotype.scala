@@ -267,6 +267,25 @@ abstract class Genotype extends Serializable {
 }
 
 object Genotype {
+  // field masks for projected reads, see fieldMask
+  final val fieldGT = 0x1
+  final val fieldAD = 0x2
+  final val fieldDP = 0x4
+  final val fieldGQ = 0x8
+  final val fieldPX = 0x10
+  final val allFields = 0x1f
+
+  def fieldMask(names: Seq[String]): Int = names.foldLeft(0) { (mask, name) =>
+    mask | (name match {
+      case "gt" => fieldGT
+      case "ad" => fieldAD
+      case "dp" => fieldDP
+      case "gq" => fieldGQ
+      case "pl" | "px" | "dosage" => fieldPX
+      case _ => fatal(s"unknown genotype field `$name', expected one of gt, ad, dp, gq, pl, px or dosage")
+    })
+  }
+
   def apply(gtx: Int): Genotype = new GenericGenotype(gtx, null, -1, -1, null, false, false)
 
   def apply(gt: Option[Int], fakeRef: Boolean): Genotype =
@@ -512,11 +531,22 @@ object Genotype {
       gtIndex(i, j)
   }
 
-  def read(nAlleles: Int, isDosage: Boolean, a: ByteIterator): Genotype = {
+  def read(nAlleles: Int, isDosage: Boolean, a: ByteIterator, requestedFields: Int = allFields): Genotype = {
     val isBiallelic = nAlleles == 2
 
+    // a dosage genotype's gt is determined by its dosages, so they are read together
+    val fields =
+      if (isDosage && (requestedFields & (fieldGT | fieldPX)) != 0)
+        requestedFields | fieldGT | fieldPX
+      else
+        requestedFields
+
     val flags = a.readULEB128()
 
+    // fields outside the mask are skipped, unless a selected field is derived from them
+    val readAD = (fields & (fieldAD | fieldDP)) != 0
+    val readPX = (fields & fieldPX) != 0 || ((fields & fieldGQ) != 0 && flagSimpleGQ(flags))
+
     val gt: Int =
       if (flagHasGT(isBiallelic, flags)) {
         if (flagStoresGT(isBiallelic, flags))
@@ -528,34 +558,50 @@ object Genotype {
 
     val ad: Array[Int] =
       if (flagHasAD(flags)) {
-        val ada = new Array[Int](nAlleles)
-        if (flagSimpleAD(flags)) {
-          assert(gt >= 0)
-          val p = Genotype.gtPair(gt)
-          ada(p.j) = a.readULEB128()
-          if (p.j != p.k)
-            ada(p.k) = a.readULEB128()
+        if (readAD) {
+          val ada = new Array[Int](nAlleles)
+          if (flagSimpleAD(flags)) {
+            assert(gt >= 0)
+            val p = Genotype.gtPair(gt)
+            ada(p.j) = a.readULEB128()
+            if (p.j != p.k)
+              ada(p.k) = a.readULEB128()
+          } else {
+            for (i <- ada.indices)
+              ada(i) = a.readULEB128()
+          }
+          ada
         } else {
-          for (i <- ada.indices)
-            ada(i) = a.readULEB128()
+          if (flagSimpleAD(flags)) {
+            assert(gt >= 0)
+            val p = Genotype.gtPair(gt)
+            a.skipLEB128(if (p.j != p.k) 2 else 1)
+          } else
+            a.skipLEB128(nAlleles)
+          null
         }
-        ada
       } else
         null
 
     val dp =
       if (flagHasDP(flags)) {
         if (flagHasAD(flags)) {
-          var i = 0
-          var adsum = 0
-          while (i < ad.length) {
-            adsum += ad(i)
-            i += 1
+          if (readAD) {
+            var i = 0
+            var adsum = 0
+            while (i < ad.length) {
+              adsum += ad(i)
+              i += 1
+            }
+            if (flagSimpleDP(flags))
+              adsum
+            else
+              adsum + a.readULEB128()
+          } else {
+            if (!flagSimpleDP(flags))
+              a.skipLEB128(1)
+            -1
           }
-          if (flagSimpleDP(flags))
-            adsum
-          else
-            adsum + a.readULEB128()
         } else
           a.readULEB128()
       } else
@@ -563,44 +609,58 @@ object Genotype {
 
     val px: Array[Int] =
       if (flagHasPX(flags)) {
-        val pxa = new Array[Int](triangle(nAlleles))
-        if (gt >= 0) {
-          var i = 0
-          while (i < gt) {
-            pxa(i) = a.readULEB128()
-            i += 1
-          }
-          i += 1
-          while (i < pxa.length) {
-            pxa(i) = a.readULEB128()
+        if (readPX) {
+          val pxa = new Array[Int](triangle(nAlleles))
+          if (gt >= 0) {
+            var i = 0
+            while (i < gt) {
+              pxa(i) = a.readULEB128()
+              i += 1
+            }
             i += 1
+            while (i < pxa.length) {
+              pxa(i) = a.readULEB128()
+              i += 1
+            }
+
+            if (isDosage)
+              pxa(gt) = 32768 - pxa.sum // original values summed to 32768 or 1.0 in probability
+
+          } else {
+            var i = 0
+            while (i < pxa.length) {
+              pxa(i) = a.readULEB128()
+              i += 1
+            }
           }
 
-          if (isDosage)
-            pxa(gt) = 32768 - pxa.sum // original values summed to 32768 or 1.0 in probability
-
+          pxa
         } else {
-          var i = 0
-          while (i < pxa.length) {
-            pxa(i) = a.readULEB128()
-            i += 1
-          }
+          a.skipLEB128(if (gt >= 0) triangle(nAlleles) - 1 else triangle(nAlleles))
+          null
         }
-
-        pxa
       } else
         null
 
     val gq: Int =
       if (flagHasGQ(flags)) {
-        if (flagSimpleGQ(flags))
-          gqFromPL(px)
-        else
+        if (flagSimpleGQ(flags)) {
+          if (readPX) gqFromPL(px) else -1
+        } else
           a.readULEB128()
       } else
         -1
 
-    new GenericGenotype(gt, ad, dp, gq, px, flagFakeRef(flags), isDosage)
+    if (fields == allFields)
+      new GenericGenotype(gt, ad, dp, gq, px, flagFakeRef(flags), isDosage)
+    else
+      new GenericGenotype(
+        if ((fields & fieldGT) != 0) gt else -1,
+        if ((fields & fieldAD) != 0) ad else null,
+        if ((fields & fieldDP) != 0) dp else -1,
+        if ((fields & fieldGQ) != 0) gq else -1,
+        if ((fields & fieldPX) != 0) px else null,
+        flagFakeRef(flags), isDosage)
   }
 
   def hardCallRead(nAlleles: Int, isDosage: Boolean, a: ByteIterator): Int = {
@@ -10,10 +10,11 @@ import org.apache.spark.sql.types.{StructType, _}
 
 import scala.collection.mutable
 
-class GenotypeStreamIterator(nAlleles: Int, isDosage: Boolean, b: ByteIterator) extends Iterator[Genotype] {
+class GenotypeStreamIterator(nAlleles: Int, isDosage: Boolean, b: ByteIterator,
+  fields: Int = Genotype.allFields) extends Iterator[Genotype] {
   override def hasNext: Boolean = b.hasNext
 
-  override def next(): Genotype = Genotype.read(nAlleles, isDosage, b)
+  override def next(): Genotype = Genotype.read(nAlleles, isDosage, b, fields)
 }
 
 class HardCallGenotypeStreamIterator(nAlleles: Int, isDosage: Boolean, b: ByteIterator) extends IntIterator {
@@ -49,15 +50,28 @@ object LZ4Utils {
 case class GenotypeStream(nAlleles: Int, isDosage: Boolean, decompLenOption: Option[Int], a: Array[Byte])
   extends Iterable[Genotype] {
 
-  override def iterator: GenotypeStreamIterator = {
+  override def iterator: GenotypeStreamIterator = projectedIterator(Genotype.allFields)
+
+  def projectedIterator(fields: Int): GenotypeStreamIterator = {
     decompLenOption match {
       case Some(decompLen) =>
-        new GenotypeStreamIterator(nAlleles, isDosage, new ByteIterator(LZ4Utils.decompress(decompLen, a)))
+        new GenotypeStreamIterator(nAlleles, isDosage, new ByteIterator(LZ4Utils.decompress(decompLen, a)), fields)
       case None =>
-        new GenotypeStreamIterator(nAlleles, isDosage, new ByteIterator(a))
+        new GenotypeStreamIterator(nAlleles, isDosage, new ByteIterator(a), fields)
     }
   }
 
+  /**
+    * Genotypes with only the fields in the Genotype.fieldGT, ... mask; the
+    * others read as missing. Not a GenotypeStream, so writing it re-encodes
+    * the projected genotypes.
+    */
+  def project(fields: Int): Iterable[Genotype] =
+    if (fields == Genotype.allFields)
+      this
+    else
+      new ProjectedGenotypeStream(this, fields)
+
   def gsHardCallIterator: HardCallGenotypeStreamIterator = {
     decompLenOption match {
       case Some(decompLen) =>
@@ -95,6 +109,10 @@ case class GenotypeStream(nAlleles: Int, isDosage: Boolean, decompLenOption: Opt
   }
 }
 
+class ProjectedGenotypeStream(gs: GenotypeStream, fields: Int) extends Iterable[Genotype] with Serializable {
+  override def iterator: Iterator[Genotype] = gs.projectedIterator(fields)
+}
+
 object GenotypeStream {
   def schema: StructType = {
     StructType(Array(
@@ -8,6 +8,7 @@ import org.apache.spark.sql.Row
 import org.apache.spark.sql.types.{IntegerType, StringType, StructField, StructType}
 import org.json4s._
 
+import scala.collection.JavaConverters._
 import scala.reflect.ClassTag
 
 object LocusImplicits {
@@ -67,6 +68,9 @@ object Locus {
   }
 
   def makeInterval(start: Locus, end: Locus): Interval[Locus] = Interval(start, end)
+
+  def makeIntervalTree(intervals: java.util.ArrayList[Interval[Locus]]): IntervalTree[Locus] =
+    IntervalTree(intervals.asScala.toArray, prune = true)
 }
 
 @SerialVersionUID(9197069433877243281L)
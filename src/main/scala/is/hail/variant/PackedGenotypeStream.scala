@@ -0,0 +1,63 @@
+package is.hail.variant
+
+import is.hail.utils.IntIterator
+
+object PackedGenotypeStream {
+  // PLINK .bed 2-bit codes, lowest bits first: 00 hom A1, 01 missing,
+  // 10 het, 11 hom A2, where A2 is the reference allele
+  final val gtFromCode = Array(2, -1, 1, 0)
+
+  // the IBS kernel's encoding (IBSFFI.gtToCRep, missing 2) is the complement
+  // of the PLINK code
+  final val cRepFromCode = Array[Byte](3, 2, 1, 0)
+}
+
+/**
+  * Bi-allelic hard calls held as a SNP-major PLINK .bed record, 4 samples
+  * per byte. Hard-call consumers read the packed codes directly; iterating
+  * decodes to the same genotypes the .bed file describes.
+  */
+class PackedGenotypeStream(val nSamples: Int, val a: Array[Byte]) extends Iterable[Genotype] with Serializable {
+
+  import PackedGenotypeStream._
+
+  require(a.length == (nSamples + 3) / 4)
+
+  def code(i: Int): Int = (a(i >> 2) >> ((i & 3) << 1)) & 3
+
+  override def size: Int = nSamples
+
+  override def iterator: Iterator[Genotype] = new Iterator[Genotype] {
+    var i = 0
+
+    def hasNext: Boolean = i < nSamples
+
+    def next(): Genotype = {
+      val g = Genotype(gtFromCode(code(i)))
+      i += 1
+      g
+    }
+  }
+
+  def hardCallIterator: IntIterator = new IntIterator {
+    var i = 0
+
+    def hasNext: Boolean = i < nSamples
+
+    def nextInt(): Int = {
+      val gt = gtFromCode(code(i))
+      i += 1
+      gt
+    }
+  }
+
+  def ibsCRep: Array[Byte] = {
+    val r = new Array[Byte](nSamples)
+    var i = 0
+    while (i < nSamples) {
+      r(i) = cRepFromCode(code(i))
+      i += 1
+    }
+    r
+  }
+}
@@ -16,6 +16,8 @@ import is.hail.utils._
 import is.hail.variant.Variant.orderedKey
 import org.apache.hadoop
 import org.apache.kudu.spark.kudu.{KuduContext, _}
+import org.apache.parquet.filter2.predicate.{FilterApi, FilterPredicate}
+import org.apache.parquet.io.api.Binary
 import org.apache.spark.rdd.RDD
 import org.apache.spark.sql.types.{StringType, StructField, StructType}
 import org.apache.spark.sql.{Row, SQLContext}
@@ -29,14 +31,112 @@ import scala.language.implicitConversions
 import scala.reflect.ClassTag
 
 object VariantDataset {
+
+  /**
+    * Parquet predicate on the variant column selecting rows whose locus lies in
+    * one of intervals. Row groups whose contig and start statistics rule out
+    * every interval are never read. Returns None if some interval spans
+    * contigs, as contig order is not lexicographic.
+    */
+  def intervalsFilter(intervals: IntervalTree[Locus]): Option[FilterPredicate] = {
+    val ia = intervals.toArray
+    if (ia.isEmpty || ia.exists(i => i.start.contig != i.end.contig))
+      None
+    else {
+      val contig = FilterApi.binaryColumn("variant.contig")
+      val start = FilterApi.intColumn("variant.start")
+
+      def or(preds: IndexedSeq[FilterPredicate]): FilterPredicate =
+        if (preds.length == 1)
+          preds(0)
+        else {
+          val (l, r) = preds.splitAt(preds.length / 2)
+          FilterApi.or(or(l), or(r))
+        }
+
+      Some(or(ia.map { i =>
+        FilterApi.and(FilterApi.eq(contig, Binary.fromString(i.start.contig)),
+          FilterApi.and(
+            FilterApi.gtEq(start, java.lang.Integer.valueOf(i.start.position)),
+            FilterApi.lt(start, java.lang.Integer.valueOf(i.end.position))))
+      }))
+    }
+  }
+
+  /**
+    * Restricts t to the dot-separated field paths, e.g. "qc.AF", keeping
+    * nesting and field attributes.
+    */
+  def pruneStruct(t: TStruct, paths: Seq[String], root: String): TStruct = {
+    def prune(t: TStruct, paths: Seq[List[String]], prefix: String): TStruct = {
+      val byField = paths.groupBy(_.head)
+      byField.keys.foreach { name =>
+        if (!t.hasField(name))
+          fatal(s"no field `$name' in `$prefix'")
+      }
+
+      TStruct(t.fields
+        .filter(f => byField.contains(f.name))
+        .zipWithIndex
+        .map { case (f, i) =>
+          val rest = byField(f.name).map(_.tail)
+          val typ = if (rest.exists(_.isEmpty))
+            f.typ
+          else f.typ match {
+            case st: TStruct => prune(st, rest, prefix + "." + f.name)
+            case other => fatal(s"cannot select fields of `$prefix.${ f.name }' of type $other, expected Struct")
+          }
+          Field(f.name, typ, i, f.attrs)
+        })
+    }
+
+    prune(t, paths.map(_.split("\\.").toList), root)
+  }
+
+  def pruneAnnotation(a: Annotation, t: TStruct, pruned: TStruct): Annotation = {
+    if (a == null)
+      null
+    else {
+      val r = a.asInstanceOf[Row]
+      Row.fromSeq(pruned.fields.map { f =>
+        val i = t.fieldIdx(f.name)
+        (t.fields(i).typ, f.typ) match {
+          case (st: TStruct, pst: TStruct) if st != pst => pruneAnnotation(r.get(i), st, pst)
+          case _ => r.get(i)
+        }
+      })
+    }
+  }
+
   def read(hc: HailContext, dirname: String,
-    skipGenotypes: Boolean = false, skipVariants: Boolean = false): VariantDataset = {
+    skipGenotypes: Boolean = false, skipVariants: Boolean = false,
+    intervals: Option[IntervalTree[Locus]] = None,
+    variantFields: Option[Seq[String]] = None,
+    sampleFields: Option[Seq[String]] = None,
+    genotypeFields: Option[Seq[String]] = None): VariantDataset = {
 
     val sqlContext = hc.sqlContext
     val sc = hc.sc
     val hConf = sc.hadoopConfiguration
 
-    val metadata = readMetadata(hConf, dirname, skipGenotypes)
+    val fullMetadata = readMetadata(hConf, dirname, skipGenotypes)
+
+    def structSignature(t: Type, root: String): TStruct = t match {
+      case st: TStruct => st
+      case other => fatal(s"cannot select fields of `$root' of type $other, expected Struct")
+    }
+
+    val metadata = fullMetadata.copy(
+      vaSignature = variantFields.map(pruneStruct(structSignature(fullMetadata.vaSignature, "va"), _, "va"))
+        .getOrElse(fullMetadata.vaSignature),
+      saSignature = sampleFields.map(pruneStruct(structSignature(fullMetadata.saSignature, "sa"), _, "sa"))
+        .getOrElse(fullMetadata.saSignature),
+      sampleAnnotations = sampleFields.map { paths =>
+        val saSignature = structSignature(fullMetadata.saSignature, "sa")
+        val pruned = pruneStruct(saSignature, paths, "sa")
+        fullMetadata.sampleAnnotations.map(pruneAnnotation(_, saSignature, pruned))
+      }.getOrElse(fullMetadata.sampleAnnotations))
+
     val vaSignature = metadata.vaSignature
 
     val vaRequiresConversion = SparkAnnotationImpex.requiresConversion(vaSignature)
@@ -44,21 +144,44 @@ object VariantDataset {
 
     val parquetFile = dirname + "/rdd.parquet"
 
+    val filter = intervals.flatMap(intervalsFilter)
+
+    // parquet only reads the leaf columns of the requested schema
+    val skipAnnotations = variantFields.exists(_.isEmpty)
+    val schema = variantFields.map { _ =>
+      StructType(Array(
+        StructField("variant", Variant.schema, nullable = false),
+        StructField("annotations", vaSignature.schema),
+        StructField("gs", GenotypeStream.schema, nullable = false)))
+    }
+    val fields = genotypeFields.map(Genotype.fieldMask).getOrElse(Genotype.allFields)
+
     val orderedRDD = if (skipVariants)
       OrderedRDD.empty[Locus, Variant, (Annotation, Iterable[Genotype])](sc)
     else {
+      def annotation(row: Row): Annotation =
+        if (skipAnnotations)
+          Annotation.empty
+        else if (vaRequiresConversion)
+          SparkAnnotationImpex.importAnnotation(row.get(1), vaSignature)
+        else
+          row.get(1)
+
       val rdd = if (skipGenotypes)
-        sqlContext.readParquetSorted(parquetFile, Some(Array("variant", "annotations")))
-          .map(row => (row.getVariant(0),
-            (if (vaRequiresConversion) SparkAnnotationImpex.importAnnotation(row.get(1), vaSignature) else row.get(1),
-              Iterable.empty[Genotype])))
+        sqlContext.readParquetSorted(parquetFile,
+          Some(if (skipAnnotations) Array("variant") else Array("variant", "annotations")), filter, schema)
+          .map(row => (row.getVariant(0), (annotation(row), Iterable.empty[Genotype])))
+      else if (skipAnnotations)
+        sqlContext.readParquetSorted(parquetFile, Some(Array("variant", "gs")), filter, schema)
+          .map { row =>
+            val v = row.getVariant(0)
+            (v, (Annotation.empty, row.getGenotypeStream(v, 1, isDosage).project(fields)))
+          }
       else
-        sqlContext.readParquetSorted(parquetFile)
+        sqlContext.readParquetSorted(parquetFile, filter = filter, schema = schema)
           .map { row =>
             val v = row.getVariant(0)
-            (v,
-              (if (vaRequiresConversion) SparkAnnotationImpex.importAnnotation(row.get(1), vaSignature) else row.get(1),
-                row.getGenotypeStream(v, 2, isDosage): Iterable[Genotype]))
+            (v, (annotation(row), row.getGenotypeStream(v, 2, isDosage).project(fields)))
           }
 
       val partitioner: OrderedPartitioner[Locus, Variant] =
@@ -70,7 +193,11 @@ object VariantDataset {
             fatal("missing partitioner.json.gz when loading VDS, create with HailContext.write_partitioning.")
         }
 
-      OrderedRDD(rdd, partitioner)
+      val ordered = OrderedRDD(rdd, partitioner)
+      intervals match {
+        case Some(it) => ordered.filterIntervals(it)
+        case None => ordered
+      }
     }
 
     new VariantSampleMatrix[Genotype](hc,
@@ -371,10 +498,16 @@ class VariantDatasetFunctions(private val vds: VariantSampleMatrix[Genotype]) ex
     vds.withGenotypeStream().copy(rdd = vds.rdd.persist(level))
   }
 
+  // dosage streams keep their packed layout and are only (de)compressed;
+  // 2-bit packed hard calls are never compressed
   def withGenotypeStream(compress: Boolean = true): VariantDataset = {
     val isDosage = vds.isDosage
     vds.copy(rdd = vds.rdd.mapValuesWithKey[(Annotation, Iterable[Genotype])] { case (v, (va, gs)) =>
-      (va, gs.toGenotypeStream(v, isDosage, compress = compress))
+      gs match {
+        case dgs: DosageGenotypeStream => (va, dgs.withCompression(compress))
+        case pgs: PackedGenotypeStream => (va, pgs)
+        case _ => (va, gs.toGenotypeStream(v, isDosage, compress = compress))
+      }
     }.asOrderedRDD)
   }
 
@@ -410,6 +543,83 @@ class VariantDatasetFunctions(private val vds: VariantSampleMatrix[Genotype]) ex
     CountResult(vds.nSamples, nVariants, nCalled)
   }
 
+  /**
+    * Evaluate variant queries (as in queryVariants), genotype queries over
+    * the aggregable `gs`, and the counts of count(countGenotypes) in a single
+    * pass over the data.
+    */
+  def queryBatch(variantExprs: Array[String], genotypeExprs: Array[String],
+    countGenotypes: Boolean): BatchQueryResult = {
+    val localGlobalAnnotation = vds.globalAnnotation
+
+    val variantAggregationST = Map(
+      "global" -> (0, vds.globalSignature),
+      "v" -> (1, TVariant),
+      "va" -> (2, vds.vaSignature))
+    val variantEC = EvalContext(Map(
+      "global" -> (0, vds.globalSignature),
+      "variants" -> (1, TAggregable(TVariant, variantAggregationST))))
+    val variantTs = variantExprs.map(e => Parser.parseExpr(e, variantEC))
+
+    val genotypeAggregationST = Map(
+      "global" -> (0, vds.globalSignature),
+      "v" -> (1, TVariant),
+      "va" -> (2, vds.vaSignature),
+      "s" -> (3, TSample),
+      "sa" -> (4, vds.saSignature),
+      "g" -> (5, TGenotype))
+    val genotypeEC = EvalContext(Map(
+      "global" -> (0, vds.globalSignature),
+      "gs" -> (1, TAggregable(TGenotype, genotypeAggregationST))))
+    val genotypeTs = genotypeExprs.map(e => Parser.parseExpr(e, genotypeEC))
+
+    val (vZVal, vSeqOp, vCombOp, vResOp) = Aggregators.makeFunctions[(Variant, Annotation)](variantEC, {
+      case (ec, (v, va)) => ec.setAll(localGlobalAnnotation, v, va)
+    })
+    val (gZVal, gSeqOp, gCombOp, gResOp) =
+      Aggregators.makeFunctions[(Variant, Annotation, String, Annotation, Genotype)](genotypeEC, {
+        case (ec, (v, va, s, sa, g)) => ec.setAll(localGlobalAnnotation, v, va, s, sa, g)
+      })
+
+    val scanGenotypes = genotypeTs.nonEmpty || countGenotypes
+    val aggregateGenotypes = genotypeTs.nonEmpty
+    val localSampleIdsBc = vds.sampleIdsBc
+    val localSampleAnnotationsBc = vds.sampleAnnotationsBc
+
+    val (vAggs, gAggs, nVariants, nCalled) = vds.rdd.treeAggregate((vZVal, gZVal, 0L, 0L))({
+      case ((vAcc, gAcc, nVar, nCalledAcc), (v, (va, gs))) =>
+        vSeqOp(vAcc, (v, va))
+
+        var nCalled = nCalledAcc
+        if (scanGenotypes) {
+          val sampleIds = localSampleIdsBc.value
+          val sampleAnnotations = localSampleAnnotationsBc.value
+          var i = 0
+          gs.foreach { g =>
+            if (aggregateGenotypes)
+              gSeqOp(gAcc, (v, va, sampleIds(i), sampleAnnotations(i), g))
+            if (g.isCalled)
+              nCalled += 1
+            i += 1
+          }
+        }
+
+        (vAcc, gAcc, nVar + 1, nCalled)
+    }, { case ((vAcc1, gAcc1, nVar1, nCalled1), (vAcc2, gAcc2, nVar2, nCalled2)) =>
+      (vCombOp(vAcc1, vAcc2), gCombOp(gAcc1, gAcc2), nVar1 + nVar2, nCalled1 + nCalled2)
+    }, depth = treeAggDepth(vds.hc, vds.nPartitions))
+
+    vResOp(vAggs)
+    variantEC.setAll(localGlobalAnnotation)
+    gResOp(gAggs)
+    genotypeEC.setAll(localGlobalAnnotation)
+
+    BatchQueryResult(
+      variantTs.map { case (t, f) => (f().orNull, t) },
+      genotypeTs.map { case (t, f) => (f().orNull, t) },
+      CountResult(vds.nSamples, nVariants, if (countGenotypes) Some(nCalled) else None))
+  }
+
   def deduplicate(): VariantDataset = {
     DuplicateReport.initialize()
 
@@ -1041,6 +1251,11 @@ class VariantDatasetFunctions(private val vds: VariantSampleMatrix[Genotype]) ex
     LinearRegression(vds, ySA, covSA, root, minAC, minAF)
   }
 
+  def linregMultiPheno(ySA: Array[String], covSA: Array[String], root: String, minAC: Int, minAF: Double): VariantDataset = {
+    requireSplit("linear regression")
+    LinearRegressionMultiPheno(vds, ySA, covSA, root, minAC, minAF)
+  }
+
   def lmmreg(kinshipVDS: VariantDataset, ySA: String,
     covSA: Array[String],
     useML: Boolean,
@@ -1050,15 +1265,18 @@ class VariantDatasetFunctions(private val vds: VariantSampleMatrix[Genotype]) ex
     optDelta: Option[Double],
     sparsityThreshold: Double,
     forceBlock: Boolean,
-    forceGrammian: Boolean): VariantDataset = {
+    forceGrammian: Boolean,
+    kinshipCache: Option[String] = None,
+    rank: Option[Int] = None): VariantDataset = {
     requireSplit("linear mixed regression")
     LinearMixedRegression(vds, kinshipVDS, ySA, covSA, useML, rootGA, rootVA,
-      runAssoc, optDelta, sparsityThreshold, forceBlock, forceGrammian)
+      runAssoc, optDelta, sparsityThreshold, forceBlock, forceGrammian, kinshipCache, rank)
   }
 
-  def logreg(test: String, ySA: String, covSA: Array[String], root: String): VariantDataset = {
+  def logreg(test: String, ySA: String, covSA: Array[String], root: String,
+    screenPval: Option[Double] = None): VariantDataset = {
     requireSplit("logistic regression")
-    LogisticRegression(vds, test, ySA, covSA, root)
+    LogisticRegression(vds, test, ySA, covSA, root, screenPval)
   }
 
   def makeKT(variantCondition: String, genotypeCondition: String, keyNames: Array[String]): KeyTable = {
@@ -5,7 +5,7 @@ import java.nio.ByteBuffer
 import is.hail.annotations._
 import is.hail.check.Gen
 import is.hail.expr.{EvalContext, TAggregable, _}
-import is.hail.io.annotators.{BedAnnotator, IntervalListAnnotator}
+import is.hail.io.annotators.{AnnotationCache, BedAnnotator, IntervalListAnnotator}
 import is.hail.io.plink.{FamFileConfig, PlinkLoader}
 import is.hail.keytable.KeyTable
 import is.hail.methods.{Aggregators, Filter}
@@ -622,9 +622,14 @@ class VariantSampleMatrix[T](val hc: HailContext, val metadata: VariantMetadata,
     annotateVariants(otherRDD, newSignature, ins)
   }
 
-  def annotateVariantsBED(path: String, root: String, all: Boolean = false): VariantSampleMatrix[T] = {
+  def annotateVariantsBED(path: String, root: String, all: Boolean = false,
+    cache: Option[String] = None): VariantSampleMatrix[T] = {
     val annotationPath = Parser.parseAnnotationRoot(root, Annotation.VARIANT_HEAD)
-    BedAnnotator(path, hc.hadoopConf) match {
+    val intervals = cache match {
+      case Some(dir) => AnnotationCache.intervals(hc.hadoopConf, dir, path, "bed")(BedAnnotator(path, hc.hadoopConf))
+      case None => BedAnnotator(path, hc.hadoopConf)
+    }
+    intervals match {
       case (is, None) =>
         annotateIntervals(is, annotationPath)
 
@@ -633,10 +638,15 @@ class VariantSampleMatrix[T](val hc: HailContext, val metadata: VariantMetadata,
     }
   }
 
-  def annotateVariantsIntervals(path: String, root: String, all: Boolean = false): VariantSampleMatrix[T] = {
+  def annotateVariantsIntervals(path: String, root: String, all: Boolean = false,
+    cache: Option[String] = None): VariantSampleMatrix[T] = {
     val annotationPath = Parser.parseAnnotationRoot(root, Annotation.VARIANT_HEAD)
 
-    IntervalListAnnotator(path, hc.hadoopConf) match {
+    val intervals = cache match {
+      case Some(dir) => AnnotationCache.intervals(hc.hadoopConf, dir, path, "interval_list")(IntervalListAnnotator(path, hc.hadoopConf))
+      case None => IntervalListAnnotator(path, hc.hadoopConf)
+    }
+    intervals match {
       case (is, Some((m, t))) =>
         annotateIntervals(is, m, t, all = all, annotationPath)
 
@@ -705,18 +715,41 @@ class VariantSampleMatrix[T](val hc: HailContext, val metadata: VariantMetadata,
 
   def annotateVariantsLoci(path: String, locusExpr: String,
     root: Option[String] = None, code: Option[String] = None,
-    config: TextTableConfiguration = TextTableConfiguration()): VariantSampleMatrix[T] = {
-    annotateVariantsLociAll(List(path), locusExpr, root, code, config)
+    config: TextTableConfiguration = TextTableConfiguration(),
+    cache: Option[String] = None): VariantSampleMatrix[T] = {
+    annotateVariantsLociAll(List(path), locusExpr, root, code, config, cache)
   }
 
   def annotateVariantsLociAll(paths: Seq[String], locusExpr: String,
     root: Option[String] = None, code: Option[String] = None,
-    config: TextTableConfiguration = TextTableConfiguration()): VariantSampleMatrix[T] = {
+    config: TextTableConfiguration = TextTableConfiguration(),
+    cache: Option[String] = None): VariantSampleMatrix[T] = {
     val files = hc.hadoopConf.globAll(paths)
     if (files.isEmpty)
       fatal("Arguments referred to no files")
 
-    val (struct, locusRDD) = TextTableReader.read(sparkContext)(files, config, nPartitions)
+    import is.hail.variant.LocusImplicits.orderedKey
+
+    // cached tables keep their own partitioning, the join below does not shuffle them
+    def parse(partitioner: Option[OrderedPartitioner[Locus, Locus]]): (Type, OrderedRDD[Locus, Locus, Annotation]) = {
+      val (struct, locusRDD) = TextTableReader.read(sparkContext)(files, config, nPartitions)
+      val locusQuery = struct.parseInStructScope[Locus](locusExpr)
+      val keyed = locusRDD.flatMap {
+        _.map { a =>
+          locusQuery(a).map(l => (l, a))
+        }.value
+      }
+      (struct, partitioner match {
+        case Some(p) => keyed.toOrderedRDD(p)
+        case None => OrderedRDD(keyed, None, None)
+      })
+    }
+
+    val (struct, lociRDD) = cache match {
+      case Some(dir) =>
+        AnnotationCache.locusTable(hc, dir, files, config.toString, locusExpr)(parse(None))
+      case None => parse(Some(rdd.orderedPartitioner.mapMonotonic))
+    }
 
     val (isCode, annotationExpr) = (root, code) match {
       case (Some(r), None) => (false, r)
@@ -732,16 +765,6 @@ class VariantSampleMatrix[T](val hc: HailContext, val metadata: VariantMetadata,
         Annotation.buildInserter(annotationExpr, vaSignature, ec, Annotation.VARIANT_HEAD)
       } else insertVA(struct, Parser.parseAnnotationRoot(annotationExpr, Annotation.VARIANT_HEAD))
 
-    val locusQuery = struct.parseInStructScope[Locus](locusExpr)
-
-
-    import is.hail.variant.LocusImplicits.orderedKey
-    val lociRDD = locusRDD.flatMap {
-      _.map { a =>
-        locusQuery(a).map(l => (l, a))
-      }.value
-    }.toOrderedRDD(rdd.orderedPartitioner.mapMonotonic)
-
     annotateLoci(lociRDD, finalType, inserter)
   }
 
@@ -764,18 +787,39 @@ class VariantSampleMatrix[T](val hc: HailContext, val metadata: VariantMetadata,
 
   def annotateVariantsTable(path: String, variantExpr: String,
     root: Option[String] = None, code: Option[String] = None,
-    config: TextTableConfiguration = TextTableConfiguration()): VariantSampleMatrix[T] = {
-    annotateVariantsTables(List(path), variantExpr, root, code, config)
+    config: TextTableConfiguration = TextTableConfiguration(),
+    cache: Option[String] = None): VariantSampleMatrix[T] = {
+    annotateVariantsTables(List(path), variantExpr, root, code, config, cache)
   }
 
   def annotateVariantsTables(paths: Seq[String], variantExpr: String,
     root: Option[String] = None, code: Option[String] = None,
-    config: TextTableConfiguration = TextTableConfiguration()): VariantSampleMatrix[T] = {
+    config: TextTableConfiguration = TextTableConfiguration(),
+    cache: Option[String] = None): VariantSampleMatrix[T] = {
     val files = hc.hadoopConf.globAll(paths)
     if (files.isEmpty)
       fatal("Arguments referred to no files")
 
-    val (struct, variantRDD) = TextTableReader.read(sparkContext)(files, config, nPartitions)
+    // cached tables keep their own partitioning, the join below does not shuffle them
+    def parse(partitioner: Option[OrderedPartitioner[Locus, Variant]]): (Type, OrderedRDD[Locus, Variant, Annotation]) = {
+      val (struct, variantRDD) = TextTableReader.read(sparkContext)(files, config, nPartitions)
+      val variantQuery = struct.parseInStructScope[Variant](variantExpr)
+      val keyed = variantRDD.flatMap {
+        _.map { a =>
+          variantQuery(a).map(v => (v, a))
+        }.value
+      }
+      (struct, partitioner match {
+        case Some(p) => keyed.toOrderedRDD(p)
+        case None => OrderedRDD(keyed, None, None)
+      })
+    }
+
+    val (struct, keyedRDD) = cache match {
+      case Some(dir) =>
+        AnnotationCache.variantTable(hc, dir, files, config.toString, variantExpr)(parse(None))
+      case None => parse(Some(rdd.orderedPartitioner))
+    }
 
     val (isCode, annotationExpr) = (root, code) match {
       case (Some(r), None) => (false, r)
@@ -791,14 +835,6 @@ class VariantSampleMatrix[T](val hc: HailContext, val metadata: VariantMetadata,
         Annotation.buildInserter(annotationExpr, vaSignature, ec, Annotation.VARIANT_HEAD)
       } else insertVA(struct, Parser.parseAnnotationRoot(annotationExpr, Annotation.VARIANT_HEAD))
 
-    val variantQuery = struct.parseInStructScope[Variant](variantExpr)
-
-    val keyedRDD = variantRDD.flatMap {
-      _.map { a =>
-        variantQuery(a).map(v => (v, a))
-      }.value
-    }.toOrderedRDD(rdd.orderedPartitioner)
-
     annotateVariants(keyedRDD, finalType, inserter)
   }
 
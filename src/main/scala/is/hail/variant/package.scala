@@ -19,6 +19,8 @@ package object variant {
 
     def hardCallIterator: IntIterator = ig match {
       case gs: GenotypeStream => gs.gsHardCallIterator
+      case dgs: DosageGenotypeStream => dgs.hardCallIterator
+      case pgs: PackedGenotypeStream => pgs.hardCallIterator
       case _ =>
         new IntIterator {
           val it: Iterator[Genotype] = ig.iterator
@@ -7,6 +7,7 @@ import is.hail.check.Prop._
 import is.hail.expr.TStruct
 import is.hail.utils._
 import is.hail.variant.{Genotype, VSMSubgen, Variant, VariantSampleMatrix}
+import htsjdk.tribble.readers.TabixReader
 import org.testng.annotations.Test
 
 import scala.io.Source
@@ -126,4 +127,42 @@ class ExportVcfSuite extends SparkSuite {
     }
 
   }
-}
\ No newline at end of file
+
+  @Test def testTabixIndex() {
+    for (vcfFile <- Array("src/test/resources/multipleChromosomes.vcf", "src/test/resources/sample.vcf")) {
+      val out = tmpDir.createTempFile("indexed", ".vcf.bgz")
+
+      val vds = hc.importVCF(vcfFile, nPartitions = Some(10))
+      vds.exportVCF(out)
+
+      assert(hadoopConf.exists(out + ".tbi"))
+      assert(hc.importVCF(out).same(vds, 1e-3))
+
+      val variants = vds.variants.collect().sorted
+
+      val reader = new TabixReader(out)
+      try {
+        def query(region: String): IndexedSeq[Variant] = {
+          val it = reader.query(region)
+          Iterator.continually(it.next())
+            .takeWhile(_ != null)
+            .map { line =>
+              val a = line.split("\t")
+              Variant(a(0), a(1).toInt, a(3), a(4).split(","))
+            }.toIndexedSeq
+        }
+
+        variants.map(_.contig).distinct.foreach { contig =>
+          assert(query(contig) == variants.filter(_.contig == contig).toIndexedSeq)
+        }
+
+        val v = variants(variants.length / 2)
+        val region = s"${ v.contig }:${ v.start - 5000 }-${ v.start + 5000 }"
+        assert(query(region) == variants.filter(v2 => v2.contig == v.contig &&
+          v2.start + v2.ref.length - 1 >= v.start - 5000 && v2.start <= v.start + 5000).toIndexedSeq)
+      } finally {
+        reader.close()
+      }
+    }
+  }
+}
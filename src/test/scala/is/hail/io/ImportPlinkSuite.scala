@@ -4,6 +4,7 @@ import is.hail.check.Gen._
 import is.hail.check.Prop._
 import is.hail.check.Properties
 import is.hail.io.plink.PlinkLoader
+import is.hail.methods.{IBD, ToStandardizedIndexedRowMatrix}
 import is.hail.utils._
 import is.hail.variant._
 import is.hail.{SparkSuite, TestUtils}
@@ -66,4 +67,30 @@ class ImportPlinkSuite extends SparkSuite {
   @Test def testPlinkImportRandom() {
     Spec.check()
   }
+
+  @Test def testPackedGenotypes() {
+    val root = tmpDir.createTempFile("packed")
+    hc.importVCF("src/test/resources/sample.vcf")
+      .splitMulti()
+      .exportPlink(root)
+
+    val packed = hc.importPlinkBFile(root, nPartitions = Some(4))
+    assert(packed.rdd.partitions.length == 4)
+    assert(packed.rdd.map { case (_, (_, gs)) => gs.isInstanceOf[PackedGenotypeStream] }.collect().forall(identity))
+
+    val decoded = packed.copy(rdd = packed.rdd.mapValues { case (va, gs) =>
+      (va, gs.toArray: Iterable[Genotype])
+    }.asOrderedRDD)
+
+    assert(packed.rdd.map { case (v, (_, gs)) => (v, gs.hardCallIterator.toIndexedSeq) }.collect().toSeq ==
+      decoded.rdd.map { case (v, (_, gs)) => (v, gs.map(_.unboxedGT).toIndexedSeq) }.collect().toSeq)
+
+    assert(IBD.computeIBDMatrix(packed, None, bounded = true).collect().toMap ==
+      IBD.computeIBDMatrix(decoded, None, bounded = true).collect().toMap)
+
+    val (_, packedMat) = ToStandardizedIndexedRowMatrix(packed)
+    val (_, decodedMat) = ToStandardizedIndexedRowMatrix(decoded)
+    assert(packedMat.rows.map(r => (r.index, r.vector.toArray.toIndexedSeq)).collect().toMap ==
+      decodedMat.rows.map(r => (r.index, r.vector.toArray.toIndexedSeq)).collect().toMap)
+  }
 }
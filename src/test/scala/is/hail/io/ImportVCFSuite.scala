@@ -1,8 +1,13 @@
 package is.hail.io
 
-import is.hail.SparkSuite
+import java.util.zip.GZIPOutputStream
+
+import is.hail.{SparkSuite, TestUtils}
 import is.hail.io.vcf.{LoadVCF, VCFReport}
+import is.hail.utils._
 import is.hail.variant.Genotype
+import org.apache.hadoop.fs.Path
+import org.apache.hadoop.io.IOUtils
 import org.apache.spark.SparkException
 import org.testng.annotations.Test
 
@@ -12,6 +17,38 @@ class ImportVCFSuite extends SparkSuite {
     assert(hc.importVCF("src/test/resources/infochar.vcf").countVariants() == 1)
   }
 
+  @Test def testGzipInputs() {
+    val expected = hc.importVCF("src/test/resources/sample.vcf")
+
+    // sample.vcf.gz is BGZF and loads in parallel without flags
+    assert(hadoopConf.isBGzipFile("src/test/resources/sample.vcf.gz"))
+    assert(hc.importVCF("src/test/resources/sample.vcf.gz").same(expected))
+
+    val gzipFile = tmpDir.createTempFile("plain", ".vcf.gz")
+    hadoopConf.readFile("src/test/resources/sample.vcf") { is =>
+      val os = new GZIPOutputStream(hadoopConf.fileSystem(gzipFile).create(new Path(gzipFile)))
+      try {
+        IOUtils.copyBytes(is, os, 4096)
+      } finally {
+        os.close()
+      }
+    }
+    assert(!hadoopConf.isBGzipFile(gzipFile))
+
+    TestUtils.interceptFatal("cannot be loaded in parallel")(hc.importVCF(gzipFile))
+
+    assert(hc.importVCF(gzipFile, force = true).same(expected))
+    assert(!hadoopConf.exists(gzipFile + ".bgz"))
+
+    assert(hc.importVCF(gzipFile, checkpointBGZ = true).same(expected))
+    assert(hadoopConf.isBGzipFile(gzipFile + ".bgz"))
+    val copyTime = hadoopConf.fileStatus(gzipFile + ".bgz").getModificationTime
+
+    // the BGZF copy is reused
+    assert(hc.importVCF(gzipFile, checkpointBGZ = true).same(expected))
+    assert(hadoopConf.fileStatus(gzipFile + ".bgz").getModificationTime == copyTime)
+  }
+
   @Test def lineRef() {
 
     val line1 = "20\t10280082\t.\tA\tG\t844.69\tPASS\tAC=1;..."
@@ -4,6 +4,7 @@ import is.hail.SparkSuite
 import is.hail.check.Gen._
 import is.hail.check.Prop._
 import is.hail.check.{Gen, Properties}
+import is.hail.io.bgen.{BgenInputFormat, BgenVariantIndex}
 import is.hail.utils._
 import is.hail.variant._
 import org.testng.annotations.Test
@@ -136,4 +137,47 @@ class LoadBgenSuite extends SparkSuite {
   @Test def testBgenImportRandom() {
     Spec.check()
   }
-}
\ No newline at end of file
+
+  @Test def testIndexedSubset() {
+    val sampleFile = "src/test/resources/example.sample"
+    val bgen = "src/test/resources/example.v11.bgen"
+
+    hadoopConf.delete(bgen + ".idx", recursive = true)
+    hadoopConf.delete(bgen + ".idx.loci", recursive = true)
+    hc.indexBgen(bgen)
+
+    val vIndex = BgenVariantIndex.read(hadoopConf, bgen).get
+    val full = hc.importBgen(bgen, sampleFile = Some(sampleFile), nPartitions = Some(4))
+    assert(vIndex.nVariants == full.countVariants())
+
+    val splits = vIndex.splits(Array.range(0, vIndex.nVariants), 4)
+    assert(splits.length == 4 && splits.forall(_.length == 1))
+    val ranges = splits.map(_.head)
+    assert(ranges.head._1 == vIndex.offsets.head && ranges.last._2 == vIndex.offsets.last)
+    assert(ranges.zip(ranges.tail).forall { case ((_, end), (start, _)) => end == start })
+    assert(vIndex.splits(Array(1, 2, 5), 10).map(_.toSeq).toSeq == Seq(
+      Seq((vIndex.offsets(1), vIndex.offsets(2))), Seq((vIndex.offsets(2), vIndex.offsets(3))),
+      Seq((vIndex.offsets(5), vIndex.offsets(6)))))
+
+    // scattered variants are packed into nSplits splits of several ranges
+    val scattered = Array.range(0, vIndex.nVariants, 2)
+    val scatteredSplits = vIndex.splits(scattered, 2)
+    assert(scatteredSplits.length == 2)
+    assert(scatteredSplits.flatten.toSeq == scattered.toSeq.map(i => (vIndex.offsets(i), vIndex.offsets(i + 1))))
+    assert(BgenInputFormat.decodeSplits(BgenInputFormat.encodeSplits(scatteredSplits)).map(_.toSeq).toSeq ==
+      scatteredSplits.map(_.toSeq).toSeq)
+
+    val variants = full.variants.collect().sorted
+    val picked = Array(variants(3), variants(variants.length / 2), variants.last)
+    val byVariant = hc.importBgen(bgen, sampleFile = Some(sampleFile), variants = Some(picked.toSeq),
+      nPartitions = Some(1))
+    assert(byVariant.nPartitions == 1)
+    assert(byVariant.same(full.filterVariants((v, _, _) => picked.contains(v))))
+
+    val v = variants(variants.length / 2)
+    val intervals = IntervalTree(Array(Interval(Locus(v.contig, v.start - 1000), Locus(v.contig, v.start + 1000))))
+    val byInterval = hc.importBgen(bgen, sampleFile = Some(sampleFile), intervals = Some(intervals))
+    assert(byInterval.countVariants() > 0)
+    assert(byInterval.same(full.filterIntervals(intervals, keep = true)))
+  }
+}
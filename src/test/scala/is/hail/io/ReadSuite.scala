@@ -1,7 +1,10 @@
 package is.hail.io
 
 import is.hail.SparkSuite
+import is.hail.TestUtils
+import is.hail.expr.{Field, TString, TStruct}
 import is.hail.utils._
+import is.hail.variant.{Locus, VariantDataset}
 import org.apache.spark.sql.Row
 import org.apache.spark.sql.types.{LongType, StructField, StructType}
 import org.testng.annotations.Test
@@ -37,4 +40,69 @@ class ReadSuite extends SparkSuite {
     val rdd2 = sqlContext.readParquetSorted(file)
     assert(rdd2.partitions.length == 2)
   }
+
+  @Test def testReadIntervals() {
+    val vds = hc.importVCF("src/test/resources/multipleChromosomes.vcf", nPartitions = Some(10))
+    val out = tmpDir.createTempFile("intervals", ".vds")
+    vds.write(out)
+
+    val intervals = IntervalTree(Array(
+      Interval(Locus("2", 10285000), Locus("2", 10390000)),
+      Interval(Locus("5", 1), Locus("5", 1000000000)),
+      Interval(Locus("X", 1), Locus("X", 2))), prune = true)
+
+    val expected = vds.filterIntervals(intervals, keep = true)
+    val actual = hc.read(out, intervals = Some(intervals))
+    assert(actual.countVariants() > 0)
+    assert(actual.same(expected))
+    assert(actual.rdd.partitions.length < vds.rdd.partitions.length)
+
+    val multiContig = IntervalTree(Array(Interval(Locus("3", 1), Locus("4", 10100000))), prune = true)
+    assert(VariantDataset.intervalsFilter(multiContig).isEmpty)
+    assert(hc.read(out, intervals = Some(multiContig)).same(vds.filterIntervals(multiContig, keep = true)))
+
+    assert(hc.read(out, intervals = Some(IntervalTree(Array.empty[Interval[Locus]]))).countVariants() == 0)
+  }
+
+  @Test def testReadFields() {
+    val vds = hc.importVCF("src/test/resources/sample.vcf")
+      .annotateSamplesExpr("sa.a = 5, sa.b.c = s.id, sa.b.d = 1.0")
+      .variantQC()
+    val out = tmpDir.createTempFile("fields", ".vds")
+    vds.write(out)
+
+    val pruned = hc.read(out, variantFields = Some(Seq("info.AC", "qc.AF")), sampleFields = Some(Seq("b.c")),
+      genotypeFields = Some(Seq("gt", "gq")))
+
+    val (acType, acQuery) = vds.queryVA("va.info.AC")
+    val (afType, afQuery) = vds.queryVA("va.qc.AF")
+    // pruned fields keep their attributes, like the VCF INFO descriptions
+    val acAttrs = vds.vaSignature.fieldOption("info", "AC").get.attrs
+    assert(acAttrs.nonEmpty)
+    assert(pruned.vaSignature == TStruct(
+      "info" -> TStruct(Array(Field("AC", acType, 0, acAttrs))),
+      "qc" -> TStruct("AF" -> afType)))
+    assert(pruned.saSignature == TStruct("b" -> TStruct("c" -> TString)))
+    assert(pruned.sampleAnnotations == pruned.sampleIds.map(s => Row(Row(s))))
+
+    val expected = vds.rdd.mapValues { case (va, gs) =>
+      (Row(Row(acQuery(va).orNull), Row(afQuery(va).orNull)), gs.map(g => (g.gt, g.gq)).toIndexedSeq)
+    }.collectAsMap()
+    val actual = pruned.rdd.mapValues { case (va, gs) =>
+      assert(gs.forall(g => g.dp.isEmpty && g.ad.isEmpty && g.pl.isEmpty))
+      (va, gs.map(g => (g.gt, g.gq)).toIndexedSeq)
+    }.collectAsMap()
+    assert(actual == expected)
+
+    val sites = hc.read(out, variantFields = Some(Seq.empty), genotypeFields = Some(Seq("gt")))
+    assert(sites.vaSignature == TStruct.empty)
+    assert(sites.countVariants() == vds.countVariants())
+
+    TestUtils.interceptFatal("no field `foo' in `va.info'") {
+      hc.read(out, variantFields = Some(Seq("info.foo")))
+    }
+    TestUtils.interceptFatal("unknown genotype field") {
+      hc.read(out, genotypeFields = Some(Seq("foo")))
+    }
+  }
 }
@@ -73,6 +73,14 @@ class BGzipCodecSuite extends SparkSuite {
 
     assert(uncomp.sameElements(decomp))
 
+    for (readAhead <- Array(1, 3, 16)) {
+      val readAheadIS = new BGzipInputStream(fs.open(compHPath), 0L, Long.MAX_VALUE,
+        hd.io.compress.SplittableCompressionCodec.READ_MODE.BYBLOCK, readAhead, 2)
+      val readAheadDecomp = IOUtils.toByteArray(readAheadIS)
+      readAheadIS.close()
+      assert(uncomp.sameElements(readAheadDecomp))
+    }
+
     val lines = Source.fromBytes(uncomp).getLines.toArray
 
     assert(sc.textFile(uncompPath).collectOrdered()
@@ -84,6 +92,15 @@ class BGzipCodecSuite extends SparkSuite {
       assert(linesRDD.collectOrdered().sameElements(lines))
     }
 
+    sc.hadoopConfiguration.setInt(BGzipCodec.READ_AHEAD_BLOCKS_KEY, 4)
+    try {
+      for (i <- Array(1, 7)) {
+        assert(sc.textFile(compPath, i).collectOrdered().sameElements(lines))
+      }
+    } finally {
+      sc.hadoopConfiguration.unset(BGzipCodec.READ_AHEAD_BLOCKS_KEY)
+    }
+
     val compLength = 195353
     val compSplits = Array[Long](6566, 20290, 33438, 41165, 56691, 70278, 77419, 92522, 106310, 112477, 112505, 124593,
       136405, 144293, 157375, 169172, 175174, 186973, 195325)
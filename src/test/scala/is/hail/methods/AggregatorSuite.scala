@@ -2,7 +2,7 @@ package is.hail.methods
 
 import is.hail.check.{Gen, Prop}
 import is.hail.utils._
-import is.hail.variant.{VSMSubgen, VariantSampleMatrix}
+import is.hail.variant.{VSMSubgen, VariantSampleMatrix, _}
 import is.hail.{SparkSuite, TestUtils}
 import org.apache.spark.sql.Row
 import org.apache.spark.util.StatCounter
@@ -222,6 +222,24 @@ class AggregatorSuite extends SparkSuite {
     }.check()
   }
 
+  @Test def testQueryBatch() {
+    Prop.forAll(VariantSampleMatrix.gen(hc, VSMSubgen.random)) { vds =>
+      val r = vds.queryBatch(
+        Array("variants.count()", "variants.map(v => v.start).sum()"),
+        Array("gs.count()", "gs.filter(g => g.isCalled).count()", "gs.map(g => g.gq).sum()"),
+        countGenotypes = true)
+
+      val nCalled = vds.rdd.map { case (_, (_, gs)) => gs.count(_.isCalled).toLong }.fold(0L)(_ + _)
+      val gqSum = vds.rdd.map { case (_, (_, gs)) => gs.flatMap(_.gq).map(_.toLong).sum }.fold(0L)(_ + _)
+
+      r.variantResults.map(_._1).toSeq == vds.queryVariants(Array("variants.count()", "variants.map(v => v.start).sum()")).map(_._1).toSeq &&
+        r.genotypeResults(0)._1 == vds.countVariants() * vds.nSamples &&
+        r.genotypeResults(1)._1 == nCalled &&
+        r.genotypeResults(2)._1 == gqSum &&
+        r.count == CountResult(vds.nSamples, vds.countVariants(), Some(nCalled))
+    }.check()
+  }
+
   @Test def testTake() {
     val vds = hc.importVCF("src/test/resources/aggTake.vcf")
       .annotateVariantsExpr("va.take = gs.map(g => g.dp).take(3)")
@@ -752,6 +752,10 @@ class ExprSuite extends SparkSuite {
       property("spark") = forAll(g) { case (t, a) =>
         SparkAnnotationImpex.importAnnotation(SparkAnnotationImpex.exportAnnotation(a, t), t) == a
       }
+
+      property("binary") = forAll(g) { case (t, a) =>
+        BinaryAnnotationImpex.importAnnotation(BinaryAnnotationImpex.exportAnnotation(a, t), t) == a
+      }
     }
 
     Spec.check()
@@ -455,5 +455,40 @@ class ImportAnnotationsSuite extends SparkSuite {
 
     assert(byPosition.same(byVariant))
   }
+
+  @Test def testCachedAnnotations() {
+    val vds = hc.importVCF("src/test/resources/sample2.vcf")
+      .splitMulti()
+    val cache = tmpDir.createTempFile("annotationCache")
+
+    def byVariant(cache: Option[String]) = vds.annotateVariantsTable(
+      "src/test/resources/sample2_va_nomulti.tsv",
+      "Variant(Chromosome, Position.toInt, Ref, Alt)",
+      code = Some("va.stuff = select(table, Rand1, Rand2)"),
+      config = TextTableConfiguration(types = Map("Rand1" -> TDouble, "Rand2" -> TDouble)),
+      cache = cache)
+
+    def byPosition(cache: Option[String]) = vds.annotateVariantsLoci(
+      "src/test/resources/sample2_va_positions.tsv",
+      "Locus(Chromosome, Position.toInt)",
+      code = Some("va.stuff = select(table, Rand1, Rand2)"),
+      config = TextTableConfiguration(types = Map("Rand1" -> TDouble, "Rand2" -> TDouble)),
+      cache = cache)
+
+    def byBED(cache: Option[String]) = vds.annotateVariantsBED("src/test/resources/example2.bed", "va.test",
+      cache = cache)
+
+    def byIntervals(cache: Option[String]) = vds.annotateVariantsIntervals(
+      "src/test/resources/exampleAnnotation2.interval_list", "va.test", cache = cache)
+
+    for (annotate <- Seq(byVariant _, byPosition _, byBED _, byIntervals _)) {
+      val expected = annotate(None)
+      // first call populates the cache, second reads from it
+      assert(annotate(Some(cache)).same(expected))
+      assert(annotate(Some(cache)).same(expected))
+    }
+
+    assert(hadoopConf.glob(cache + "/*").length == 4)
+  }
 }
 
@@ -1,10 +1,13 @@
 package is.hail.methods
 
+import java.io.{ByteArrayInputStream, DataInputStream}
+
 import is.hail.SparkSuite
 import is.hail.annotations._
 import is.hail.expr._
 import is.hail.keytable.KeyTable
 import is.hail.utils._
+import org.apache.spark.sql.Row
 import org.testng.annotations.Test
 
 class KeyTableSuite extends SparkSuite {
@@ -64,6 +67,38 @@ class KeyTableSuite extends SparkSuite {
     assert(importedData == exportedData)
   }
 
+  @Test def testCollectPartitionBinary() = {
+    val kt = sampleKT2
+    val rows = (0 until kt.nPartitions).flatMap { i =>
+      val in = new DataInputStream(new ByteArrayInputStream(kt.collectPartitionBinary(i)))
+      (0 until in.readInt()).map(_ => BinaryAnnotationImpex.read(in, kt.signature))
+    }
+
+    assert(rows == KeyTable.toSingleRDD(kt.rdd, kt.nKeys, kt.nValues).collect().toIndexedSeq)
+
+    intercept[FatalException] {
+      kt.collectPartitionBinary(kt.nPartitions)
+    }
+  }
+
+  @Test def testCollectPartitionColumnsBinary() = {
+    val kt = sampleKT1
+    val rows = KeyTable.toSingleRDD(kt.rdd, kt.nKeys, kt.nValues).collect().toIndexedSeq
+    val field1 = (0 until kt.nPartitions).flatMap { i =>
+      val in = new DataInputStream(new ByteArrayInputStream(kt.collectPartitionColumnsBinary(i, Array("field1"))))
+      val n = in.readInt()
+      val missing = (0 until n).map(_ => in.readBoolean())
+      assert(missing.forall(!_))
+      (0 until n).map(_ => in.readInt())
+    }
+
+    assert(field1 == rows.map(_.asInstanceOf[Row].getInt(1)))
+
+    intercept[FatalException] {
+      kt.collectPartitionColumnsBinary(0, Array("nonexistent"))
+    }
+  }
+
   @Test def testAnnotate() = {
     val inputFile = "src/test/resources/sampleAnnotations.tsv"
     val kt1 = hc.importKeyTable(List(inputFile), List("Sample"), None, TextTableConfiguration(impute = true))
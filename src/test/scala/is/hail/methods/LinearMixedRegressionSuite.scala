@@ -1,13 +1,15 @@
 package is.hail.methods
 
 import breeze.linalg._
+import breeze.numerics.abs
 import breeze.stats.mean
 import is.hail.annotations._
-import is.hail.expr.{TDouble, TStruct}
+import is.hail.expr.{TDouble, TStruct, Type}
 import is.hail.stats._
 import is.hail.utils._
 import is.hail.variant.Variant
 import is.hail.{SparkSuite, TestUtils}
+import org.apache.spark.sql.Row
 import org.testng.annotations.Test
 
 class LinearMixedRegressionSuite extends SparkSuite {
@@ -373,4 +375,159 @@ class LinearMixedRegressionSuite extends SparkSuite {
     assert(math.abs(beta(0) - fitBeta("intercept")) < 0.05)
     assert(math.abs(beta(1) - fitBeta("sa.covs.cov1")) < 0.05)
   }
+
+  @Test def testBlockedMatchesSparse() {
+    val bnm = BaldingNicholsModel(hc, 3, 100, 200, None, None, 1, Some(4), UniformDist(.1, .9))
+    val pheno = bnm.sampleIds.map(s => (s, (s.toInt % 7).toDouble)).toMap
+
+    val assocVds = bnm
+      .annotateSamples(pheno, TDouble, "sa.pheno")
+      .filterGenotypes("(v.start + s.id.toInt) % 11 == 0", keep = false)
+    val kinshipVds = assocVds.filterVariants((v, va, gs) => v.start <= 100)
+
+    def run(sparsityThreshold: Double): (Map[Variant, Annotation], Querier) = {
+      val vds = LinearMixedRegression(assocVds, kinshipVds, "sa.pheno", Array.empty[String],
+        useML = false, rootGA = "global.lmmreg", rootVA = "va.lmmreg", runAssoc = true, optDelta = Some(1.0),
+        sparsityThreshold = sparsityThreshold, forceBlock = false, forceGrammian = false)
+      (vds.variantsAndAnnotations.collect().toMap, vds.queryVA("va.lmmreg")._2)
+    }
+
+    val (sparse, qSparse) = run(1.0)
+    val (blocked, qBlocked) = run(0.0)
+
+    assert(sparse.keySet == blocked.keySet)
+    sparse.foreach { case (v, va) =>
+      val rs = qSparse(va).map(_.asInstanceOf[Row])
+      val rb = qBlocked(blocked(v)).map(_.asInstanceOf[Row])
+      assert(rs.isDefined == rb.isDefined)
+      rs.foreach { r =>
+        (0 until r.size).foreach { i =>
+          r.get(i) match {
+            case x: Double => assert(D_==(x, rb.get.getAs[Double](i)))
+            case x => assert(x == rb.get.get(i))
+          }
+        }
+      }
+    }
+  }
+
+  @Test def testKinshipCache() {
+    val bnm = BaldingNicholsModel(hc, 3, 100, 200, None, None, 1, Some(4), UniformDist(.1, .9))
+    val pheno = bnm.sampleIds.map(s => (s, (s.toInt % 7).toDouble)).toMap
+
+    val assocVds = bnm
+      .annotateSamples(pheno, TDouble, "sa.pheno")
+      .annotateSamplesExpr("sa.pheno2 = sa.pheno * sa.pheno")
+    val kinshipVds = assocVds.filterVariants((v, va, gs) => v.start <= 100)
+    val cache = tmpDir.createTempFile("kinshipCache")
+
+    // the RRM is aggregated in task completion order, so independent runs agree only up to rounding
+    def run(ySA: String, kinshipCache: Option[String]): (Type, Annotation, Type, Map[Variant, Annotation]) = {
+      val vds = assocVds.lmmreg(kinshipVds, ySA, Array.empty[String], useML = false, rootGA = "global.lmmreg",
+        rootVA = "va.lmmreg", runAssoc = true, optDelta = None, sparsityThreshold = 1.0, forceBlock = false,
+        forceGrammian = false, kinshipCache = kinshipCache)
+      val (globalType, global) = vds.queryGlobal("global.lmmreg")
+      (globalType, global.orNull, vds.vaSignature, vds.variantsAndAnnotations.collect().toMap)
+    }
+
+    def similar(r1: (Type, Annotation, Type, Map[Variant, Annotation]),
+      r2: (Type, Annotation, Type, Map[Variant, Annotation])): Boolean = {
+      val (globalType, global1, vaType, va1) = r1
+      val (_, global2, _, va2) = r2
+      globalType.valuesSimilar(global1, global2, 1e-6) &&
+        va1.keySet == va2.keySet &&
+        va1.forall { case (v, va) => vaType.valuesSimilar(va, va2(v), 1e-6) }
+    }
+
+    def nEntries = hadoopConf.glob(cache + "/*.eig").length
+
+    val expected = run("sa.pheno", None)
+    assert(similar(run("sa.pheno", Some(cache)), expected))
+    assert(nEntries == 1)
+    assert(similar(run("sa.pheno", Some(cache)), expected))
+
+    // the same samples are complete for sa.pheno2
+    assert(similar(run("sa.pheno2", Some(cache)), run("sa.pheno2", None)))
+    assert(nEntries == 1)
+
+    // a different set of complete samples has its own entry
+    assocVds.filterSamples((s, sa) => s.toInt % 2 == 0)
+      .lmmreg(kinshipVds, "sa.pheno", Array.empty[String], useML = false, rootGA = "global.lmmreg",
+        rootVA = "va.lmmreg", runAssoc = false, optDelta = None, sparsityThreshold = 1.0, forceBlock = false,
+        forceGrammian = false, kinshipCache = Some(cache))
+    assert(nEntries == 2)
+  }
+
+  @Test def testLowRank() {
+    val bnm = BaldingNicholsModel(hc, 3, 100, 200, None, None, 1, Some(4), UniformDist(.1, .9))
+    val pheno = bnm.sampleIds.map(s => (s, (s.toInt % 7).toDouble)).toMap
+
+    val assocVds = bnm
+      .annotateSamples(pheno, TDouble, "sa.pheno")
+      .annotateSamplesExpr("sa.cov = s.id.toInt % 3")
+    // the RRM of 20 variants has rank at most 20, so its rank-20 approximation is exact
+    val kinshipVds = assocVds.filterVariants((v, va, gs) => v.start <= 20)
+
+    def run(rank: Option[Int]) = {
+      val vds = assocVds.lmmreg(kinshipVds, "sa.pheno", Array("sa.cov"), useML = false, rootGA = "global.lmmreg",
+        rootVA = "va.lmmreg", runAssoc = true, optDelta = None, sparsityThreshold = 0.5, forceBlock = false,
+        forceGrammian = false, rank = rank)
+      val globals = Array("delta", "sigmaG2", "h2").map(f => vds.queryGlobal(s"global.lmmreg.$f")._2.get.asInstanceOf[Double])
+      val q = Array("beta", "sigmaG2", "chi2", "pval").map(f => vds.queryVA(s"va.lmmreg.$f")._2)
+      (globals, vds.variantsAndAnnotations.collect().map { case (v, va) => (v, q.map(_(va))) }.toMap)
+    }
+
+    val (fullGlobals, full) = run(None)
+    val (lowRankGlobals, lowRank) = run(Some(20))
+
+    fullGlobals.zip(lowRankGlobals).foreach { case (x, y) => assert(D_==(x, y, 1e-4)) }
+    full.foreach { case (v, stats) =>
+      stats.zip(lowRank(v)).foreach { case (x, y) =>
+        assert(x.isDefined == y.isDefined)
+        x.foreach(xi => assert(D_==(xi.asInstanceOf[Double], y.get.asInstanceOf[Double], 1e-4)))
+      }
+    }
+
+    TestUtils.interceptFatal("rank must lie in") {
+      run(Some(100))
+    }
+
+    // the hard calls of a kinship variant lie in the span of the intercept and the rank-20 eigenvectors
+    val inSpanVds = assocVds.annotateSamplesExpr("sa.g1 = gs.filter(g => v.start == 1).map(g => g.gt.toDouble).sum()")
+
+    def runInSpan(rank: Option[Int]) = {
+      val vds = inSpanVds.lmmreg(kinshipVds, "sa.pheno", Array("sa.cov", "sa.g1"), useML = false,
+        rootGA = "global.lmmreg", rootVA = "va.lmmreg", runAssoc = false, optDelta = None, sparsityThreshold = 0.5,
+        forceBlock = false, forceGrammian = false, rank = rank)
+      Array("delta", "sigmaG2", "h2").map(f => vds.queryGlobal(s"global.lmmreg.$f")._2.get.asInstanceOf[Double])
+    }
+
+    runInSpan(None).zip(runInSpan(Some(20))).foreach { case (x, y) => assert(D_==(x, y, 1e-4)) }
+  }
+
+  @Test def testResidualBasis() {
+    val rand = new scala.util.Random(0)
+    val n = 30
+    val U = qr.reduced.justQ(DenseMatrix.fill(n, 5)(rand.nextGaussian()))
+    val general = DenseMatrix.fill(n, 2)(rand.nextGaussian())
+    val inSpan = U * DenseMatrix.fill(5, 1)(rand.nextGaussian())
+    // collinear with the first general column modulo the span of U
+    val shifted = general(::, 0 to 0) * 3.0 + inSpan
+    val X = DenseMatrix.horzcat(general, inSpan, shifted)
+
+    def assertOrthonormalComplement(U: DenseMatrix[Double], Q: DenseMatrix[Double]) {
+      assert(max(abs(Q.t * Q - DenseMatrix.eye[Double](Q.cols))) < 1e-10)
+      assert(max(abs(U.t * Q)) < 1e-10)
+    }
+
+    val Q = LinearMixedRegression.residualBasis(U, X)
+    assert(Q.cols == 2)
+    assertOrthonormalComplement(U, Q)
+
+    // at most n - rank columns
+    val U29 = qr.reduced.justQ(DenseMatrix.fill(n, n - 1)(rand.nextGaussian()))
+    val Q29 = LinearMixedRegression.residualBasis(U29, general)
+    assert(Q29.cols == 1)
+    assertOrthonormalComplement(U29, Q29)
+  }
 }
\ No newline at end of file
@@ -420,4 +420,44 @@ class LinearRegressionSuite extends SparkSuite {
       vds.linreg("sa.pheno.Pheno", Array.empty[String], "va.linreg", 1, 2.0)
     }
   }
+
+  @Test def testMultiPheno() {
+    val vds = hc.importVCF("src/test/resources/regressionLinear.vcf")
+      .splitMulti()
+      .annotateSamplesTable("src/test/resources/regressionLinear.cov",
+        "Sample",
+        root = Some("sa.cov"),
+        config = TextTableConfiguration(types = Map("Cov1" -> TDouble, "Cov2" -> TDouble)))
+      .annotateSamplesTable("src/test/resources/regressionLinear.pheno",
+        "Sample",
+        root = Some("sa.pheno"),
+        config = TextTableConfiguration(types = Map("Pheno" -> TDouble), missing = "0"))
+
+    val ys = Array("sa.pheno.Pheno", "2 * sa.pheno.Pheno - sa.cov.Cov1", "sa.pheno.Pheno * sa.pheno.Pheno")
+    val covs = Array("sa.cov.Cov1", "sa.cov.Cov2")
+
+    val multi = vds.linregMultiPheno(ys, covs, "va.linreg", 1, 0.0)
+    val multiMap = multi.variantsAndAnnotations.collect().toMap
+    val fields = Array("beta", "se", "tstat", "pval")
+    val qMulti = fields.map(f => multi.queryVA(s"va.linreg.$f")._2)
+
+    ys.zipWithIndex.foreach { case (y, i) =>
+      val single = vds.linreg(y, covs, "va.linreg", 1, 0.0)
+      val singleMap = single.variantsAndAnnotations.collect().toMap
+      val qSingle = fields.map(f => single.queryVA(s"va.linreg.$f")._2)
+
+      singleMap.foreach { case (v, va) =>
+        qSingle.zip(qMulti).foreach { case (qs, qm) =>
+          val expected = qs(va)
+          val actual = qm(multiMap(v)).map(_.asInstanceOf[IndexedSeq[Double]](i))
+          assert(expected.isDefined == actual.isDefined)
+          expected.foreach(x => assert(D_==(x.asInstanceOf[Double], actual.get)))
+        }
+      }
+    }
+
+    interceptFatal("at least one phenotype") {
+      vds.linregMultiPheno(Array.empty[String], covs, "va.linreg", 1, 0.0)
+    }
+  }
 }
\ No newline at end of file
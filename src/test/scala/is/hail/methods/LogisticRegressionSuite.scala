@@ -1,10 +1,12 @@
 package is.hail.methods
 
 import is.hail.SparkSuite
+import is.hail.TestUtils._
 import is.hail.annotations.Querier
 import is.hail.expr.{TBoolean, TDouble}
 import is.hail.utils._
 import is.hail.variant.Variant
+import org.apache.spark.sql.Row
 import org.testng.annotations.Test
 
 class LogisticRegressionSuite extends SparkSuite {
@@ -370,4 +372,44 @@ class LogisticRegressionSuite extends SparkSuite {
     assertDouble(qBetaFirth, v5, 0.5258)
     assertDouble(qPValFirth, v5, 0.22562)
   }
+
+  @Test def testScoreScreen() {
+    val vds = hc.importVCF("src/test/resources/regressionLogisticEpacts.vcf")
+      .splitMulti()
+      .annotateSamplesFam("src/test/resources/regressionLogisticEpacts.fam")
+      .annotateSamplesTable("src/test/resources/regressionLogisticEpacts.cov",
+        "IND_ID",
+        root = Some("sa.pc"),
+        config = TextTableConfiguration(types = Map("PC1" -> TDouble, "PC2" -> TDouble), missing = "0"))
+      .logreg("score", "sa.fam.isCase", Array("sa.fam.isFemale", "sa.pc.PC1", "sa.pc.PC2"), "va.score")
+
+    val covs = Array("sa.fam.isFemale", "sa.pc.PC1", "sa.pc.PC2")
+    val qPValScore = vds.queryVA("va.score.pval")._2
+
+    Array("wald", "lrt", "firth").foreach { test =>
+      val screened = vds
+        .logreg(test, "sa.fam.isCase", covs, "va.full")
+        .logreg(test, "sa.fam.isCase", covs, "va.screened", screenPval = Some(0.5))
+
+      val qFull = screened.queryVA("va.full")._2
+      val qScreened = screened.queryVA("va.screened")._2
+
+      screened.variantsAndAnnotations.collect().foreach { case (v, va) =>
+        qPValScore(va) match {
+          case Some(p: Double) if p > 0.5 =>
+            assert(qScreened(va).get.asInstanceOf[Row].toSeq.forall(_ == null))
+          case _ =>
+            assert(qScreened(va) == qFull(va))
+        }
+      }
+    }
+
+    interceptFatal("only to the wald, lrt and firth tests") {
+      vds.logreg("score", "sa.fam.isCase", covs, "va.logreg", screenPval = Some(0.5))
+    }
+
+    interceptFatal("must lie in") {
+      vds.logreg("wald", "sa.fam.isCase", covs, "va.logreg", screenPval = Some(0d))
+    }
+  }
 }
@@ -4,6 +4,7 @@ import is.hail.SparkSuite
 import is.hail.check._
 import is.hail.expr._
 import is.hail.variant.{VSMSubgen, VariantDataset, VariantSampleMatrix}
+import org.apache.spark.SparkException
 import org.testng.annotations.Test
 
 import scala.io.Source
@@ -91,6 +92,40 @@ class TextTableSuite extends SparkSuite {
       "qPhen" -> TInt))
   }
 
+  @Test def testSplitter() {
+    assert(TextTableReader.literalDelimiter(",").contains(','))
+    assert(TextTableReader.literalDelimiter("\\t").contains('\t'))
+    assert(TextTableReader.literalDelimiter("\\|").contains('|'))
+    assert(TextTableReader.literalDelimiter("|").isEmpty)
+    assert(TextTableReader.literalDelimiter("\\s+").isEmpty)
+
+    for (line <- Seq("", "a", "a,b", ",a,,b,", ",,")) {
+      assert(TextTableReader.splitter(",")(line).sameElements(line.split(",", -1)))
+      assert(TextTableReader.splitter(",+")(line).sameElements(line.split(",+", -1)))
+    }
+  }
+
+  @Test def testSampledImputation() {
+    val f = tmpDir.createTempFile("sampled", ".tsv")
+    hadoopConf.writeTextFile(f) { out =>
+      out.write("a\tb\n")
+      (0 until 10).foreach(i => out.write(s"$i\ttrue\n"))
+      out.write("1.5\tfalse\n")
+    }
+
+    // every line is read by default
+    val (schema, _) = TextTableReader.read(sc)(Array(f),
+      config = TextTableConfiguration(impute = true), nPartitions = 1)
+    assert(schema == TStruct("a" -> TDouble, "b" -> TBoolean))
+
+    val (sampledSchema, rdd) = TextTableReader.read(sc)(Array(f),
+      config = TextTableConfiguration(impute = true, imputeSample = Some(5)), nPartitions = 1)
+    assert(sampledSchema == TStruct("a" -> TInt, "b" -> TBoolean))
+
+    val e = intercept[SparkException](rdd.count())
+    assert(e.getMessage.contains("a: Double"))
+  }
+
   @Test def testAnnotationsReadWrite() {
     val outPath = tmpDir.createTempFile("annotationOut", ".tsv")
     val p = Prop.forAll(VariantSampleMatrix.gen(hc, VSMSubgen.realistic)
@@ -1,5 +1,7 @@
 package is.hail.utils
 
+import java.nio.ByteBuffer
+
 import breeze.linalg.{DenseMatrix => BDenseMatrix}
 import is.hail.SparkSuite
 import is.hail.check.Arbitrary._
@@ -195,4 +197,23 @@ class UtilsSuite extends SparkSuite {
 
     p.check()
   }
+
+  @Test def testBytesToPrimitiveArrays() {
+    val ints = Array(0, -1, 7, Int.MaxValue, Int.MinValue)
+    val ib = ByteBuffer.allocate(4 * ints.length)
+    ints.foreach(ib.putInt)
+    assert(bytesToIntArray(ib.array()).sameElements(ints))
+
+    val longs = Array(0L, -1L, Long.MaxValue, Long.MinValue)
+    val lb = ByteBuffer.allocate(8 * longs.length)
+    longs.foreach(lb.putLong)
+    assert(bytesToLongArray(lb.array()).sameElements(longs))
+
+    val doubles = Array(0.0, -1.5, 1e-300, Double.MaxValue)
+    val db = ByteBuffer.allocate(8 * doubles.length)
+    doubles.foreach(db.putDouble)
+    assert(bytesToDoubleArray(db.array()).sameElements(doubles))
+
+    assert(bytesToIntArray(Array.empty[Byte]).isEmpty)
+  }
 }
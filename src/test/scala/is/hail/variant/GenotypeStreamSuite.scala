@@ -20,6 +20,53 @@ object GenotypeStreamSuite {
       val a2 = gs.hardCallIterator.toArray
       it.sameElements(a1) && a1.map(_.unboxedGT).sameElements(a2)
     }
+
+    property("project") = forAll(for (
+      v <- Variant.gen;
+      gs <- Gen.buildableOf[Iterable, Genotype](Genotype.genExtreme(v.nAlleles));
+      fields <- Gen.choose(0, Genotype.allFields))
+      yield (v, gs, fields)) { case (v: Variant, it: Iterable[Genotype], fields: Int) =>
+      val b = new GenotypeStreamBuilder(v.nAlleles)
+      b ++= it
+      val expected = it.map { g =>
+        def keep(field: Int): Boolean = (fields & field) != 0
+        new GenericGenotype(
+          if (keep(Genotype.fieldGT)) g.unboxedGT else -1,
+          if (keep(Genotype.fieldAD)) g.ad.orNull else null,
+          if (keep(Genotype.fieldDP)) g.dp.getOrElse(-1) else -1,
+          if (keep(Genotype.fieldGQ)) g.gq.getOrElse(-1) else -1,
+          if (keep(Genotype.fieldPX)) g.px.orNull else null,
+          g.fakeRef, g.isDosage)
+      }
+      b.result().project(fields).sameElements(expected)
+    }
+
+    property("dosageIterateBuild") = forAll(
+      Gen.buildableOf[Array, Genotype](Genotype.genDosage(2)),
+      Gen.oneOf(true, false)) { (gs: Array[Genotype], compress: Boolean) =>
+      val b = new DosageGenotypeStreamBuilder(gs.length, compress)
+      gs.foreach { g =>
+        g.px match {
+          case Some(px) => b.add(px)
+          case None => b.addMissing()
+        }
+      }
+      val dgs = b.result()
+      val a1 = dgs.toArray
+      val a2 = dgs.hardCallIterator.toArray
+      val d = dgs.dosages
+      val toggled = dgs.withCompression(!compress)
+      gs.sameElements(a1) &&
+        gs.sameElements(toggled.toArray) &&
+        toggled.decompLenOption.isDefined == (!compress && gs.nonEmpty) &&
+        a1.map(_.unboxedGT).sameElements(a2) &&
+        gs.indices.forall { i =>
+          gs(i).px match {
+            case Some(px) => math.abs(d(i) - (px(1) + 2 * px(2)) / 32768.0) < 1e-12
+            case None => d(i).isNaN
+          }
+        }
+    }
   }
 }
 
@@ -1,7 +1,11 @@
 package is.hail.variant
 
+import java.io.{ByteArrayInputStream, DataInputStream}
+
+import is.hail.annotations.Annotation
 import is.hail.check.Prop._
 import is.hail.check.{Gen, Properties}
+import is.hail.expr.BinaryAnnotationImpex
 import is.hail.utils.{ByteIterator, _}
 import org.scalatest.testng.TestNGSuite
 import org.testng.annotations.Test
@@ -95,6 +99,32 @@ class GenotypeSuite extends TestNGSuite {
     Spec.check()
   }
 
+  @Test def testExportGenotypeColumns() {
+    val gs = IndexedSeq[Annotation](
+      Genotype(Some(1), Some(Array(5, 5)), Some(12), Some(99), Some(Array(100, 0, 1000))),
+      null,
+      Genotype(None, None, None, None),
+      Genotype(Some(0), Some(Array(10, 0, 1)), Some(11), None, None, fakeRef = true))
+
+    val in = new DataInputStream(new ByteArrayInputStream(BinaryAnnotationImpex.exportGenotypeColumns(gs)))
+    def readInts(n: Int): IndexedSeq[Int] = (0 until n).map(_ => in.readInt())
+
+    assert(in.readInt() == 4)
+    assert(readInts(4) == IndexedSeq(1, -1, -1, 0))
+    assert(readInts(4) == IndexedSeq(12, -1, -1, 11))
+    assert(readInts(4) == IndexedSeq(99, -1, -1, -1))
+    assert((0 until 4).map(_ => in.readByte().toInt) == IndexedSeq(
+      BinaryAnnotationImpex.genotypeHasADBit | BinaryAnnotationImpex.genotypeHasPXBit,
+      BinaryAnnotationImpex.genotypeMissingBit,
+      0,
+      BinaryAnnotationImpex.genotypeHasADBit | BinaryAnnotationImpex.genotypeFakeRefBit))
+    assert(readInts(5) == IndexedSeq(0, 2, 2, 2, 5))
+    assert(readInts(5) == IndexedSeq(5, 5, 10, 0, 1))
+    assert(readInts(5) == IndexedSeq(0, 3, 3, 3, 3))
+    assert(readInts(3) == IndexedSeq(100, 0, 1000))
+    assert(in.available() == 0)
+  }
+
   @Test def gtPairGtIndexIsId() {
     forAll(Gen.choose(0, 32768), Gen.choose(0, 32768)) { (x, y) =>
       val (j, k) = if (x < y) (x, y) else (y, x)